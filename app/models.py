@@ -1,7 +1,8 @@
 from sqlalchemy import Column, Integer, String, Text, DateTime, Float, JSON, \
-    ForeignKey
+    ForeignKey, Boolean, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
+from typing import Optional
 from app.database import Base
 
 
@@ -16,6 +17,7 @@ class APISpec(Base):
                         onupdate=datetime.utcnow)
 
     test_suites = relationship("TestSuite", back_populates="api_spec")
+    generation_jobs = relationship("GenerationJob", back_populates="api_spec")
 
 
 class TestSuite(Base):
@@ -26,6 +28,7 @@ class TestSuite(Base):
     name = Column(String)
     description = Column(Text)
     generated_tests = Column(JSON)  # List of test cases
+    generation_errors = Column(JSON, nullable=True)  # Endpoints that failed
     created_at = Column(DateTime, default=datetime.utcnow)
 
     api_spec = relationship("APISpec", back_populates="test_suites")
@@ -34,17 +37,203 @@ class TestSuite(Base):
 
 class TestExecution(Base):
     __tablename__ = "test_executions"
+    __table_args__ = (
+        Index("ix_test_executions_started_at_id", "started_at", "id"),
+        Index("ix_test_executions_suite_started_at", "test_suite_id",
+              "started_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     test_suite_id = Column(Integer, ForeignKey("test_suites.id"))
     status = Column(String)  # running, completed, failed
+    # functional (each case once) or load (cases replayed for a duration);
+    # NULL on rows created before load tests existed means functional
+    execution_type = Column(String, default="functional", nullable=True)
     total_tests = Column(Integer)
     passed_tests = Column(Integer)
     failed_tests = Column(Integer)
     coverage_percentage = Column(Float)
     execution_time = Column(Float)  # seconds
-    results = Column(JSON)  # Detailed results
+    # Per-test results used to live here; new executions write test_results
+    legacy_results = Column("results", JSON, nullable=True)
+    # Latency percentiles and compact histograms, overall and per endpoint
+    latency_stats = Column(JSON, nullable=True)
+    # Load executions: target, throughput, error rate and top errors
+    load_stats = Column(JSON, nullable=True)
     started_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
 
     test_suite = relationship("TestSuite", back_populates="executions")
+    test_results = relationship("TestResult", back_populates="execution",
+                                order_by="TestResult.position",
+                                cascade="all, delete-orphan")
+    analyses = relationship("ExecutionAnalysis", back_populates="execution",
+                            cascade="all, delete-orphan")
+
+    @property
+    def results(self):
+        """Detailed per-test results, in suite order"""
+        if self.test_results:
+            return [r.to_dict() for r in self.test_results]
+        return self.legacy_results or []
+
+
+class TestResult(Base):
+    __tablename__ = "test_results"
+    __table_args__ = (
+        Index("ix_test_results_execution_status", "execution_id", "status"),
+        Index("ix_test_results_execution_position", "execution_id",
+              "position"),
+    )
+
+    # Result keys stored as columns; everything else goes into details
+    COLUMN_KEYS = ("name", "method", "endpoint", "status", "execution_time",
+                   "actual_status", "expected_status")
+
+    id = Column(Integer, primary_key=True)
+    execution_id = Column(Integer, ForeignKey("test_executions.id"),
+                          nullable=False)
+    position = Column(Integer)  # index of the test case in the suite
+    # Order the result completed in (and its SSE event id); only set for
+    # executions run in the API process
+    sequence = Column(Integer, nullable=True)
+    name = Column(String)
+    method = Column(String)
+    endpoint = Column(String)
+    status = Column(String)  # passed, failed
+    latency = Column(Float)  # seconds
+    actual_status = Column(Integer, nullable=True)
+    expected_status = Column(Integer, nullable=True)
+    details = Column(JSON)  # errors, assertions, warnings, url_tested, ...
+
+    execution = relationship("TestExecution", back_populates="test_results")
+
+    @classmethod
+    def from_result(cls, execution_id: int, position: int, result: dict,
+                    sequence: Optional[int] = None):
+        """Build a row from an executor result dict"""
+        expected = result.get("expected_status")
+        details = {k: v for k, v in result.items()
+                   if k not in cls.COLUMN_KEYS}
+        if expected is not None and not isinstance(expected, int):
+            # e.g. "2xx" from a generated case; kept as the executor saw it
+            details["expected_status"] = expected
+        return cls(
+            execution_id=execution_id,
+            position=position,
+            sequence=sequence,
+            name=result.get("name"),
+            method=result.get("method"),
+            endpoint=result.get("endpoint"),
+            status=result.get("status"),
+            latency=result.get("execution_time"),
+            actual_status=result.get("actual_status"),
+            expected_status=expected if isinstance(expected, int) else None,
+            details=details
+        )
+
+    def to_dict(self) -> dict:
+        """The executor result dict this row was built from"""
+        return self.as_result(self)
+
+    @staticmethod
+    def as_result(row) -> dict:
+        """Result dict from a row or anything with the same attributes"""
+        return {
+            "name": row.name,
+            "method": row.method,
+            "endpoint": row.endpoint,
+            "status": row.status,
+            "execution_time": row.latency,
+            "actual_status": row.actual_status,
+            "expected_status": row.expected_status,
+            **(row.details or {})
+        }
+
+
+class ExecutionAnalysis(Base):
+    __tablename__ = "execution_analyses"
+    __table_args__ = (
+        UniqueConstraint("execution_id", "model", "prompt_version",
+                         name="uq_execution_analyses_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    execution_id = Column(Integer, ForeignKey("test_executions.id"),
+                          nullable=False, index=True)
+    model = Column(String)
+    prompt_version = Column(String)
+    analysis = Column(JSON)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    execution = relationship("TestExecution", back_populates="analyses")
+
+
+class GenerationJob(Base):
+    __tablename__ = "generation_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    api_spec_id = Column(Integer, ForeignKey("api_specs.id"))
+    test_suite_id = Column(Integer, ForeignKey("test_suites.id"),
+                           nullable=True)
+    status = Column(String)  # running, completed, failed
+    include_edge_cases = Column(Boolean, default=True)
+    bypass_cache = Column(Boolean, default=False)
+    generation_mode = Column(String, nullable=True)
+    total_endpoints = Column(Integer, default=0)
+    completed_endpoints = Column(Integer, default=0)
+    failed_endpoints = Column(Integer, default=0)
+    llm_calls = Column(Integer, nullable=True)
+    # New spec version for an incremental update, applied when it completes
+    spec_content = Column(Text, nullable=True)
+    spec_name = Column(String, nullable=True)
+    diff = Column(JSON, nullable=True)  # Operations added/changed/removed
+    error = Column(Text, nullable=True)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+
+    api_spec = relationship("APISpec", back_populates="generation_jobs")
+    test_suite = relationship("TestSuite")
+
+
+class LLMCacheEntry(Base):
+    __tablename__ = "llm_cache"
+
+    key = Column(String(64), primary_key=True)  # sha256 of the inputs
+    namespace = Column(String, index=True)
+    value = Column(JSON)
+    size_bytes = Column(Integer, default=0)
+    hits = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    last_accessed_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class ExecutionShard(Base):
+    """A slice of a distributed execution, claimed and run by one worker"""
+    __tablename__ = "execution_shards"
+    __table_args__ = (
+        Index("ix_execution_shards_status_id", "status", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    execution_id = Column(Integer, ForeignKey("test_executions.id"),
+                          nullable=False, index=True)
+    shard_index = Column(Integer)
+    # Suite positions of the cases, so results land in suite order
+    positions = Column(JSON)
+    test_cases = Column(JSON)
+    base_url = Column(String)
+    concurrency = Column(Integer, default=1)
+    max_per_host = Column(Integer, nullable=True)
+    status = Column(String, default="queued")  # queued, running, completed, failed
+    worker_id = Column(String, nullable=True)
+    attempts = Column(Integer, default=0)
+    passed_tests = Column(Integer, nullable=True)
+    failed_tests = Column(Integer, nullable=True)
+    execution_time = Column(Float, nullable=True)
+    latency_stats = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    claimed_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+
+    execution = relationship("TestExecution")
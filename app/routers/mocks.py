@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app import models
+from app.services.mock_server import mock_for_spec, mock_servers
+
+router = APIRouter(prefix="/api/mocks", tags=["Mock Servers"])
+
+
+def _describe(spec_id: int, server) -> dict:
+    return {
+        "api_spec_id": spec_id,
+        "base_url": server.base_url,
+        "operations": server.responder.operations
+    }
+
+
+@router.post("/{spec_id}")
+def start_mock_server(spec_id: int, db: Session = Depends(get_db)):
+    """Serve example responses for every operation of a spec locally"""
+    api_spec = db.query(models.APISpec).filter(
+        models.APISpec.id == spec_id
+    ).first()
+
+    if not api_spec:
+        raise HTTPException(status_code=404,
+                            detail="API specification not found")
+
+    try:
+        server = mock_for_spec(api_spec)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return _describe(spec_id, server)
+
+
+@router.get("")
+def list_mock_servers():
+    """Running mock servers"""
+    return [_describe(spec_id, server)
+            for spec_id, server in mock_servers.list().items()]
+
+
+@router.delete("/{spec_id}")
+def stop_mock_server(spec_id: int):
+    """Stop a spec's mock server now, even if an execution is using it"""
+    if not mock_servers.stop(spec_id):
+        raise HTTPException(status_code=404, detail="Mock server not running")
+    return {"api_spec_id": spec_id, "stopped": True}
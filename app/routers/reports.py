@@ -1,19 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db, SessionLocal
 from app import models
-from app.services.ai_service import AIService
+from app.services import dashboard
+from app.services.analysis_store import get_or_create_analysis
+from app.services.latency_stats import latency_trends
+from typing import Optional
 
 router = APIRouter(prefix="/api/reports", tags=["Reports"])
 
 
 @router.get("/analysis/{execution_id}")
-def get_ai_analysis(execution_id: int, db: Session = Depends(get_db)):
-    """Get AI-powered analysis of test execution"""
+async def get_ai_analysis(execution_id: int, refresh: bool = False,
+                          db: AsyncSession = Depends(get_async_db)):
+    """
+    Get AI-powered analysis of test execution.
+    Served from storage when available; refresh=true re-runs the LLM.
+    """
 
-    execution = db.query(models.TestExecution).filter(
-        models.TestExecution.id == execution_id
-    ).first()
+    execution = await db.get(models.TestExecution, execution_id)
 
     if not execution:
         raise HTTPException(status_code=404, detail="Execution not found")
@@ -22,13 +28,16 @@ def get_ai_analysis(execution_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400,
                             detail="Execution not yet completed")
 
-    # Get AI analysis
-    ai_service = AIService()
-    analysis = ai_service.analyze_test_results(execution.results)
+    # The analysis may call the LLM, so it runs on a worker thread with a
+    # session of its own instead of holding up the event loop
+    analysis, stored = await run_in_threadpool(_analyze, execution_id,
+                                               refresh)
 
     return {
         "execution_id": execution_id,
         "analysis": analysis,
+        "analyzed_at": stored.created_at if stored else None,
+        "model": stored.model if stored else None,
         "execution_summary": {
             "total_tests": execution.total_tests,
             "passed_tests": execution.passed_tests,
@@ -39,42 +48,31 @@ def get_ai_analysis(execution_id: int, db: Session = Depends(get_db)):
     }
 
 
-@router.get("/dashboard")
-def get_dashboard_stats(db: Session = Depends(get_db)):
-    """Get dashboard statistics"""
+def _analyze(execution_id: int, refresh: bool):
+    db = SessionLocal()
+    try:
+        execution = db.get(models.TestExecution, execution_id)
+        return get_or_create_analysis(db, execution, refresh=refresh)
+    finally:
+        db.close()
 
-    total_specs = db.query(models.APISpec).count()
-    total_suites = db.query(models.TestSuite).count()
-    total_executions = db.query(models.TestExecution).count()
 
-    recent_executions = db.query(models.TestExecution).order_by(
-        models.TestExecution.started_at.desc()
-    ).limit(10).all()
+@router.get("/latency-trends")
+async def get_latency_trends(test_suite_id: Optional[int] = None,
+                             endpoint: Optional[str] = None,
+                             execution_type: Optional[str] = None,
+                             limit: int = Query(20, ge=1, le=200),
+                             db: AsyncSession = Depends(get_async_db)):
+    """
+    Latency percentiles (ms) across recent executions, overall or for one
+    endpoint such as "GET /users/{id}"; execution_type is functional or load
+    """
+    return await db.run_sync(
+        latency_trends, test_suite_id=test_suite_id, endpoint=endpoint,
+        execution_type=execution_type, limit=limit)
 
-    avg_coverage = db.query(models.TestExecution).filter(
-        models.TestExecution.status == "completed"
-    ).with_entities(
-        models.TestExecution.coverage_percentage
-    ).all()
 
-    avg_coverage_val = sum([c[0] for c in avg_coverage]) / len(
-        avg_coverage) if avg_coverage else 0
-
-    return {
-        "total_api_specs": total_specs,
-        "total_test_suites": total_suites,
-        "total_executions": total_executions,
-        "average_coverage": round(avg_coverage_val, 2),
-        "recent_executions": [
-            {
-                "id": e.id,
-                "test_suite_id": e.test_suite_id,
-                "status": e.status,
-                "passed_tests": e.passed_tests,
-                "failed_tests": e.failed_tests,
-                "coverage": e.coverage_percentage,
-                "started_at": e.started_at
-            }
-            for e in recent_executions
-        ]
-    }
+@router.get("/dashboard")
+async def get_dashboard_stats(db: AsyncSession = Depends(get_async_db)):
+    """Get dashboard statistics"""
+    return await db.run_sync(dashboard.get_dashboard_stats)
@@ -1,51 +1,64 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.database import get_async_db, SessionLocal
 from app import models, schemas
-from app.services.test_executor import TestExecutor
+from app.services.http_pool import default_pool
+from app.services import execution_events
+from app.services.result_store import load_result_events, load_results, \
+    query_results
+from app.services.execution_queries import list_execution_summaries
+from app.services.mock_server import mock_for_spec
+from app.services.execution_runner import submit_execution, \
+    submit_load_execution
+from app.services.execution_shards import EXECUTION_SHARDS, \
+    enqueue_execution
+from app.utils.fast_json import json_object_response, model_payload
 from datetime import datetime
+from typing import Optional
+import asyncio
+import json
 
 router = APIRouter(prefix="/api/execution", tags=["Test Execution"])
 
 
-def run_tests_background(execution_id: int, test_cases: list, base_url: str,
-                         db: Session):
-    """Background task to run tests"""
-    executor = TestExecutor(base_url)
-    results = executor.execute_test_suite(test_cases)
+async def _get_suite(db: AsyncSession, suite_id: int) -> models.TestSuite:
+    """The suite with its spec loaded (needed for mock targets), or 404"""
+    test_suite = await db.scalar(select(models.TestSuite).options(
+        selectinload(models.TestSuite.api_spec)
+    ).where(models.TestSuite.id == suite_id))
 
-    # Update execution record
-    execution = db.query(models.TestExecution).filter(
-        models.TestExecution.id == execution_id
-    ).first()
+    if not test_suite:
+        raise HTTPException(status_code=404, detail="Test suite not found")
+    return test_suite
 
-    if execution:
-        execution.status = "completed"
-        execution.total_tests = results["total_tests"]
-        execution.passed_tests = results["passed_tests"]
-        execution.failed_tests = results["failed_tests"]
-        execution.coverage_percentage = results["coverage_percentage"]
-        execution.execution_time = results["execution_time"]
-        execution.results = results["results"]
-        execution.completed_at = datetime.utcnow()
-        db.commit()
+
+async def _target_url(request, test_suite: models.TestSuite) -> str:
+    """The request's base_url, or the suite spec's local mock server"""
+    if not request.use_mock_server:
+        return request.base_url
+    try:
+        # Parses the spec and binds a socket, so off the event loop
+        server = await run_in_threadpool(mock_for_spec, test_suite.api_spec)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return server.base_url
 
 
 @router.post("/execute", response_model=schemas.TestExecutionResponse)
-def execute_tests(
+async def execute_tests(
         request: schemas.ExecuteTestsRequest,
-        background_tasks: BackgroundTasks,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_async_db)
 ):
     """Execute a test suite"""
 
     # Get test suite
-    test_suite = db.query(models.TestSuite).filter(
-        models.TestSuite.id == request.test_suite_id
-    ).first()
+    test_suite = await _get_suite(db, request.test_suite_id)
 
-    if not test_suite:
-        raise HTTPException(status_code=404, detail="Test suite not found")
+    base_url = await _target_url(request, test_suite)
 
     # Create execution record
     execution = models.TestExecution(
@@ -55,20 +68,77 @@ def execute_tests(
         passed_tests=0,
         failed_tests=0,
         coverage_percentage=0.0,
-        execution_time=0.0,
-        results=[]
+        execution_time=0.0
     )
     db.add(execution)
-    db.commit()
-    db.refresh(execution)
+    await db.commit()
+    # Responses include `results`, which async sessions can't lazy-load
+    await db.refresh(execution, ["test_results"])
+
+    # Workers can't reach a mock server, so mock runs never default to shards
+    shard_count = request.shards if request.shards is not None \
+        else 0 if request.use_mock_server else EXECUTION_SHARDS
+    if shard_count:
+        # Worker processes claim the shards; results are merged into this
+        # execution when the last one completes
+        await db.run_sync(
+            lambda session: enqueue_execution(
+                session, execution, test_suite.generated_tests, base_url,
+                shard_count, request.concurrency, request.max_per_host))
+        await db.refresh(execution)
+        await db.refresh(execution, ["test_results"])
+        return execution
 
-    # Run tests in background
-    background_tasks.add_task(
-        run_tests_background,
+    # Buffer per-test results so they can be streamed as they complete
+    execution_events.open_buffer(execution.id, execution.total_tests)
+
+    # Run on the local runner pool, which opens its own session
+    submit_execution(
         execution.id,
         test_suite.generated_tests,
-        request.base_url,
-        db
+        base_url,
+        request.concurrency,
+        request.max_per_host
+    )
+
+    return execution
+
+
+@router.post("/load", response_model=schemas.TestExecutionResponse)
+async def start_load_test(
+        request: schemas.LoadTestRequest,
+        db: AsyncSession = Depends(get_async_db)
+):
+    """Replay a test suite as load at a target rate or concurrency"""
+    test_suite = await _get_suite(db, request.test_suite_id)
+
+    if not test_suite.generated_tests:
+        raise HTTPException(status_code=400, detail="Test suite is empty")
+
+    base_url = await _target_url(request, test_suite)
+
+    execution = models.TestExecution(
+        test_suite_id=test_suite.id,
+        execution_type="load",
+        status="running",
+        total_tests=0,
+        passed_tests=0,
+        failed_tests=0,
+        coverage_percentage=0.0,
+        execution_time=0.0
+    )
+    db.add(execution)
+    await db.commit()
+    await db.refresh(execution, ["test_results"])
+
+    # Same local runner pool as functional executions
+    submit_load_execution(
+        execution.id,
+        test_suite.generated_tests,
+        base_url,
+        rps=request.rps,
+        concurrency=request.concurrency,
+        duration=request.duration_seconds
     )
 
     return execution
@@ -76,21 +146,212 @@ def execute_tests(
 
 @router.get("/executions/{execution_id}",
             response_model=schemas.TestExecutionResponse)
-def get_execution(execution_id: int, db: Session = Depends(get_db)):
+async def get_execution(execution_id: int,
+                        db: AsyncSession = Depends(get_async_db)):
     """Get execution results"""
-    execution = db.query(models.TestExecution).filter(
-        models.TestExecution.id == execution_id
-    ).first()
+    execution = await db.get(models.TestExecution, execution_id)
 
     if not execution:
         raise HTTPException(status_code=404, detail="Execution not found")
 
-    return execution
+    results = await db.run_sync(
+        lambda session: load_results(session, execution))
+    return json_object_response(
+        model_payload(schemas.TestExecutionResponse, execution,
+                      exclude=("results",)),
+        "results", results)
+
+
+@router.get("/executions/{execution_id}/results",
+            response_model=schemas.TestResultPage)
+async def list_execution_results(
+        execution_id: int,
+        status: str = None,
+        endpoint: str = None,
+        method: str = None,
+        order: str = Query("position", pattern="^(position|slowest|fastest)$"),
+        limit: int = Query(100, ge=1, le=1000),
+        offset: int = Query(0, ge=0),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Page through an execution's results, filtered server-side
+    (e.g. status=failed, order=slowest, or a single endpoint)
+    """
+    execution = await db.get(models.TestExecution, execution_id)
+
+    if not execution:
+        raise HTTPException(status_code=404, detail="Execution not found")
+
+    return await db.run_sync(
+        lambda session: query_results(
+            session, execution, status=status, endpoint=endpoint,
+            method=method, order=order, limit=limit, offset=offset))
+
+
+@router.get("/executions/{execution_id}/shards",
+            response_model=list[schemas.ExecutionShardResponse])
+async def list_execution_shards(execution_id: int,
+                                db: AsyncSession = Depends(get_async_db)):
+    """Progress of a distributed execution's shards"""
+    shards = (await db.execute(select(
+        models.ExecutionShard.id,
+        models.ExecutionShard.shard_index,
+        models.ExecutionShard.status,
+        models.ExecutionShard.worker_id,
+        models.ExecutionShard.attempts,
+        models.ExecutionShard.positions,
+        models.ExecutionShard.passed_tests,
+        models.ExecutionShard.failed_tests,
+        models.ExecutionShard.execution_time,
+        models.ExecutionShard.error,
+        models.ExecutionShard.claimed_at,
+        models.ExecutionShard.completed_at
+    ).where(
+        models.ExecutionShard.execution_id == execution_id
+    ).order_by(models.ExecutionShard.shard_index))).all()
+
+    return [
+        {**shard._asdict(), "total_tests": len(shard.positions or [])}
+        for shard in shards
+    ]
+
+
+@router.get("/executions/{execution_id}/stream")
+async def stream_execution(execution_id: int, request: Request,
+                           after: int = -1):
+    """
+    Stream per-test results as Server-Sent Events while an execution runs.
+    Each result is sent as a `result` event carrying the test's suite
+    `index`; a final `complete` event carries the totals. Event ids count
+    results in the order they were sent, which with concurrency is not
+    suite order, and reconnecting clients resume after Last-Event-ID (or
+    the `after` query parameter).
+    """
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        after = max(after, int(last_event_id))
+
+    buffer = execution_events.get_buffer(execution_id)
+    if buffer is None and not await asyncio.to_thread(_execution_exists,
+                                                      execution_id):
+        raise HTTPException(status_code=404, detail="Execution not found")
+
+    return StreamingResponse(
+        _stream_events(execution_id, buffer, after),
+        media_type="text/event-stream",
+        # Content-Encoding keeps the compression middleware from buffering
+        # events until enough bytes arrive to be worth compressing
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no",
+                 "Content-Encoding": "identity"}
+    )
+
+
+def _execution_exists(execution_id: int) -> bool:
+    db = SessionLocal()
+    try:
+        return db.query(models.TestExecution.id).filter(
+            models.TestExecution.id == execution_id
+        ).first() is not None
+    finally:
+        db.close()
+
+
+def _load_finished_execution(execution_id: int):
+    """Return (results, summary) once an execution is no longer running"""
+    db = SessionLocal()
+    try:
+        execution = db.query(models.TestExecution).filter(
+            models.TestExecution.id == execution_id
+        ).first()
+        if execution is None or execution.status == "running":
+            return None
+        summary = {
+            "status": execution.status,
+            "total_tests": execution.total_tests,
+            "passed_tests": execution.passed_tests,
+            "failed_tests": execution.failed_tests,
+            "coverage_percentage": execution.coverage_percentage,
+            "execution_time": execution.execution_time
+        }
+        return load_result_events(db, execution), summary
+    finally:
+        db.close()
+
+
+def _sse(event: str, data: dict, event_id: int = None) -> str:
+    message = f"event: {event}\n"
+    if event_id is not None:
+        message += f"id: {event_id}\n"
+    return message + f"data: {json.dumps(data, default=str)}\n\n"
+
+
+async def _stream_events(execution_id: int, buffer, after: int):
+    if buffer is not None:
+        yield _sse("start", {"execution_id": execution_id,
+                             "total_tests": buffer.total_tests})
+        cursor = 0
+        while True:
+            for event, data in buffer.events_since(cursor):
+                position = cursor
+                cursor += 1
+                if event == "complete":
+                    yield _sse(event, data)
+                    return
+                # Ids follow arrival order: results finish out of suite
+                # order, so resuming by suite index would skip some
+                if position > after:
+                    yield _sse(event, data, position)
+            # Results are appended in memory by the runner thread, so
+            # checking the buffer is cheap and never touches the database
+            await asyncio.sleep(0.2)
+
+    # Not running in this process (or buffer expired): wait for the
+    # stored results and replay them with the ids the live stream used
+    while True:
+        finished = await asyncio.to_thread(_load_finished_execution,
+                                           execution_id)
+        if finished is not None:
+            break
+        await asyncio.sleep(2)
+
+    results, summary = finished
+    yield _sse("start", {"execution_id": execution_id,
+                         "total_tests": summary["total_tests"]})
+    for event_id, data in results:
+        if event_id > after:
+            yield _sse("result", data, event_id)
+    yield _sse("complete", summary)
+
+
+@router.get("/executions", response_model=schemas.ExecutionPage)
+async def list_executions(
+        limit: int = Query(50, ge=1, le=200),
+        cursor: Optional[str] = None,
+        test_suite_id: Optional[int] = None,
+        status: Optional[str] = None,
+        execution_type: Optional[str] = None,
+        started_after: Optional[datetime] = None,
+        started_before: Optional[datetime] = None,
+        db: AsyncSession = Depends(get_async_db)
+):
+    """
+    List test executions, newest first, as lightweight summaries.
+    Use /executions/{id} for full results.
+    """
+    try:
+        return await db.run_sync(
+            list_execution_summaries, limit=limit, cursor=cursor,
+            test_suite_id=test_suite_id,
+            status=status, execution_type=execution_type,
+            started_after=started_after,
+            started_before=started_before
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/executions", response_model=list[schemas.TestExecutionResponse])
-def list_executions(db: Session = Depends(get_db)):
-    """List all test executions"""
-    return db.query(models.TestExecution).order_by(
-        models.TestExecution.started_at.desc()
-    ).limit(50).all()
+@router.get("/pool-stats")
+def get_pool_stats():
+    """Connection reuse statistics for the executor's HTTP session pool"""
+    return default_pool.stats()
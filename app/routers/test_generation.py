@@ -1,89 +1,178 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app import models, schemas
-from app.services.test_generator import TestGenerator
-import json
+from app.services.llm_cache import LLMCache
+from app.services.generation_metrics import parse_failures, run_metrics
+from app.services.generation_jobs import submit_generation_job
+from app.services import spec_cache
+from app.utils.fast_json import json_object_response, model_payload
+from app.utils.openapi_parser import OpenAPIParser
 
 router = APIRouter(prefix="/api/generation", tags=["Test Generation"])
 
 
-@router.post("/specs", response_model=schemas.APISpecResponse)
-def create_api_spec(spec: schemas.APISpecCreate, db: Session = Depends(get_db)):
-    """Upload an OpenAPI specification"""
+async def _parse_spec(spec_content: str) -> OpenAPIParser:
+    """Parse and index a spec off the event loop; 400 if it isn't one"""
     try:
-        # Validate it's valid JSON
-        json.loads(spec.spec_content)
-    except json.JSONDecodeError:
+        return await run_in_threadpool(OpenAPIParser.from_content,
+                                       spec_content)
+    except ValueError:
         raise HTTPException(status_code=400,
-                            detail="Invalid JSON in spec_content")
+                            detail="Invalid JSON or YAML in spec_content")
+
+
+@router.post("/specs", response_model=schemas.APISpecResponse)
+async def create_api_spec(spec: schemas.APISpecCreate,
+                          db: AsyncSession = Depends(get_async_db)):
+    """Upload an OpenAPI specification"""
+    # Validate it's a JSON or YAML document
+    parser = await _parse_spec(spec.spec_content)
 
     db_spec = models.APISpec(
         name=spec.name,
         spec_content=spec.spec_content
     )
     db.add(db_spec)
-    db.commit()
-    db.refresh(db_spec)
+    await db.commit()
+    await db.refresh(db_spec)
+    spec_cache.remember(db_spec, parser)
     return db_spec
 
 
 @router.get("/specs", response_model=list[schemas.APISpecResponse])
-def list_api_specs(db: Session = Depends(get_db)):
+async def list_api_specs(db: AsyncSession = Depends(get_async_db)):
     """List all uploaded API specifications"""
-    return db.query(models.APISpec).all()
+    return (await db.scalars(select(models.APISpec))).all()
 
 
-@router.post("/generate", response_model=schemas.TestSuiteResponse)
-def generate_tests(request: schemas.GenerateTestsRequest,
-                   db: Session = Depends(get_db)):
-    """Generate test cases for an API specification"""
+@router.put("/specs/{spec_id}", response_model=schemas.GenerationJobResponse,
+            status_code=202)
+async def update_api_spec(spec_id: int, update: schemas.APISpecUpdate,
+                          db: AsyncSession = Depends(get_async_db)):
+    """
+    Start a background job that regenerates only what changed in a new
+    version of a spec; the version is stored once the job completes
+    """
+    # Reject a broken document up front rather than in the job
+    await _parse_spec(update.spec_content)
 
-    # Get the API spec
-    api_spec = db.query(models.APISpec).filter(
-        models.APISpec.id == request.api_spec_id
-    ).first()
+    api_spec = await db.get(models.APISpec, spec_id)
 
     if not api_spec:
         raise HTTPException(status_code=404,
                             detail="API specification not found")
 
-    # Generate tests
-    generator = TestGenerator()
-    test_cases = generator.generate_tests_for_spec(
-        api_spec.spec_content,
-        request.include_edge_cases
+    job = models.GenerationJob(
+        api_spec_id=api_spec.id,
+        status="running",
+        include_edge_cases=update.include_edge_cases,
+        bypass_cache=update.bypass_cache,
+        spec_content=update.spec_content,
+        spec_name=update.name,
+        total_endpoints=0,
+        completed_endpoints=0,
+        failed_endpoints=0
     )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
 
-    if not test_cases:
-        raise HTTPException(status_code=500,
-                            detail="Failed to generate test cases")
+    submit_generation_job(job.id)
+
+    return job
+
+
+@router.post("/generate", response_model=schemas.GenerationJobResponse,
+             status_code=202)
+async def generate_tests(request: schemas.GenerateTestsRequest,
+                         db: AsyncSession = Depends(get_async_db)):
+    """Start a background job generating test cases for an API specification"""
+
+    # Get the API spec
+    api_spec = await db.get(models.APISpec, request.api_spec_id)
+
+    if not api_spec:
+        raise HTTPException(status_code=404,
+                            detail="API specification not found")
 
-    # Save test suite
-    test_suite = models.TestSuite(
+    # Create job record
+    job = models.GenerationJob(
         api_spec_id=api_spec.id,
-        name=f"Generated Tests for {api_spec.name}",
-        description=f"Auto-generated test suite with {len(test_cases)} test cases",
-        generated_tests=test_cases
+        status="running",
+        include_edge_cases=request.include_edge_cases,
+        bypass_cache=request.bypass_cache,
+        generation_mode=request.generation_mode,
+        total_endpoints=0,
+        completed_endpoints=0,
+        failed_endpoints=0
     )
-    db.add(test_suite)
-    db.commit()
-    db.refresh(test_suite)
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+
+    # Generate tests on the local worker pool
+    submit_generation_job(job.id)
+
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=schemas.GenerationJobResponse)
+async def get_generation_job(job_id: int,
+                             db: AsyncSession = Depends(get_async_db)):
+    """Get the status and progress of a generation job"""
+    job = await db.get(models.GenerationJob, job_id)
+
+    if not job:
+        raise HTTPException(status_code=404, detail="Generation job not found")
+
+    return job
+
+
+@router.get("/jobs", response_model=list[schemas.GenerationJobResponse])
+async def list_generation_jobs(db: AsyncSession = Depends(get_async_db)):
+    """List recent generation jobs"""
+    return (await db.scalars(select(models.GenerationJob).order_by(
+        models.GenerationJob.started_at.desc()
+    ).limit(50))).all()
+
+
+@router.get("/cache/stats")
+def get_cache_stats():
+    """Hit/miss counters and size of the generated test case cache"""
+    return LLMCache().stats()
+
+
+@router.get("/parse-stats")
+async def get_parse_stats():
+    """Per-endpoint validation and repair counters for LLM output"""
+    return parse_failures.snapshot()
+
 
-    return test_suite
+@router.get("/run-stats")
+async def get_run_stats():
+    """LLM calls and wall time per generation mode, for comparing modes"""
+    return run_metrics.snapshot()
 
 
 @router.get("/suites", response_model=list[schemas.TestSuiteResponse])
-def list_test_suites(db: Session = Depends(get_db)):
+async def list_test_suites(db: AsyncSession = Depends(get_async_db)):
     """List all test suites"""
-    return db.query(models.TestSuite).all()
+    return (await db.scalars(select(models.TestSuite))).all()
 
 
 @router.get("/suites/{suite_id}", response_model=schemas.TestSuiteResponse)
-def get_test_suite(suite_id: int, db: Session = Depends(get_db)):
+async def get_test_suite(suite_id: int,
+                         db: AsyncSession = Depends(get_async_db)):
     """Get a specific test suite"""
-    suite = db.query(models.TestSuite).filter(
-        models.TestSuite.id == suite_id).first()
+    suite = await db.get(models.TestSuite, suite_id)
     if not suite:
         raise HTTPException(status_code=404, detail="Test suite not found")
-    return suite
+    # Stored cases are sent as saved; validating thousands of them again
+    # costs more than the query
+    return json_object_response(
+        model_payload(schemas.TestSuiteResponse, suite,
+                      exclude=("generated_tests",)),
+        "generated_tests", suite.generated_tests or [])
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Dict, Any, Optional, Union
 from datetime import datetime
 
 
@@ -8,6 +8,13 @@ class APISpecCreate(BaseModel):
     spec_content: str  # JSON string of OpenAPI spec
 
 
+class APISpecUpdate(BaseModel):
+    spec_content: str  # JSON string of the new OpenAPI spec version
+    name: Optional[str] = None
+    include_edge_cases: bool = True
+    bypass_cache: bool = False
+
+
 class APISpecResponse(BaseModel):
     id: int
     name: str
@@ -27,6 +34,11 @@ class TestCase(BaseModel):
     expected_status: int
     expected_response: Optional[Dict[str, Any]] = None
     assertions: List[str] = []
+    # Chaining (see ExecutionPlan): cases are referenced by id, and
+    # capture maps a {{variable}} to a dotted path in the response
+    id: Optional[Union[str, int]] = None
+    depends_on: Optional[List[Union[str, int]]] = None
+    capture: Optional[Dict[str, str]] = None
 
 
 class TestSuiteCreate(BaseModel):
@@ -41,12 +53,40 @@ class TestSuiteResponse(BaseModel):
     name: str
     description: Optional[str]
     generated_tests: List[Dict[str, Any]]
+    generation_errors: Optional[List[Dict[str, Any]]] = None
     created_at: datetime
 
     class Config:
         from_attributes = True
 
 
+class SpecDiff(BaseModel):
+    added: List[str]
+    changed: List[str]
+    removed: List[str]
+    unchanged: List[str]
+    regenerated: List[str]
+
+
+class GenerationJobResponse(BaseModel):
+    id: int
+    api_spec_id: int
+    test_suite_id: Optional[int]
+    status: str
+    total_endpoints: int
+    completed_endpoints: int
+    failed_endpoints: int
+    generation_mode: Optional[str] = None
+    llm_calls: Optional[int] = None
+    diff: Optional[SpecDiff] = None  # Only for incremental spec updates
+    error: Optional[str]
+    started_at: datetime
+    completed_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+
 class TestExecutionResponse(BaseModel):
     id: int
     test_suite_id: int
@@ -57,6 +97,9 @@ class TestExecutionResponse(BaseModel):
     coverage_percentage: float
     execution_time: float
     results: List[Dict[str, Any]]
+    latency_stats: Optional[Dict[str, Any]] = None
+    execution_type: Optional[str] = None
+    load_stats: Optional[Dict[str, Any]] = None
     started_at: datetime
     completed_at: Optional[datetime]
 
@@ -64,12 +107,94 @@ class TestExecutionResponse(BaseModel):
         from_attributes = True
 
 
+class ExecutionShardResponse(BaseModel):
+    id: int
+    shard_index: int
+    status: str
+    worker_id: Optional[str] = None
+    attempts: int
+    total_tests: int
+    passed_tests: Optional[int] = None
+    failed_tests: Optional[int] = None
+    execution_time: Optional[float] = None
+    error: Optional[str] = None
+    claimed_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+
+class TestExecutionSummary(BaseModel):
+    id: int
+    test_suite_id: int
+    status: str
+    execution_type: Optional[str] = None
+    total_tests: int
+    passed_tests: int
+    failed_tests: int
+    coverage_percentage: float
+    execution_time: float
+    started_at: datetime
+    completed_at: Optional[datetime]
+
+    class Config:
+        from_attributes = True
+
+
+class ExecutionPage(BaseModel):
+    items: List[TestExecutionSummary]
+    next_cursor: Optional[str]  # pass back as ?cursor= for the next page
+
+
+class TestResultPage(BaseModel):
+    total: int
+    limit: int
+    offset: int
+    items: List[Dict[str, Any]]
+
+
 class GenerateTestsRequest(BaseModel):
     api_spec_id: int
     base_url: str = "http://localhost:8000"
     include_edge_cases: bool = True
+    bypass_cache: bool = False  # Ignore cached output and re-prompt the LLM
+    # per_endpoint or batched; None uses the GENERATION_MODE setting
+    generation_mode: Optional[str] = Field(
+        default=None, pattern="^(per_endpoint|batched)$")
 
 
 class ExecuteTestsRequest(BaseModel):
     test_suite_id: int
-    base_url: str
+    base_url: Optional[str] = None
+    concurrency: int = Field(default=1, ge=1, le=64)  # 1 = sequential
+    max_per_host: Optional[int] = Field(default=None, ge=1)
+    # Run against a local mock of the suite's spec instead of base_url
+    use_mock_server: bool = False
+    # Queue as this many shards for worker processes (0 runs in the API
+    # process); defaults to EXECUTION_SHARDS, except with use_mock_server,
+    # which always runs in the API process
+    shards: Optional[int] = Field(default=None, ge=0, le=256)
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if not self.base_url and not self.use_mock_server:
+            raise ValueError("base_url is required unless use_mock_server "
+                             "is set")
+        if self.use_mock_server and self.shards:
+            # The mock server only listens inside the API process
+            raise ValueError("use_mock_server can't be combined with shards")
+        return self
+
+
+class LoadTestRequest(BaseModel):
+    test_suite_id: int
+    base_url: str = "http://localhost:8000"
+    # Exactly one of: open-loop request rate, or closed-loop worker count
+    rps: Optional[float] = Field(default=None, gt=0, le=10000)
+    concurrency: Optional[int] = Field(default=None, ge=1, le=256)
+    duration_seconds: float = Field(default=30, gt=0, le=3600)
+    use_mock_server: bool = False
+
+    @model_validator(mode="after")
+    def check_load_shape(self):
+        if (self.rps is None) == (self.concurrency is None):
+            raise ValueError("Set exactly one of rps or concurrency")
+        return self
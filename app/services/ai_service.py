@@ -1,112 +1,349 @@
 import ollama
 import os
 import json
-from typing import List, Dict, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
+from app.services.failure_analysis import cluster_failures, \
+    endpoint_breakdown, fit_to_budget
+from pydantic import ValidationError
+from app import schemas
+from app.services.generation_metrics import parse_failures
+from app.services.llm_cache import LLMCache
+from app.services.prompt_builder import compact_json
+from app.utils.json_stream import JSONArrayStreamParser
+from app.utils.openapi_parser import OpenAPIParser, operation_key
+
+# Bump whenever a prompt changes so cached output is not reused
+GENERATION_PROMPT_VERSION = "5"
+ANALYSIS_PROMPT_VERSION = "2"
+# Optional case fields that let later requests use earlier responses
+_CHAINING_FIELDS = (
+    'Optional, for cases that build on each other: id (string), capture '
+    '(object mapping a variable name to a dotted path in the JSON '
+    'response, e.g. {"user_id": "data.id"}) and depends_on (array of ids '
+    'of cases that must run first). A later case uses a captured value '
+    'as {{user_id}} in its endpoint, headers or body.')
+# Dropped from normalized cases when not given, to keep suites compact
+_OPTIONAL_CASE_FIELDS = ("id", "depends_on", "capture")
 
 
 class AIService:
     def __init__(self):
         self.base_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
         self.model = os.getenv("OLLAMA_MODEL", "llama3.2")
-        self.client = ollama.Client(host=self.base_url)
+        # Upper bound on a single LLM call, so one stuck endpoint can't hold
+        # a generation worker forever
+        self.timeout = float(os.getenv("OLLAMA_TIMEOUT", "300"))
+        self.client = ollama.Client(host=self.base_url, timeout=self.timeout)
+        # Generation stops as soon as this many cases have been streamed
+        self.max_cases_per_endpoint = int(
+            os.getenv("OLLAMA_MAX_CASES_PER_ENDPOINT", "3"))
+        # Re-prompts allowed per endpoint to fix cases failing validation
+        self.max_repair_attempts = int(
+            os.getenv("OLLAMA_MAX_REPAIR_ATTEMPTS", "1"))
+        # Per-endpoint timing/token stats from the latest generation
+        self.generation_stats: Dict[str, Dict[str, Any]] = {}
+        self._stats_lock = threading.Lock()
+        # Map-reduce analysis limits: failure clusters analyzed per run,
+        # parallel cluster calls, and the prompt budget for the merge step
+        self.analysis_max_clusters = int(
+            os.getenv("ANALYSIS_MAX_CLUSTERS", "20"))
+        self.analysis_max_concurrency = int(
+            os.getenv("ANALYSIS_MAX_CONCURRENCY", "2"))
+        self.analysis_token_budget = int(
+            os.getenv("ANALYSIS_TOKEN_BUDGET", "3000"))
 
     def generate_test_cases(self, openapi_spec: Dict[str, Any], endpoint: str,
-                            method: str, include_edge_cases: bool = True) -> \
+                            method: str, include_edge_cases: bool = True,
+                            raise_errors: bool = False) -> \
             List[Dict[str, Any]]:
         """
         Use Ollama (local LLM) to generate comprehensive test cases for an API endpoint
+
+        Ollama is asked for JSON-formatted output, which is streamed and
+        parsed incrementally; generation stops once max_cases_per_endpoint
+        valid cases exist. Every case is validated against schemas.TestCase
+        and invalid ones are sent back for repair, at most
+        max_repair_attempts times, before being dropped.
+
+        With raise_errors=True, failures propagate instead of returning []
+        so callers can report which endpoints failed and why.
         """
+        max_cases = self.max_cases_per_endpoint
+        endpoint_key = f"{method.upper()} {endpoint}"
 
         prompt = f"""[INST] <<SYS>>
-        You are an API testing expert. Generate 2-3 test cases as a JSON array.
+        You are an API testing expert. Generate up to {max_cases} test cases as JSON.
         <</SYS>>
 
         Endpoint: {method} {endpoint}
         OpenAPI Spec:
-        {json.dumps(openapi_spec, indent=2)}
+        {compact_json(openapi_spec)}
 
-        Generate JSON array with 2-3 test cases. Each test case object should have: name, method, endpoint, headers, body, expected_status, expected_response, assertions.
+        Generate up to {max_cases} test cases. Each test case object must have: name (string), method (string), endpoint (string), headers (object of strings), body (object or null), expected_status (integer), expected_response (object or null), assertions (array of strings). {_CHAINING_FIELDS}
 
-        Return ONLY the JSON array. No explanations.
+        Return ONLY a JSON object of the form {{"test_cases": [...]}}. No explanations.
         [/INST]
 
-        [
+        {{"test_cases": [
           {{"name": "Test 1", "method": "{method}", "endpoint": "{endpoint}", ...}},
           ...
-        ]"""
+        ]}}"""
 
         try:
-            response = self.client.chat(
-                model=self.model,
-                messages=[
-                    {
-                        'role': 'user',
-                        'content': prompt
-                    }
-                ],
-                options={
-                    'temperature': 0.7,
-                    'num_predict': 4000  # Increased from 2000 to 4000
-                }
-            )
+            return self._generate_validated(prompt, endpoint_key, max_cases)
+        except Exception as e:
+            print(f"Error generating test cases: {str(e)}")
+            if raise_errors:
+                raise
+            return []
 
-            response_text = response['message']['content']
-            print(
-                f"DEBUG: Raw AI response: {response_text[:500]}...")  # For debugging
+    def generate_test_cases_batch(self, endpoint_specs: List[Dict[str, Any]],
+                                  include_edge_cases: bool = True) -> \
+            Dict[str, List[Dict[str, Any]]]:
+        """
+        Generate test cases for several small endpoints in one LLM call.
 
-            # Clean up response if it has markdown code blocks
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[
-                    0].strip()
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[
-                    0].strip()
+        Returns cases keyed by operation ("GET /users"); operations the
+        model produced nothing valid for are missing from the result so the
+        caller can retry them individually. Errors propagate.
+        """
+        operations = [operation_key(spec["method"], spec["path"])
+                      for spec in endpoint_specs]
+        max_cases = self.max_cases_per_endpoint
 
-            # Find JSON array in response
-            start_idx = response_text.find('[')
-            end_idx = response_text.rfind(']') + 1
+        prompt = f"""[INST] <<SYS>>
+        You are an API testing expert. Generate up to {max_cases} test cases per endpoint as JSON.
+        <</SYS>>
 
-            if start_idx != -1 and end_idx > start_idx:
-                response_text = response_text[start_idx:end_idx]
+        Endpoints (OpenAPI):
+        {compact_json(endpoint_specs)}
+
+        Generate up to {max_cases} test cases for EACH of these operations: {", ".join(operations)}. Each test case object must have: operation (one of the operations above, e.g. "{operations[0]}"), name (string), method (string), endpoint (string), headers (object of strings), body (object or null), expected_status (integer), expected_response (object or null), assertions (array of strings). {_CHAINING_FIELDS}
+
+        Return ONLY a JSON object of the form {{"test_cases": [...]}}. No explanations.
+        [/INST]"""
+
+        cases = self._generate_validated(
+            prompt, f"BATCH {operations[0]} +{len(operations) - 1}",
+            max_cases * len(operations),
+            num_predict=min(8000, 1500 * len(operations)))
+
+        # Cases with a missing or garbled operation are matched by route
+        paths: Dict[str, Dict[str, Any]] = {}
+        for spec in endpoint_specs:
+            paths.setdefault(spec["path"], {})[spec["method"].lower()] = {}
+        matcher = OpenAPIParser({"paths": paths})
+
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for case in cases:
+            operation = case.pop("operation", None)
+            if operation not in operations:
+                operation = matcher.match_operation(case["method"],
+                                                    case["endpoint"])
+            if operation is None:
+                continue
+            bucket = grouped.setdefault(operation, [])
+            if len(bucket) < max_cases:
+                bucket.append(case)
+        return grouped
+
+    def _generate_validated(self, prompt: str, label: str, max_cases: int,
+                            num_predict: int = 4000) -> List[Dict[str, Any]]:
+        """
+        Stream a JSON-mode reply, repair invalid cases, and return up to
+        max_cases valid ones. Raises ValueError if none are valid.
+        """
+        started = time.perf_counter()
+        stream_stats = {"first_case_at": None, "chunks": 0,
+                        "stopped_early": False}
+        valid: List[Dict[str, Any]] = []
+        parsed = 0
+        invalid_count = 0
+        repaired = 0
+        repair_calls = 0
 
-            test_cases = json.loads(response_text)
+        try:
+            valid, invalid, parsed = self._stream_test_cases(
+                prompt, max_cases, stream_stats, started, num_predict)
+            invalid_count = len(invalid)
+
+            # Re-prompt only for the cases that failed validation
+            while invalid and len(valid) < max_cases \
+                    and repair_calls < self.max_repair_attempts:
+                repair_calls += 1
+                fixed, invalid, _ = self._stream_test_cases(
+                    self._repair_prompt(label, invalid),
+                    max_cases - len(valid), stream_stats, started,
+                    num_predict)
+                repaired += len(fixed)
+                valid.extend(fixed)
+
+            if not valid:
+                raise ValueError(
+                    f"No valid test cases in LLM response "
+                    f"({parsed} parsed, {invalid_count} invalid)")
+
+            return valid[:max_cases]
+        finally:
+            parse_failures.record(
+                label,
+                responses=1,
+                cases_parsed=parsed,
+                cases_valid=min(len(valid), max_cases),
+                cases_invalid=invalid_count,
+                cases_repaired=repaired,
+                repair_calls=repair_calls
+            )
+            self._record_generation_stats(label, {
+                "time_to_first_case": stream_stats["first_case_at"],
+                "total_time": time.perf_counter() - started,
+                "tokens_generated": stream_stats["chunks"],
+                "cases": min(len(valid), max_cases),
+                "stopped_early": stream_stats["stopped_early"]
+            })
+
+    def _stream_test_cases(self, prompt: str, max_valid: int,
+                           stream_stats: Dict[str, Any], started: float,
+                           num_predict: int = 4000):
+        """
+        Stream one JSON-mode reply, validating cases as they complete.
+        Returns (valid, invalid, parsed_count); stops once max_valid valid
+        cases have arrived.
+        """
+        parser = JSONArrayStreamParser()
+        valid: List[Dict[str, Any]] = []
+        invalid: List[Dict[str, Any]] = []
+        response_text = ""
+
+        stream = self.client.chat(
+            model=self.model,
+            messages=[
+                {
+                    'role': 'user',
+                    'content': prompt
+                }
+            ],
+            options={
+                'temperature': 0.7,
+                'num_predict': num_predict  # Upper bound; we stop early
+            },
+            format='json',
+            stream=True
+        )
 
-            # Ensure it's a list
-            if not isinstance(test_cases, list):
-                test_cases = [test_cases]
+        try:
+            for chunk in stream:
+                content = chunk['message']['content']
+                stream_stats["chunks"] += 1
+                response_text += content
+
+                for case in parser.feed(content):
+                    self._validate_case(case, valid, invalid)
+                    if valid and stream_stats["first_case_at"] is None:
+                        stream_stats["first_case_at"] = \
+                            time.perf_counter() - started
+
+                if len(valid) >= max_valid:
+                    stream_stats["stopped_early"] = not parser.done
+                    break
+                if parser.done:
+                    break
+        finally:
+            # Closing the stream drops the connection, which tells
+            # Ollama to stop generating
+            if hasattr(stream, "close"):
+                stream.close()
+
+        if not parser.found_array and response_text.strip():
+            # The model answered with a bare case instead of a list
+            try:
+                self._validate_case(self._extract_json_object(response_text),
+                                    valid, invalid)
+            except json.JSONDecodeError:
+                pass
 
-            return test_cases
+        return valid, invalid, len(valid) + len(invalid) + \
+            parser.invalid_objects
 
-        except json.JSONDecodeError as e:
-            print(f"JSON decode error: {str(e)}")
-            print(f"Response text: {response_text}")
+    @staticmethod
+    def _validate_case(case: Any, valid: List[Dict[str, Any]],
+                       invalid: List[Dict[str, Any]]):
+        """Sort a parsed case into valid (normalized) or invalid (+errors)"""
+        try:
+            normalized = schemas.TestCase.model_validate(case).model_dump()
+            for field in _OPTIONAL_CASE_FIELDS:
+                if normalized[field] is None:
+                    del normalized[field]
+            # Batched replies tag each case with the operation it is for
+            if isinstance(case.get("operation"), str):
+                normalized["operation"] = case["operation"]
+            valid.append(normalized)
+        except ValidationError as e:
+            invalid.append({
+                "case": case,
+                "errors": [
+                    f"{'.'.join(str(p) for p in err['loc']) or 'case'}: "
+                    f"{err['msg']}"
+                    for err in e.errors()
+                ]
+            })
+
+    @staticmethod
+    def _repair_prompt(label: str, invalid: List[Dict[str, Any]]) -> str:
+        return f"""[INST] <<SYS>>
+        You are an API testing expert. Fix invalid test cases.
+        <</SYS>>
 
-            # Try to fix common JSON issues
-            try:
-                # Try to complete truncated JSON
-                if response_text.endswith(',') or not response_text.endswith(
-                        ']'):
-                    # Try to close the array
-                    response_text = response_text.strip()
-                    if response_text.endswith(','):
-                        response_text = response_text[:-1]
-                    if not response_text.endswith(']'):
-                        response_text += ']'
-                    test_cases = json.loads(response_text)
-                    return test_cases
-            except:
-                pass
+        These test cases for {label} failed validation:
+        {json.dumps(invalid, separators=(',', ':'), default=str)}
 
-            return []
-        except Exception as e:
-            print(f"Error generating test cases: {str(e)}")
-            return []
+        Return ONLY a JSON object of the form {{"test_cases": [...]}} with one corrected test case per invalid case, keeping any "operation", "id", "depends_on" and "capture" fields. Each must have: name (string), method (string), endpoint (string), headers (object of strings), body (object or null), expected_status (integer), expected_response (object or null), assertions (array of strings).
+        [/INST]"""
 
-    def analyze_test_results(self, results: List[Dict[str, Any]]) -> Dict[
-        str, Any]:
+    def _record_generation_stats(self, label: str, stats: Dict[str, Any]):
+        with self._stats_lock:
+            self.generation_stats[label] = stats
+
+    def analyze_test_results(self, results: List[Dict[str, Any]],
+                             raise_errors: bool = False,
+                             cluster_cache: Optional[LLMCache] = None
+                             ) -> Dict[str, Any]:
         """
         Use Ollama to analyze test execution results and provide insights
+
+        Failures are clustered locally, each cluster is analyzed by a
+        bounded number of parallel LLM calls (cached per signature in
+        cluster_cache), and a final call merges everything into the
+        analysis shape. Prompt sizes stay within ANALYSIS_TOKEN_BUDGET
+        however many results there are.
+
+        With raise_errors=True, failures propagate instead of returning the
+        placeholder analysis, so callers don't persist it.
         """
+        clusters = cluster_failures(results)
+        findings = self._analyze_clusters(
+            clusters[:self.analysis_max_clusters], cluster_cache)
+
+        # Each half of the budget holds as many entries as fit, largest
+        # clusters and most-failing endpoints first
+        half_budget = self.analysis_token_budget // 2
+        cluster_entries = fit_to_budget([
+            {
+                "failure": f"{c['method']} {c['endpoint']}",
+                "count": c["count"],
+                "expected_status": c["expected_status"],
+                "actual_status": c["actual_status"],
+                "errors": c["sample_errors"][:1],
+                **({"analysis": findings[c["signature"]]}
+                   if c["signature"] in findings else {})
+            }
+            for c in clusters
+        ], half_budget)
+        endpoints = endpoint_breakdown(results)
+        endpoint_entries = fit_to_budget(endpoints, half_budget)
 
         prompt = f"""You are an expert QA engineer analyzing API test results. 
 
@@ -114,9 +351,13 @@ Test Results Summary:
 Total Tests: {len(results)}
 Passed: {sum(1 for r in results if r.get('status') == 'passed')}
 Failed: {sum(1 for r in results if r.get('status') == 'failed')}
+Distinct failure groups: {len(clusters)}
+
+Results by endpoint (showing {len(endpoint_entries)} of {len(endpoints)}):
+{json.dumps(endpoint_entries, separators=(',', ':'), default=str)}
 
-Detailed Results:
-{json.dumps(results[:10], indent=2)}  # Limit to first 10 for context
+Failure groups, largest first (showing {len(cluster_entries)} of {len(clusters)}):
+{json.dumps(cluster_entries, separators=(',', ':'), default=str)}
 
 Provide analysis including:
 1. Overall assessment of API quality
@@ -155,23 +396,8 @@ Required JSON structure:
                 }
             )
 
-            response_text = response['message']['content']
-
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[
-                    0].strip()
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[
-                    0].strip()
-
-            # Find JSON object in response
-            start_idx = response_text.find('{')
-            end_idx = response_text.rfind('}') + 1
-
-            if start_idx != -1 and end_idx > start_idx:
-                response_text = response_text[start_idx:end_idx]
-
-            analysis = json.loads(response_text)
+            analysis = self._extract_json_object(
+                response['message']['content'])
 
             # Validate required keys
             required_keys = [
@@ -196,72 +422,111 @@ Required JSON structure:
 
             print(f"Error analyzing results: {str(e)}")
 
-            return {
+            if raise_errors:
+                raise
+
+            return self.fallback_analysis()
+
+    def _analyze_clusters(self, clusters: List[Dict[str, Any]],
+                          cluster_cache: Optional[LLMCache] = None) -> \
+            Dict[str, Dict[str, Any]]:
+        """Map step: analyze failure clusters in parallel, keyed by signature"""
+        findings = {}
+        pending = []
+        for cluster in clusters:
+            cached = cluster_cache.get(self._cluster_cache_key(cluster)) \
+                if cluster_cache is not None else None
+            if cached:
+                findings[cluster["signature"]] = cached
+            else:
+                pending.append(cluster)
+
+        if not pending:
+            return findings
+
+        workers = min(self.analysis_max_concurrency, len(pending))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(self._analyze_cluster, pending))
+
+        for cluster, finding in zip(pending, outcomes):
+            if finding is None:
+                continue
+            findings[cluster["signature"]] = finding
+            if cluster_cache is not None:
+                cluster_cache.set(self._cluster_cache_key(cluster), finding)
+        return findings
+
+    def _cluster_cache_key(self, cluster: Dict[str, Any]) -> str:
+        return LLMCache.make_key(signature=cluster["signature"],
+                                 model=self.model,
+                                 prompt_version=ANALYSIS_PROMPT_VERSION)
+
+    def _analyze_cluster(self, cluster: Dict[str, Any]) -> \
+            Optional[Dict[str, Any]]:
+        """Analyze one failure cluster; returns None if the call fails"""
+        prompt = f"""You are an expert QA engineer. These {cluster['count']} API test failures share the same endpoint, status mismatch and error.
+
+Failure group:
+{json.dumps({k: v for k, v in cluster.items() if k != 'signature'}, separators=(',', ':'), default=str)}
+
+IMPORTANT: Return ONLY a valid JSON object. No explanations, no markdown.
 
-                "overall_quality_score": 0,
-
-                "critical_issues": [],
-                # Changed from ["Error performing analysis"]
+Required JSON structure:
+{{"issue": "what is wrong", "likely_cause": "why", "recommendation": "what to do", "severity": "critical|major|minor"}}
+"""
+        try:
+            response = self.client.chat(
+                model=self.model,
+                messages=[{'role': 'user', 'content': prompt}],
+                options={'temperature': 0.3, 'num_predict': 300}
+            )
+            finding = self._extract_json_object(
+                response['message']['content'])
+        except Exception as e:
+            print(f"Error analyzing failure group "
+                  f"{cluster['signature']}: {str(e)}")
+            return None
 
-                "failure_patterns": [],
+        return {key: finding.get(key, "") for key in
+                ("issue", "likely_cause", "recommendation", "severity")}
 
-                "recommendations": ["Check if tests were executed properly"],
+    @staticmethod
+    def _extract_json_object(response_text: str) -> Dict[str, Any]:
+        """Parse the JSON object out of an LLM reply"""
+        if "```json" in response_text:
+            response_text = response_text.split("```json")[1].split("```")[
+                0].strip()
+        elif "```" in response_text:
+            response_text = response_text.split("```")[1].split("```")[
+                0].strip()
 
-                "well_covered_areas": [],
+        # Find JSON object in response
+        start_idx = response_text.find('{')
+        end_idx = response_text.rfind('}') + 1
 
-                "coverage_gaps": ["Unable to analyze - check test execution"],
+        if start_idx != -1 and end_idx > start_idx:
+            response_text = response_text[start_idx:end_idx]
 
-                "summary": "Analysis failed due to an error"
+        return json.loads(response_text)
 
-            }
+    @staticmethod
+    def fallback_analysis() -> Dict[str, Any]:
+        """Placeholder analysis returned when the LLM call fails"""
+        return {
 
+            "overall_quality_score": 0,
 
-def _safe_parse_json(self, text: str) -> List[Dict[str, Any]]:
-    """Safely parse JSON, trying multiple strategies if needed"""
-    strategies = [
-        # Strategy 1: Direct parse
-        lambda t: json.loads(t),
+            "critical_issues": [],
+            # Changed from ["Error performing analysis"]
 
-        # Strategy 2: Extract JSON from markdown
-        lambda t: json.loads(t.split("```json")[1].split("```")[0].strip()),
+            "failure_patterns": [],
 
-        # Strategy 3: Extract JSON array between [ and ]
-        lambda t: json.loads(t[t.find('['):t.rfind(']') + 1]),
+            "recommendations": ["Check if tests were executed properly"],
 
-        # Strategy 4: Fix common issues and parse
-        lambda t: json.loads(self._fix_json_issues(t))
-    ]
+            "well_covered_areas": [],
 
-    for strategy in strategies:
-        try:
-            return strategy(text)
-        except:
-            continue
-
-    return []
-
-
-def _fix_json_issues(self, text: str) -> str:
-    """Fix common JSON issues"""
-    # Remove any text before [
-    if '[' in text:
-        text = text[text.find('['):]
-
-    # Ensure it ends with ]
-    if not text.endswith(']'):
-        # Find the last complete object
-        brackets = 0
-        for i, char in enumerate(text):
-            if char == '{':
-                brackets += 1
-            elif char == '}':
-                brackets -= 1
-                if brackets == 0 and i > len(text) - 10:
-                    # Close the array
-                    text = text[:i + 1] + ']'
-                    break
+            "coverage_gaps": ["Unable to analyze - check test execution"],
 
-    # Fix trailing commas
-    text = text.replace(',]', ']').replace(',}', '}')
+            "summary": "Analysis failed due to an error"
 
-    return text
+        }
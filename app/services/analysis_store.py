@@ -0,0 +1,100 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal
+from app.services.ai_service import AIService, ANALYSIS_PROMPT_VERSION
+from app.services.llm_cache import LLMCache
+
+AUTO_ANALYZE = os.getenv("AUTO_ANALYZE_EXECUTIONS", "true").lower() == "true"
+
+_analysis_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("ANALYSIS_WORKERS", "1")),
+    thread_name_prefix="execution-analysis"
+)
+
+
+def get_stored_analysis(db: Session, execution_id: int, model: str) -> \
+        Optional[models.ExecutionAnalysis]:
+    return db.query(models.ExecutionAnalysis).filter(
+        models.ExecutionAnalysis.execution_id == execution_id,
+        models.ExecutionAnalysis.model == model,
+        models.ExecutionAnalysis.prompt_version == ANALYSIS_PROMPT_VERSION
+    ).first()
+
+
+def get_or_create_analysis(db: Session, execution: models.TestExecution,
+                           refresh: bool = False,
+                           ai_service: AIService = None,
+                           cluster_cache: LLMCache = None) -> \
+        Tuple[Dict[str, Any], Optional[models.ExecutionAnalysis]]:
+    """
+    Return (analysis, stored_row) for a completed execution, running the
+    LLM only when nothing is stored for the current model and prompt
+    version (or refresh is requested). stored_row is None when the
+    analysis failed and was therefore not persisted.
+    """
+    ai_service = ai_service or AIService()
+    stored = get_stored_analysis(db, execution.id, ai_service.model)
+    if stored is not None and not refresh:
+        return stored.analysis, stored
+
+    # Per-failure-signature findings survive refreshes, so re-analysis
+    # only sends failure groups it hasn't seen before to the LLM
+    cluster_cache = cluster_cache or LLMCache(namespace="failure_clusters")
+    try:
+        analysis = ai_service.analyze_test_results(
+            execution.results, raise_errors=True, cluster_cache=cluster_cache)
+    except Exception:
+        # Serve the placeholder but don't cache it
+        return ai_service.fallback_analysis(), None
+
+    if stored is None:
+        stored = models.ExecutionAnalysis(
+            execution_id=execution.id,
+            model=ai_service.model,
+            prompt_version=ANALYSIS_PROMPT_VERSION
+        )
+        db.add(stored)
+    stored.analysis = analysis
+    stored.created_at = datetime.utcnow()
+
+    try:
+        db.commit()
+    except IntegrityError:
+        # A concurrent request stored it first
+        db.rollback()
+        stored = get_stored_analysis(db, execution.id, ai_service.model)
+        return stored.analysis, stored
+
+    db.refresh(stored)
+    return analysis, stored
+
+
+def schedule_execution_analysis(execution_id: int):
+    """Analyze a just-completed execution on the background pool"""
+    if AUTO_ANALYZE:
+        _analysis_pool.submit(run_execution_analysis, execution_id)
+
+
+def run_execution_analysis(execution_id: int, session_factory=SessionLocal,
+                           ai_service: AIService = None):
+    db = session_factory()
+    try:
+        execution = db.query(models.TestExecution).filter(
+            models.TestExecution.id == execution_id
+        ).first()
+        if execution and execution.status == "completed":
+            get_or_create_analysis(
+                db, execution, ai_service=ai_service,
+                cluster_cache=LLMCache(namespace="failure_clusters",
+                                       session_factory=session_factory))
+    except Exception as e:
+        print(f"Error analyzing execution {execution_id}: {str(e)}")
+    finally:
+        db.close()
@@ -0,0 +1,79 @@
+import os
+from typing import Any, Dict
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.execution_queries import EXECUTION_TYPE
+from app.utils.ttl_cache import TTLCache
+
+_cache = TTLCache(ttl=float(os.getenv("DASHBOARD_CACHE_TTL", "10")))
+
+
+def get_dashboard_stats(db: Session) -> Dict[str, Any]:
+    """Dashboard statistics, served from a short-lived in-process cache"""
+    stats = _cache.get("dashboard")
+    if stats is None:
+        stats = compute_dashboard_stats(db)
+        _cache.set("dashboard", stats)
+    return stats
+
+
+def invalidate_dashboard_cache():
+    """Call when an execution finishes so the next read is fresh"""
+    _cache.invalidate()
+
+
+def compute_dashboard_stats(db: Session) -> Dict[str, Any]:
+    """Compute dashboard statistics with SQL aggregates"""
+    execution = models.TestExecution
+
+    totals = db.execute(select(
+        select(func.count(models.APISpec.id)).scalar_subquery(),
+        select(func.count(models.TestSuite.id)).scalar_subquery(),
+        select(func.count(execution.id)).scalar_subquery(),
+        # Load runs record their success rate there, not coverage
+        select(func.avg(execution.coverage_percentage)).where(
+            execution.status == "completed",
+            EXECUTION_TYPE == "functional"
+        ).scalar_subquery()
+    )).one()
+    total_specs, total_suites, total_executions, avg_coverage = totals
+
+    by_status = dict(db.query(
+        execution.status, func.count(execution.id)
+    ).group_by(execution.status).all())
+
+    recent_executions = db.query(
+        execution.id,
+        execution.test_suite_id,
+        execution.status,
+        execution.passed_tests,
+        execution.failed_tests,
+        execution.coverage_percentage,
+        execution.started_at
+    ).order_by(
+        execution.started_at.desc(),
+        execution.id.desc()
+    ).limit(10).all()
+
+    return {
+        "total_api_specs": total_specs,
+        "total_test_suites": total_suites,
+        "total_executions": total_executions,
+        "executions_by_status": by_status,
+        "average_coverage": round(avg_coverage or 0, 2),
+        "recent_executions": [
+            {
+                "id": e.id,
+                "test_suite_id": e.test_suite_id,
+                "status": e.status,
+                "passed_tests": e.passed_tests,
+                "failed_tests": e.failed_tests,
+                "coverage": e.coverage_percentage,
+                "started_at": e.started_at
+            }
+            for e in recent_executions
+        ]
+    }
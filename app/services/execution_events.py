@@ -0,0 +1,68 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# How long a finished execution's buffer is kept for late subscribers;
+# after that the stream endpoint replays from the database instead
+COMPLETED_BUFFER_TTL = 120
+# A buffer that never completes (its runner died) is dropped after this
+# long without events
+STALLED_BUFFER_TTL = 3600
+
+
+class ExecutionEventBuffer:
+    """In-memory log of one execution's events, appended as tests finish"""
+
+    def __init__(self, execution_id: int, total_tests: int):
+        self.execution_id = execution_id
+        self.total_tests = total_tests
+        self.events: List[Tuple[str, Dict[str, Any]]] = []
+        self.completed_at: Optional[float] = None
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def append(self, event: str, data: Dict[str, Any]):
+        with self._lock:
+            self.events.append((event, data))
+            self.updated_at = time.monotonic()
+
+    def complete(self, summary: Dict[str, Any]):
+        with self._lock:
+            self.events.append(("complete", summary))
+            self.completed_at = self.updated_at = time.monotonic()
+
+    def events_since(self, cursor: int) -> List[Tuple[str, Dict[str, Any]]]:
+        """Events with position >= cursor"""
+        with self._lock:
+            return self.events[cursor:]
+
+    @property
+    def is_complete(self) -> bool:
+        return self.completed_at is not None
+
+    def is_stale(self, now: float) -> bool:
+        if self.is_complete:
+            return now - self.completed_at > COMPLETED_BUFFER_TTL
+        return now - self.updated_at > STALLED_BUFFER_TTL
+
+
+_buffers: Dict[int, ExecutionEventBuffer] = {}
+_buffers_lock = threading.Lock()
+
+
+def open_buffer(execution_id: int, total_tests: int) -> ExecutionEventBuffer:
+    """Start buffering events for an execution"""
+    now = time.monotonic()
+    with _buffers_lock:
+        for stale_id in [eid for eid, buf in _buffers.items()
+                         if buf.is_stale(now)]:
+            del _buffers[stale_id]
+
+        buffer = ExecutionEventBuffer(execution_id, total_tests)
+        _buffers[execution_id] = buffer
+        return buffer
+
+
+def get_buffer(execution_id: int) -> Optional[ExecutionEventBuffer]:
+    with _buffers_lock:
+        return _buffers.get(execution_id)
@@ -0,0 +1,271 @@
+import copy
+import heapq
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import requests
+
+from app.services.failure_analysis import normalize_endpoint
+
+# "{{user_id}}" in an endpoint, header or body is filled from a capture
+_VARIABLE = re.compile(r"\{\{\s*([\w.-]+)\s*\}\}")
+# An OpenAPI path parameter left unfilled, e.g. "/pets/{petId}"
+_PLACEHOLDER = re.compile(r"\{[^{}/]+\}")
+# Methods that never change server state, so need no ordering between them
+_SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def resource_key(endpoint: str) -> str:
+    """
+    The collection a request touches: its path up to the first identifier,
+    so /users, /users/7 and /users/7/posts all share "/users".
+    """
+    root = []
+    for segment in normalize_endpoint(endpoint).strip("/").split("/"):
+        if segment.startswith("{"):
+            break
+        root.append(segment)
+    return "/" + "/".join(root)
+
+
+def variables_in(value: Any) -> Set[str]:
+    """Names of the {{variables}} used anywhere in value"""
+    if isinstance(value, str):
+        return set(_VARIABLE.findall(value))
+    if isinstance(value, dict):
+        return set().union(*(variables_in(v) for v in value.values())) \
+            if value else set()
+    if isinstance(value, list):
+        return set().union(*(variables_in(v) for v in value)) \
+            if value else set()
+    return set()
+
+
+def substitute(value: Any, variables: Dict[str, Any]) -> Any:
+    """
+    Fill {{variables}} in value. A string that is exactly one variable
+    takes the captured value as is, so numbers stay numbers in bodies.
+    """
+    if isinstance(value, str):
+        whole = _VARIABLE.fullmatch(value)
+        if whole and whole.group(1) in variables:
+            return variables[whole.group(1)]
+        return _VARIABLE.sub(
+            lambda m: str(variables[m.group(1)])
+            if m.group(1) in variables else m.group(0), value)
+    if isinstance(value, dict):
+        return {k: substitute(v, variables) for k, v in value.items()}
+    if isinstance(value, list):
+        return [substitute(v, variables) for v in value]
+    return value
+
+
+def extract(data: Any, path: str) -> Any:
+    """Value at a dotted path ("data.items.0.id"); KeyError when missing"""
+    for part in path.split("."):
+        if isinstance(data, list) and part.isdigit():
+            data = data[int(part)]
+        elif isinstance(data, dict):
+            data = data[part]
+        else:
+            raise KeyError(path)
+    return data
+
+
+def _request_parts(test_case: Dict[str, Any]) -> List[Any]:
+    return [test_case.get("endpoint"), test_case.get("headers"),
+            test_case.get("body")]
+
+
+class ExecutionPlan:
+    """
+    Dependency graph over a suite's test cases.
+
+    Edges come from three places:
+      * explicit `depends_on`, a list of other cases' `id` (or name);
+      * captures: a case using {{var}} depends on the case whose
+        `capture` ({"var": "dotted.path"}) produces it;
+      * resources: cases touching a resource that is written to (any
+        method other than GET/HEAD/OPTIONS) run in suite order, so a POST
+        precedes the GET and DELETE of what it created. Resources that are
+        only read have no ordering at all.
+
+    Cases with no path between them may run concurrently. A cycle (only
+    possible through explicit forward references) is broken at its
+    earliest case, whose unmet dependencies are dropped. `captured` names
+    the variables some case captures; other {{...}} text is left alone.
+    """
+
+    def __init__(self, test_cases: List[Dict[str, Any]]):
+        self.test_cases = test_cases
+        count = len(test_cases)
+        self.depends_on: List[Set[int]] = [set() for _ in range(count)]
+        self.broken_cycles: List[int] = []
+
+        refs: Dict[str, int] = {}
+        capturers: Dict[str, List[int]] = {}
+        resources: Dict[str, List[int]] = {}
+        for index, test_case in enumerate(test_cases):
+            for ref in (test_case.get("name"), test_case.get("id")):
+                if ref is not None:
+                    refs.setdefault(str(ref), index)
+            for name in test_case.get("capture") or {}:
+                capturers.setdefault(name, []).append(index)
+            resources.setdefault(
+                resource_key(test_case.get("endpoint") or ""), []
+            ).append(index)
+        self.captured: Set[str] = set(capturers)
+        # ids win over names that happen to collide with them
+        refs.update({str(tc["id"]): i for i, tc in enumerate(test_cases)
+                     if tc.get("id") is not None})
+
+        for index, test_case in enumerate(test_cases):
+            for ref in test_case.get("depends_on") or []:
+                target = refs.get(str(ref))
+                if target is not None and target != index:
+                    self.depends_on[index].add(target)
+            for name in variables_in(_request_parts(test_case)):
+                target = self._capturer(capturers.get(name, []), index)
+                if target is not None:
+                    self.depends_on[index].add(target)
+
+        # Resources are chained in the order the explicit edges allow, so
+        # a GET that uses a POST's capture follows it even if listed first
+        position = {index: n for n, index in
+                    enumerate(self._topological_order())}
+        for indices in resources.values():
+            methods = {str(test_cases[i].get("method") or "GET").upper()
+                       for i in indices}
+            if methods - _SAFE_METHODS:
+                indices = sorted(indices, key=position.get)
+                for previous, index in zip(indices, indices[1:]):
+                    self.depends_on[index].add(previous)
+        self.order = self._topological_order()
+
+    @staticmethod
+    def _capturer(indices: List[int], index: int) -> Optional[int]:
+        """Nearest earlier case capturing a variable, else the first later"""
+        earlier = [i for i in indices if i < index]
+        if earlier:
+            return earlier[-1]
+        later = [i for i in indices if i > index]
+        return later[0] if later else None
+
+    def _topological_order(self) -> List[int]:
+        """Suite order wherever the dependencies allow it"""
+        count = len(self.test_cases)
+        self.dependents: List[Set[int]] = [set() for _ in range(count)]
+        for index, dependencies in enumerate(self.depends_on):
+            for dependency in dependencies:
+                self.dependents[dependency].add(index)
+        waiting = [len(d) for d in self.depends_on]
+        ready = [i for i in range(count) if not waiting[i]]
+        heapq.heapify(ready)
+        placed: Set[int] = set()
+        order: List[int] = []
+
+        while len(order) < count:
+            if not ready:
+                index = min(i for i in range(count) if i not in placed)
+                for dependency in self.depends_on[index] - placed:
+                    self.dependents[dependency].discard(index)
+                self.depends_on[index] &= placed
+                self.broken_cycles.append(index)
+                ready.append(index)
+            index = heapq.heappop(ready)
+            placed.add(index)
+            order.append(index)
+            for dependent in self.dependents[index]:
+                waiting[dependent] -= 1
+                if not waiting[dependent] and dependent not in placed:
+                    heapq.heappush(ready, dependent)
+        return order
+
+    def chains(self) -> List[List[int]]:
+        """Groups of cases linked by dependencies, each in run order"""
+        group = list(range(len(self.test_cases)))
+
+        def find(i):
+            while group[i] != i:
+                group[i] = group[group[i]]
+                i = group[i]
+            return i
+
+        for index, dependencies in enumerate(self.depends_on):
+            for dependency in dependencies:
+                group[find(index)] = find(dependency)
+
+        chains: Dict[int, List[int]] = {}
+        for index in self.order:
+            chains.setdefault(find(index), []).append(index)
+        return list(chains.values())
+
+
+class RunVariables:
+    """
+    Values captured from responses during one suite run. Only names in
+    `captured` are variables; any other {{...}} in a case is sent as is.
+    """
+
+    def __init__(self, captured: Iterable[str] = ()):
+        self.captured = set(captured)
+        self.values: Dict[str, Any] = {}
+        # Last id created per resource, used for unfilled {param}s
+        self.created_ids: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def prepare(self, test_case: Dict[str, Any]) -> \
+            Tuple[Dict[str, Any], Set[str]]:
+        """The case with variables filled in, plus any that are missing"""
+        with self._lock:
+            values = dict(self.values)
+            created = self.created_ids.get(
+                resource_key(test_case.get("endpoint") or ""))
+
+        prepared = copy.copy(test_case)
+        for key, value in zip(("endpoint", "headers", "body"),
+                              _request_parts(test_case)):
+            if value is not None:
+                prepared[key] = substitute(value, values)
+        if isinstance(prepared.get("headers"), dict):
+            # Header values must be strings even when captured as numbers
+            prepared["headers"] = {name: value if isinstance(value, str)
+                                   else str(value) for name, value in
+                                   prepared["headers"].items()}
+        if created is not None and isinstance(prepared.get("endpoint"), str):
+            prepared["endpoint"] = _PLACEHOLDER.sub(
+                str(created), prepared["endpoint"], count=1)
+        missing = variables_in(_request_parts(prepared)) & self.captured
+        return prepared, missing
+
+    def capture(self, test_case: Dict[str, Any],
+                response: requests.Response, result: Dict[str, Any]):
+        """Store the case's captures and any id its POST created"""
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+
+        captured = {}
+        for name, path in (test_case.get("capture") or {}).items():
+            try:
+                if str(path).startswith("headers."):
+                    captured[name] = response.headers[path[len("headers."):]]
+                else:
+                    captured[name] = extract(data, str(path))
+            except (KeyError, IndexError, TypeError):
+                result.setdefault("warnings", []).append(
+                    f"Could not capture {name} from {path}")
+
+        created = None
+        if str(test_case.get("method") or "").upper() == "POST" and \
+                200 <= response.status_code < 300 and \
+                isinstance(data, dict) and data.get("id") is not None:
+            created = data["id"]
+
+        with self._lock:
+            self.values.update(captured)
+            if created is not None:
+                self.created_ids[resource_key(
+                    test_case.get("endpoint") or "")] = created
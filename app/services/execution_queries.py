@@ -0,0 +1,93 @@
+import base64
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import or_, and_, func
+from sqlalchemy.orm import Session
+
+from app import models
+
+# Scalar columns only: listing never touches per-test result payloads
+SUMMARY_COLUMNS = (
+    models.TestExecution.id,
+    models.TestExecution.test_suite_id,
+    models.TestExecution.status,
+    models.TestExecution.execution_type,
+    models.TestExecution.total_tests,
+    models.TestExecution.passed_tests,
+    models.TestExecution.failed_tests,
+    models.TestExecution.coverage_percentage,
+    models.TestExecution.execution_time,
+    models.TestExecution.started_at,
+    models.TestExecution.completed_at,
+)
+
+# Rows from before execution types existed are functional runs
+EXECUTION_TYPE = func.coalesce(models.TestExecution.execution_type,
+                               "functional")
+
+
+def encode_cursor(started_at: datetime, execution_id: int) -> str:
+    """Opaque cursor pointing just past (started_at, id)"""
+    raw = f"{started_at.isoformat()}|{execution_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_cursor; raises ValueError on malformed input"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        started_at, execution_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(started_at), int(execution_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def list_execution_summaries(db: Session,
+                             limit: int = 50,
+                             cursor: Optional[str] = None,
+                             test_suite_id: Optional[int] = None,
+                             status: Optional[str] = None,
+                             execution_type: Optional[str] = None,
+                             started_after: Optional[datetime] = None,
+                             started_before: Optional[datetime] = None
+                             ) -> Dict[str, Any]:
+    """
+    Newest-first page of execution summaries using keyset pagination on
+    (started_at, id), so each page is one indexed range scan.
+    """
+    query = db.query(*SUMMARY_COLUMNS)
+
+    if test_suite_id is not None:
+        query = query.filter(models.TestExecution.test_suite_id == test_suite_id)
+    if status:
+        query = query.filter(models.TestExecution.status == status)
+    if execution_type:
+        query = query.filter(EXECUTION_TYPE == execution_type)
+    if started_after:
+        query = query.filter(models.TestExecution.started_at >= started_after)
+    if started_before:
+        query = query.filter(models.TestExecution.started_at < started_before)
+
+    if cursor:
+        cursor_started_at, cursor_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            models.TestExecution.started_at < cursor_started_at,
+            and_(models.TestExecution.started_at == cursor_started_at,
+                 models.TestExecution.id < cursor_id)
+        ))
+
+    rows = query.order_by(
+        models.TestExecution.started_at.desc(),
+        models.TestExecution.id.desc()
+    ).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].started_at, rows[-1].id)
+
+    return {
+        "items": [dict(row._mapping) for row in rows],
+        "next_cursor": next_cursor
+    }
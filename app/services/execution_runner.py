@@ -0,0 +1,172 @@
+import itertools
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app import models
+from app.database import SessionLocal
+from app.services import execution_events
+from app.services.analysis_store import schedule_execution_analysis
+from app.services.dashboard import invalidate_dashboard_cache
+from app.services.latency_stats import compute_latency_stats
+from app.services.load_tester import run_load_execution
+from app.services.result_store import save_results
+from app.services.test_executor import TestExecutor
+
+# Executions and load runs share these workers, each with its own session
+# and connection
+_runner_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("EXECUTION_RUNNER_WORKERS", "4")),
+    thread_name_prefix="execution-runner"
+)
+# Results written per commit while an execution runs
+RESULT_COMMIT_BATCH = int(os.getenv("RESULT_COMMIT_BATCH", "50"))
+
+
+def submit_execution(execution_id: int, test_cases: List[Dict[str, Any]],
+                     base_url: str, concurrency: int = 1,
+                     max_per_host: Optional[int] = None) -> Future:
+    """Queue an execution on the local runner pool"""
+    return _runner_pool.submit(run_execution, execution_id, test_cases,
+                               base_url, concurrency, max_per_host)
+
+
+def submit_load_execution(execution_id: int,
+                          test_cases: List[Dict[str, Any]], base_url: str,
+                          rps: Optional[float] = None,
+                          concurrency: Optional[int] = None,
+                          duration: float = 30.0) -> Future:
+    """Queue a load run on the local runner pool"""
+    return _runner_pool.submit(run_load_execution, execution_id, test_cases,
+                               base_url, rps=rps, concurrency=concurrency,
+                               duration=duration)
+
+
+class _ResultWriter:
+    """
+    Buffers results as tests finish and commits them in batches, along
+    with running pass/fail counts so progress is visible mid-run.
+    """
+
+    def __init__(self, db, execution_id: int, batch_size: int):
+        self.db = db
+        self.execution_id = execution_id
+        self.batch_size = max(1, batch_size)
+        self.passed = 0
+        self.failed = 0
+        # Suite position -> (result, completion sequence)
+        self._pending: Dict[int, Tuple[Dict[str, Any], int]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, index: int, result: Dict[str, Any], sequence: int):
+        with self._lock:
+            self._pending[index] = (result, sequence)
+            if result["status"] == "passed":
+                self.passed += 1
+            else:
+                self.failed += 1
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        positions = sorted(self._pending)
+        save_results(self.db, self.execution_id,
+                     [self._pending[p][0] for p in positions],
+                     positions=positions,
+                     sequences=[self._pending[p][1] for p in positions])
+        self.db.query(models.TestExecution).filter(
+            models.TestExecution.id == self.execution_id
+        ).update({
+            models.TestExecution.passed_tests: self.passed,
+            models.TestExecution.failed_tests: self.failed
+        }, synchronize_session=False)
+        self.db.commit()
+        self._pending.clear()
+
+
+def run_execution(execution_id: int, test_cases: List[Dict[str, Any]],
+                  base_url: str, concurrency: int = 1,
+                  max_per_host: Optional[int] = None,
+                  session_factory=SessionLocal,
+                  batch_size: Optional[int] = None):
+    """Run a functional execution, storing results as they complete"""
+    executor = TestExecutor(base_url, concurrency=concurrency,
+                            max_per_host=max_per_host)
+    events = execution_events.get_buffer(execution_id)
+    db = session_factory()
+    writer = _ResultWriter(db, execution_id,
+                           batch_size or RESULT_COMMIT_BATCH)
+
+    sequence = itertools.count()
+    record_lock = threading.Lock()
+
+    def record(index: int, result: Dict[str, Any]):
+        # The completion sequence is the result's event id, live or
+        # replayed from the database, so both are taken together
+        with record_lock:
+            if events:
+                events.append("result", {"index": index, **result})
+            writer.add(index, result, next(sequence))
+
+    try:
+        try:
+            results = executor.execute_test_suite(test_cases,
+                                                  on_result=record)
+            writer.flush()
+        except Exception as e:
+            print(f"Error running execution {execution_id}: {str(e)}")
+            db.rollback()
+            execution = db.get(models.TestExecution, execution_id)
+            if execution:
+                execution.status = "failed"
+                execution.completed_at = datetime.utcnow()
+                db.commit()
+            if events:
+                events.complete({"status": "failed", "error": str(e)})
+            return
+
+        execution = db.get(models.TestExecution, execution_id)
+        if execution:
+            execution.status = "completed"
+            execution.total_tests = results["total_tests"]
+            execution.passed_tests = results["passed_tests"]
+            execution.failed_tests = results["failed_tests"]
+            execution.coverage_percentage = results["coverage_percentage"]
+            execution.execution_time = results["execution_time"]
+            execution.latency_stats = compute_latency_stats(
+                results["results"])
+            execution.completed_at = datetime.utcnow()
+            db.commit()
+            invalidate_dashboard_cache()
+            schedule_execution_analysis(execution_id)
+    except Exception as e:
+        # Don't leave streams (and the event buffer) waiting on a dead run
+        if events and not events.is_complete:
+            events.complete({"status": "failed", "error": str(e)})
+        raise
+    finally:
+        db.close()
+
+    if events:
+        events.complete(_execution_summary(results, "completed"))
+
+
+def _execution_summary(results: Dict[str, Any], status: str) -> \
+        Dict[str, Any]:
+    """Scalar totals sent as the final event of a stream"""
+    return {
+        "status": status,
+        "total_tests": results["total_tests"],
+        "passed_tests": results["passed_tests"],
+        "failed_tests": results["failed_tests"],
+        "coverage_percentage": results["coverage_percentage"],
+        "execution_time": results["execution_time"]
+    }
@@ -0,0 +1,279 @@
+import heapq
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import SessionLocal
+from app.services.analysis_store import schedule_execution_analysis
+from app.services.dashboard import invalidate_dashboard_cache
+from app.services.execution_plan import ExecutionPlan
+from app.services.latency_stats import compute_latency_stats, \
+    merge_latency_stats
+from app.services.result_store import save_results
+from app.services.test_executor import TestExecutor
+
+# Shards per execution when the request doesn't say; 0 runs executions
+# inside the API process instead of queueing them for workers
+EXECUTION_SHARDS = int(os.getenv("EXECUTION_SHARDS", "0"))
+# A running shard whose worker went quiet this long is handed out again
+SHARD_LEASE_SECONDS = int(os.getenv("SHARD_LEASE_SECONDS", "900"))
+SHARD_MAX_ATTEMPTS = int(os.getenv("SHARD_MAX_ATTEMPTS", "2"))
+
+
+def split_into_shards(test_cases: List[Dict[str, Any]],
+                      shard_count: int) -> List[List[int]]:
+    """
+    Partition suite positions into at most shard_count shards of similar
+    size. Dependency chains (see ExecutionPlan) are never split, so
+    captures and per-resource ordering still hold inside each shard.
+    """
+    chains = ExecutionPlan(test_cases).chains()
+    loads = [(0, n) for n in range(min(shard_count, len(chains)))]
+    shards: List[List[int]] = [[] for _ in loads]
+
+    # Largest chains first, each onto the least loaded shard
+    for chain in sorted(chains, key=len, reverse=True):
+        load, n = heapq.heappop(loads)
+        shards[n].extend(chain)
+        heapq.heappush(loads, (load + len(chain), n))
+    return [sorted(shard) for shard in shards if shard]
+
+
+def enqueue_execution(db: Session, execution: models.TestExecution,
+                      test_cases: List[Dict[str, Any]], base_url: str,
+                      shard_count: int, concurrency: int = 1,
+                      max_per_host: Optional[int] = None) -> \
+        List[models.ExecutionShard]:
+    """Queue an execution's cases as shards for workers to claim"""
+    shards = [
+        models.ExecutionShard(
+            execution_id=execution.id,
+            shard_index=n,
+            positions=positions,
+            test_cases=[test_cases[p] for p in positions],
+            base_url=base_url,
+            concurrency=concurrency,
+            max_per_host=max_per_host,
+            status="queued",
+            attempts=0
+        )
+        for n, positions in enumerate(split_into_shards(test_cases,
+                                                        shard_count))
+    ]
+    if not shards:
+        execution.status = "completed"
+        execution.completed_at = datetime.utcnow()
+    db.add_all(shards)
+    db.commit()
+    return shards
+
+
+class ShardQueue:
+    """
+    Shard queue kept in the application database, so worker processes on
+    any host sharing that database can poll it.
+
+    A claim is a conditional UPDATE that only succeeds while the shard is
+    still claimable; workers racing for the same shard see a zero row
+    count and move on to the next one. A shard whose lease expires is
+    handed out again until it has had max_attempts, then it fails.
+    Results are written only if the worker still holds the shard, and
+    whichever worker completes the last shard merges them into the
+    execution.
+    """
+
+    def __init__(self, session_factory=SessionLocal,
+                 lease_seconds: Optional[int] = None,
+                 max_attempts: Optional[int] = None):
+        self.session_factory = session_factory
+        self.lease_seconds = lease_seconds or SHARD_LEASE_SECONDS
+        self.max_attempts = max_attempts or SHARD_MAX_ATTEMPTS
+
+    def _expired(self):
+        Shard = models.ExecutionShard
+        expired = datetime.utcnow() - timedelta(seconds=self.lease_seconds)
+        return and_(Shard.status == "running", Shard.claimed_at < expired)
+
+    def _claimable(self):
+        Shard = models.ExecutionShard
+        return or_(Shard.status == "queued",
+                   and_(self._expired(), Shard.attempts < self.max_attempts))
+
+    def fail_expired(self):
+        """Fail shards whose lease ran out on their last attempt"""
+        Shard = models.ExecutionShard
+        db = self.session_factory()
+        try:
+            exhausted = db.query(Shard.id, Shard.execution_id).filter(
+                self._expired(), Shard.attempts >= self.max_attempts
+            ).all()
+            execution_ids = set()
+            for shard_id, execution_id in exhausted:
+                if db.query(Shard).filter(
+                    Shard.id == shard_id, self._expired()
+                ).update({
+                    Shard.status: "failed",
+                    Shard.error: f"Lease expired after "
+                                 f"{self.max_attempts} attempts",
+                    Shard.completed_at: datetime.utcnow()
+                }, synchronize_session=False):
+                    execution_ids.add(execution_id)
+            db.commit()
+        finally:
+            db.close()
+
+        for execution_id in execution_ids:
+            self.finish_execution(execution_id)
+
+    def claim(self, worker_id: str) -> Optional[models.ExecutionShard]:
+        """Take the oldest claimable shard, or None when there is none"""
+        Shard = models.ExecutionShard
+        self.fail_expired()
+        db = self.session_factory()
+        try:
+            skipped = set()
+            while True:
+                candidate = db.query(Shard.id).filter(
+                    self._claimable(), Shard.id.notin_(skipped)
+                ).order_by(Shard.id).first()
+                if candidate is None:
+                    return None
+
+                claimed = db.query(Shard).filter(
+                    Shard.id == candidate.id, self._claimable()
+                ).update({
+                    Shard.status: "running",
+                    Shard.worker_id: worker_id,
+                    Shard.claimed_at: datetime.utcnow(),
+                    Shard.attempts: Shard.attempts + 1
+                }, synchronize_session=False)
+                db.commit()
+                if claimed:
+                    shard = db.get(Shard, candidate.id)
+                    db.expunge(shard)
+                    return shard
+                skipped.add(candidate.id)
+        finally:
+            db.close()
+
+    def complete(self, shard: models.ExecutionShard, worker_id: str,
+                 results: Dict[str, Any]) -> bool:
+        """Store a shard's results; False if its lease was lost meanwhile"""
+        Shard = models.ExecutionShard
+        db = self.session_factory()
+        try:
+            updated = db.query(Shard).filter(
+                Shard.id == shard.id, Shard.status == "running",
+                Shard.worker_id == worker_id
+            ).update({
+                Shard.status: "completed",
+                Shard.passed_tests: results["passed_tests"],
+                Shard.failed_tests: results["failed_tests"],
+                Shard.execution_time: results["execution_time"],
+                Shard.latency_stats: compute_latency_stats(
+                    results["results"]),
+                Shard.completed_at: datetime.utcnow()
+            }, synchronize_session=False)
+            if not updated:
+                db.rollback()
+                return False
+            save_results(db, shard.execution_id, results["results"],
+                         positions=shard.positions)
+            db.commit()
+        finally:
+            db.close()
+
+        self.finish_execution(shard.execution_id)
+        return True
+
+    def fail(self, shard: models.ExecutionShard, worker_id: str,
+             error: str):
+        """Requeue a shard that errored, or fail it after max_attempts"""
+        Shard = models.ExecutionShard
+        db = self.session_factory()
+        try:
+            retry = shard.attempts < self.max_attempts
+            db.query(Shard).filter(
+                Shard.id == shard.id, Shard.worker_id == worker_id
+            ).update({
+                Shard.status: "queued" if retry else "failed",
+                Shard.error: error,
+                Shard.completed_at: None if retry else datetime.utcnow()
+            }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+        if not retry:
+            self.finish_execution(shard.execution_id)
+
+    def finish_execution(self, execution_id: int) -> bool:
+        """Merge the shards into the execution once all of them are done"""
+        Shard = models.ExecutionShard
+        Execution = models.TestExecution
+        db = self.session_factory()
+        try:
+            shards = db.query(Shard).filter(
+                Shard.execution_id == execution_id).all()
+            if any(s.status not in ("completed", "failed") for s in shards):
+                return False
+            execution = db.get(Execution, execution_id)
+            if execution is None:
+                return False
+
+            passed = sum(s.passed_tests or 0 for s in shards)
+            failed = sum(s.failed_tests or 0 for s in shards)
+            total = execution.total_tests or 0
+            completed = all(s.status == "completed" for s in shards)
+            now = datetime.utcnow()
+
+            # Only one worker gets past the status check
+            merged = db.query(Execution).filter(
+                Execution.id == execution_id, Execution.status == "running"
+            ).update({
+                Execution.status: "completed" if completed else "failed",
+                Execution.passed_tests: passed,
+                Execution.failed_tests: failed,
+                Execution.coverage_percentage:
+                    passed / total * 100 if total else 0,
+                Execution.execution_time:
+                    (now - execution.started_at).total_seconds(),
+                Execution.latency_stats: merge_latency_stats(
+                    [s.latency_stats for s in shards]),
+                Execution.completed_at: now
+            }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+        if merged:
+            invalidate_dashboard_cache()
+            if completed:
+                schedule_execution_analysis(execution_id)
+        return bool(merged)
+
+
+def run_next_shard(queue: ShardQueue, worker_id: str) -> bool:
+    """Claim and execute one shard; False when the queue was empty"""
+    shard = queue.claim(worker_id)
+    if shard is None:
+        return False
+
+    try:
+        executor = TestExecutor(shard.base_url,
+                                concurrency=shard.concurrency or 1,
+                                max_per_host=shard.max_per_host)
+        results = executor.execute_test_suite(shard.test_cases)
+    except Exception as e:
+        print(f"Error running shard {shard.id}: {str(e)}")
+        queue.fail(shard, worker_id, str(e))
+        return True
+
+    if not queue.complete(shard, worker_id, results):
+        print(f"Shard {shard.id} was reclaimed before it finished; "
+              f"results discarded")
+    return True
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import re
+from typing import Any, Dict, List
+
+# Path segments that are identifiers rather than part of the route
+_ID_SEGMENT = re.compile(
+    r"^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F-]{27,}|[0-9a-fA-F]{16,})$")
+# Volatile fragments stripped from error messages before comparing them
+_VOLATILE = [
+    (re.compile(r"https?://\S+"), "<url>"),
+    (re.compile(r"0x[0-9a-fA-F]+"), "<addr>"),
+    (re.compile(r"\d+(\.\d+)?"), "<n>"),
+]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) for budgeting prompts"""
+    return len(text) // 4 + 1
+
+
+def normalize_endpoint(endpoint: str) -> str:
+    """Collapse identifiers so /users/7 and /users/9 group together"""
+    path = (endpoint or "").split("?", 1)[0]
+    segments = [
+        "{id}" if _ID_SEGMENT.match(segment) else segment
+        for segment in path.strip("/").split("/")
+    ]
+    return "/" + "/".join(segments)
+
+
+def error_signature(errors: List[str]) -> str:
+    """Errors with numbers, URLs and addresses masked out"""
+    normalized = []
+    for error in errors or []:
+        text = str(error)
+        for pattern, replacement in _VOLATILE:
+            text = pattern.sub(replacement, text)
+        normalized.append(text[:200])
+    return " | ".join(sorted(set(normalized)))
+
+
+def cluster_failures(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Group failed results by endpoint, status mismatch and error signature.
+    Returns clusters ordered by size, each with a stable `signature` hash.
+    """
+    clusters: Dict[str, Dict[str, Any]] = {}
+
+    for result in results:
+        if result.get("status") != "failed":
+            continue
+
+        method = str(result.get("method") or "").upper()
+        endpoint = normalize_endpoint(result.get("endpoint") or "")
+        errors = list(result.get("errors") or []) + \
+            list(result.get("assertions_failed") or [])
+        key_parts = {
+            "method": method,
+            "endpoint": endpoint,
+            "expected_status": result.get("expected_status"),
+            "actual_status": result.get("actual_status"),
+            "errors": error_signature(errors)
+        }
+        signature = hashlib.sha1(
+            json.dumps(key_parts, sort_keys=True, default=str).encode()
+        ).hexdigest()[:16]
+
+        cluster = clusters.get(signature)
+        if cluster is None:
+            cluster = clusters[signature] = {
+                "signature": signature,
+                **key_parts,
+                "count": 0,
+                "example_tests": [],
+                "sample_errors": [str(e)[:300] for e in errors[:3]]
+            }
+        cluster["count"] += 1
+        if len(cluster["example_tests"]) < 3:
+            cluster["example_tests"].append(result.get("name"))
+
+    return sorted(clusters.values(), key=lambda c: (-c["count"],
+                                                    c["signature"]))
+
+
+def endpoint_breakdown(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Passed/failed counts per normalized endpoint, most failures first"""
+    breakdown: Dict[str, Dict[str, Any]] = {}
+    for result in results:
+        method = str(result.get("method") or "").upper()
+        endpoint = normalize_endpoint(result.get("endpoint") or "")
+        key = f"{method} {endpoint}".strip()
+        entry = breakdown.setdefault(key, {"endpoint": key, "passed": 0,
+                                           "failed": 0})
+        if result.get("status") == "passed":
+            entry["passed"] += 1
+        else:
+            entry["failed"] += 1
+
+    return sorted(breakdown.values(), key=lambda e: (-e["failed"],
+                                                     e["endpoint"]))
+
+
+def fit_to_budget(items: List[Dict[str, Any]], token_budget: int) -> \
+        List[Dict[str, Any]]:
+    """Longest prefix of items whose compact JSON fits the token budget"""
+    kept = []
+    used = 0
+    for item in items:
+        cost = estimate_tokens(json.dumps(item, separators=(",", ":"),
+                                          default=str))
+        if used + cost > token_budget:
+            break
+        kept.append(item)
+        used += cost
+    return kept
@@ -0,0 +1,165 @@
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from app import models
+from app.database import SessionLocal
+from app.services import spec_cache
+from app.services.llm_cache import LLMCache
+from app.services.test_generator import TestGenerator
+from app.utils.openapi_parser import OpenAPIParser
+
+# Local worker pool shared by the process; each job occupies one worker
+# while its endpoints fan out over the generator's own bounded pool
+_job_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv("GENERATION_JOB_WORKERS", "2")),
+    thread_name_prefix="generation-job"
+)
+
+
+def submit_generation_job(job_id: int) -> Future:
+    """Queue a generation job on the local worker pool"""
+    return _job_pool.submit(run_generation_job, job_id)
+
+
+def run_generation_job(job_id: int, session_factory=SessionLocal,
+                       generator: TestGenerator = None):
+    """
+    Generate a test suite for a job, recording progress as it goes. A job
+    carrying spec_content is an incremental update to that spec version.
+    """
+    db = session_factory()
+    try:
+        job = db.query(models.GenerationJob).filter(
+            models.GenerationJob.id == job_id
+        ).first()
+        if not job:
+            return
+
+        new_parser = None
+        try:
+            generator = generator or TestGenerator(
+                cache=LLMCache(session_factory=session_factory))
+
+            def progress(endpoint, error):
+                _record_progress(session_factory, job_id, error)
+
+            if job.spec_content is None:
+                test_cases, description = _generate_all(db, job, generator,
+                                                        progress)
+            else:
+                test_cases, description, new_parser = _generate_update(
+                    db, job, generator, progress)
+            job.llm_calls = generator.last_run.get("llm_calls")
+
+            if not test_cases:
+                job.status = "failed"
+                job.error = "Failed to generate test cases"
+            else:
+                if new_parser is not None:
+                    # Only now: the latest suite must match the stored spec
+                    job.api_spec.spec_content = job.spec_content
+                    if job.spec_name:
+                        job.api_spec.name = job.spec_name
+                test_suite = models.TestSuite(
+                    api_spec_id=job.api_spec_id,
+                    name=f"Generated Tests for {job.api_spec.name}",
+                    description=description,
+                    generated_tests=test_cases,
+                    generation_errors=generator.failures
+                )
+                db.add(test_suite)
+                db.flush()
+                job.test_suite_id = test_suite.id
+                job.status = "completed"
+
+        except Exception as e:
+            print(f"Error running generation job {job_id}: {str(e)}")
+            db.rollback()
+            job.status = "failed"
+            job.error = str(e)
+
+        job.completed_at = datetime.utcnow()
+        db.commit()
+        if new_parser is not None and job.status == "completed":
+            spec_cache.remember(job.api_spec, new_parser)
+    finally:
+        db.close()
+
+
+def _generate_all(db, job: models.GenerationJob, generator: TestGenerator,
+                  progress) -> Tuple[List[Dict[str, Any]], str]:
+    """Cases for every endpoint of the job's spec"""
+    parser = spec_cache.get_parser(job.api_spec)
+    endpoints = parser.get_endpoints()
+    job.total_endpoints = len(endpoints)
+    db.commit()
+
+    test_cases = generator.generate_tests_for_endpoints(
+        endpoints,
+        job.include_edge_cases,
+        bypass_cache=job.bypass_cache,
+        progress_callback=progress,
+        parser=parser,
+        mode=job.generation_mode
+    )
+    return test_cases, (f"Auto-generated test suite with "
+                        f"{len(test_cases)} test cases")
+
+
+def _generate_update(db, job: models.GenerationJob,
+                     generator: TestGenerator, progress) -> \
+        Tuple[List[Dict[str, Any]], str, OpenAPIParser]:
+    """
+    Cases for the job's new spec version, regenerating only operations that
+    changed since the latest suite. The stored spec is left as it is; the
+    caller replaces it (with the returned parser) if the job completes.
+    """
+    api_spec = job.api_spec
+    old_parser = spec_cache.get_parser(api_spec)
+    new_parser = OpenAPIParser.from_content(job.spec_content)
+    job.total_endpoints = len(new_parser.get_endpoints())
+    db.commit()
+
+    previous_suite = db.query(models.TestSuite).filter(
+        models.TestSuite.api_spec_id == api_spec.id
+    ).order_by(models.TestSuite.created_at.desc(),
+               models.TestSuite.id.desc()).first()
+    test_cases, diff = generator.generate_incremental(
+        old_parser,
+        new_parser,
+        previous_suite.generated_tests if previous_suite else [],
+        job.include_edge_cases,
+        bypass_cache=job.bypass_cache,
+        progress_callback=progress
+    )
+
+    regenerated = set(diff["regenerated"])
+    reused = sum(1 for case in test_cases
+                 if case.get("operation") not in regenerated)
+    # Operations whose cases were reused count as completed straight away
+    completed = models.GenerationJob.completed_endpoints
+    db.query(models.GenerationJob).filter(
+        models.GenerationJob.id == job.id
+    ).update({completed: completed + job.total_endpoints - len(regenerated)},
+             synchronize_session=False)
+
+    job.diff = diff
+    return test_cases, (f"Incremental update: {len(regenerated)} operations "
+                        f"regenerated, {reused} test cases reused"), \
+        new_parser
+
+
+def _record_progress(session_factory, job_id: int, error: str = None):
+    """Atomically bump the job's per-endpoint counters"""
+    column = (models.GenerationJob.failed_endpoints if error
+              else models.GenerationJob.completed_endpoints)
+    db = session_factory()
+    try:
+        db.query(models.GenerationJob).filter(
+            models.GenerationJob.id == job_id
+        ).update({column: column + 1}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
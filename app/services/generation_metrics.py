@@ -0,0 +1,79 @@
+import threading
+from typing import Any, Dict
+
+
+class ParseFailureTracker:
+    """Process-wide per-endpoint counters for LLM output validation"""
+
+    COUNTERS = ("responses", "cases_parsed", "cases_valid", "cases_invalid",
+                "cases_repaired", "repair_calls")
+
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint_key: str, **counts: int):
+        with self._lock:
+            stats = self._stats.setdefault(
+                endpoint_key, {name: 0 for name in self.COUNTERS})
+            for name, value in counts.items():
+                stats[name] += value
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Counters per endpoint plus the share of parsed cases discarded"""
+        with self._lock:
+            stats = {key: dict(value) for key, value in self._stats.items()}
+
+        for value in stats.values():
+            discarded = value["cases_invalid"] - value["cases_repaired"]
+            value["failure_rate"] = round(
+                discarded / value["cases_parsed"], 4
+            ) if value["cases_parsed"] else 0.0
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+class GenerationRunMetrics:
+    """Process-wide LLM call and wall-time totals per generation mode"""
+
+    def __init__(self):
+        self._totals: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, mode: str, endpoints: int, cache_hits: int,
+               batches: int, llm_calls: int, wall_time: float):
+        with self._lock:
+            totals = self._totals.setdefault(mode, {
+                "runs": 0, "endpoints": 0, "cache_hits": 0, "batches": 0,
+                "llm_calls": 0, "wall_time": 0.0})
+            totals["runs"] += 1
+            totals["endpoints"] += endpoints
+            totals["cache_hits"] += cache_hits
+            totals["batches"] += batches
+            totals["llm_calls"] += llm_calls
+            totals["wall_time"] += wall_time
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Totals per mode plus per-generated-endpoint averages to compare"""
+        with self._lock:
+            totals = {mode: dict(value) for mode, value in self._totals.items()}
+
+        for value in totals.values():
+            generated = value["endpoints"] - value["cache_hits"]
+            value["wall_time"] = round(value["wall_time"], 4)
+            value["llm_calls_per_endpoint"] = round(
+                value["llm_calls"] / generated, 4) if generated else 0.0
+            value["seconds_per_endpoint"] = round(
+                value["wall_time"] / generated, 4) if generated else 0.0
+        return totals
+
+    def reset(self):
+        with self._lock:
+            self._totals.clear()
+
+
+parse_failures = ParseFailureTracker()
+run_metrics = GenerationRunMetrics()
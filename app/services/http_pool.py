@@ -0,0 +1,149 @@
+import os
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import connection, connectionpool
+from urllib3.util.retry import Retry
+
+
+class _CountingAdapter(HTTPAdapter):
+    """HTTPAdapter that counts socket connects and requests sent"""
+
+    def __init__(self, *args, **kwargs):
+        self._counter_lock = threading.Lock()
+        self.connections_opened = 0
+        self.requests_sent = 0
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        adapter = self
+
+        # urllib3 reuses connection objects when reconnecting, so its own
+        # num_connections undercounts; count actual connect() calls instead.
+        # Class names match urllib3's so error messages read the same.
+        class HTTPConnection(connection.HTTPConnection):
+            def connect(self):
+                super().connect()
+                adapter._count("connections_opened")
+
+        class HTTPSConnection(connection.HTTPSConnection):
+            def connect(self):
+                super().connect()
+                adapter._count("connections_opened")
+
+        class HTTPConnectionPool(connectionpool.HTTPConnectionPool):
+            ConnectionCls = HTTPConnection
+
+        class HTTPSConnectionPool(connectionpool.HTTPSConnectionPool):
+            ConnectionCls = HTTPSConnection
+
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": HTTPConnectionPool,
+            "https": HTTPSConnectionPool
+        }
+
+    def send(self, request, *args, **kwargs):
+        self._count("requests_sent")
+        return super().send(request, *args, **kwargs)
+
+    def _count(self, counter: str):
+        with self._counter_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+
+class SessionPool:
+    """
+    Long-lived, keep-alive requests sessions shared per base_url. Only
+    connections are shared: the sessions never store cookies, so a login
+    in one test case or suite can't authenticate the ones that follow.
+    """
+
+    def __init__(self,
+                 pool_connections: int = int(
+                     os.getenv("EXECUTOR_POOL_CONNECTIONS", "10")),
+                 pool_maxsize: int = int(
+                     os.getenv("EXECUTOR_POOL_MAXSIZE", "64")),
+                 keep_alive: bool = os.getenv(
+                     "EXECUTOR_KEEP_ALIVE", "true").lower() == "true",
+                 max_retries: int = int(os.getenv("EXECUTOR_MAX_RETRIES", "0")),
+                 retry_backoff: float = float(
+                     os.getenv("EXECUTOR_RETRY_BACKOFF", "0.2"))):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._sessions: Dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def get_session(self, base_url: str) -> requests.Session:
+        """Return the shared session for base_url, creating it on first use"""
+        key = base_url.rstrip('/')
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._create_session()
+                self._sessions[key] = session
+            return session
+
+    def _create_session(self) -> requests.Session:
+        # Only connection-level failures are retried; status codes are what
+        # the tests assert on, so they must come back untouched
+        retries = Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=0,
+            status=0,
+            backoff_factor=self.retry_backoff,
+            raise_on_status=False
+        )
+        adapter = _CountingAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=retries
+        )
+
+        session = requests.Session()
+        # Cookies a test needs go in its own headers
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if not self.keep_alive:
+            session.headers["Connection"] = "close"
+        return session
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Connections opened vs. requests sent, per base_url"""
+        with self._lock:
+            sessions = dict(self._sessions)
+
+        stats = {}
+        for base_url, session in sessions.items():
+            adapters = {id(a): a for a in session.adapters.values()
+                        if isinstance(a, _CountingAdapter)}.values()
+            opened = sum(a.connections_opened for a in adapters)
+            sent = sum(a.requests_sent for a in adapters)
+
+            stats[base_url] = {
+                "connections_opened": opened,
+                "requests_sent": sent,
+                "requests_per_connection": round(sent / opened, 2)
+                if opened else 0.0
+            }
+        return stats
+
+    def close(self):
+        """Close every pooled session"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+
+# Shared by every executor in this worker process
+default_pool = SessionPool()
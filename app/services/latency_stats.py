@@ -0,0 +1,121 @@
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.execution_queries import EXECUTION_TYPE
+from app.services.failure_analysis import normalize_endpoint
+from app.utils.latency import LatencyHistogram
+
+# Phases reported by TestExecutor in each result's "timings"
+PHASES = ("queue", "headers", "body")
+
+
+def endpoint_key(result: Dict[str, Any]) -> str:
+    """'GET /users/{id}' for a result, with identifiers collapsed"""
+    method = str(result.get("method") or "").upper()
+    return f"{method} {normalize_endpoint(result.get('endpoint') or '')}"
+
+
+def compute_latency_stats(results: List[Dict[str, Any]]) -> \
+        Optional[Dict[str, Any]]:
+    """
+    Latency percentiles and histograms for one execution: overall, per
+    endpoint, and per request phase. Results without a timing are skipped.
+    """
+    overall = LatencyHistogram()
+    endpoints: Dict[str, LatencyHistogram] = {}
+    phases = {phase: LatencyHistogram() for phase in PHASES}
+
+    for result in results:
+        seconds = result.get("execution_time")
+        if seconds is None:
+            continue
+        overall.add(seconds)
+        endpoints.setdefault(endpoint_key(result),
+                             LatencyHistogram()).add(seconds)
+        for phase, value in (result.get("timings") or {}).items():
+            if phase in phases and value is not None:
+                phases[phase].add(value)
+
+    if not overall.count:
+        return None
+
+    return {
+        "overall": overall.summary(),
+        "endpoints": {key: histogram.summary()
+                      for key, histogram in sorted(endpoints.items())},
+        "phases": {phase: histogram.summary()
+                   for phase, histogram in phases.items() if histogram.count}
+    }
+
+
+def merge_latency_stats(parts: List[Optional[Dict[str, Any]]]) -> \
+        Optional[Dict[str, Any]]:
+    """Combine stats computed separately (e.g. per shard) into one"""
+    merged: Dict[str, Dict[str, LatencyHistogram]] = {
+        "overall": {}, "endpoints": {}, "phases": {}}
+    for stats in parts:
+        if not stats:
+            continue
+        groups = {"overall": {"overall": stats["overall"]},
+                  "endpoints": stats.get("endpoints") or {},
+                  "phases": stats.get("phases") or {}}
+        for group, summaries in groups.items():
+            for key, summary in summaries.items():
+                merged[group].setdefault(key, LatencyHistogram()).merge(
+                    LatencyHistogram.from_dict(summary["histogram"]))
+
+    if not merged["overall"]:
+        return None
+    return {
+        "overall": merged["overall"]["overall"].summary(),
+        "endpoints": {key: histogram.summary() for key, histogram
+                      in sorted(merged["endpoints"].items())},
+        "phases": {phase: merged["phases"][phase].summary()
+                   for phase in PHASES if phase in merged["phases"]}
+    }
+
+
+def latency_trends(db: Session, test_suite_id: Optional[int] = None,
+                   endpoint: Optional[str] = None,
+                   execution_type: Optional[str] = None,
+                   limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    p50/p90/p99 of recent completed executions, oldest first, read from the
+    stored stats without loading any per-test results. With `endpoint`
+    ("GET /users/{id}") the percentiles are for that endpoint only.
+    """
+    query = db.query(
+        models.TestExecution.id,
+        models.TestExecution.started_at,
+        models.TestExecution.latency_stats
+    ).filter(
+        models.TestExecution.status == "completed",
+        models.TestExecution.latency_stats.isnot(None)
+    )
+    if test_suite_id is not None:
+        query = query.filter(
+            models.TestExecution.test_suite_id == test_suite_id)
+    if execution_type:
+        query = query.filter(EXECUTION_TYPE == execution_type)
+
+    rows = query.order_by(models.TestExecution.started_at.desc(),
+                          models.TestExecution.id.desc()).limit(limit).all()
+
+    points = []
+    for row in reversed(rows):
+        stats = row.latency_stats or {}
+        summary = (stats.get("endpoints") or {}).get(endpoint) if endpoint \
+            else stats.get("overall")
+        if not summary:
+            continue
+        points.append({
+            "execution_id": row.id,
+            "started_at": row.started_at,
+            "count": summary["count"],
+            "p50": summary["p50"],
+            "p90": summary["p90"],
+            "p99": summary["p99"]
+        })
+    return points
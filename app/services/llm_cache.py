@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from app import models
+from app.database import SessionLocal
+
+
+class LLMCache:
+    """
+    Persistent, content-addressed cache for LLM output.
+    Entries are keyed on a hash of everything that influences the output
+    and evicted by count and total payload size (least recently used
+    first) and by age.
+    """
+
+    # Process-wide hit/miss counters, per namespace
+    _counters: Dict[str, Dict[str, int]] = defaultdict(
+        lambda: {"hits": 0, "misses": 0})
+    _counters_lock = threading.Lock()
+
+    def __init__(self, namespace: str = "test_cases",
+                 session_factory=SessionLocal,
+                 max_entries: Optional[int] = None,
+                 max_age_seconds: Optional[int] = None,
+                 max_bytes: Optional[int] = None):
+        self.namespace = namespace
+        self.session_factory = session_factory
+        self.max_entries = max_entries or int(
+            os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+        self.max_bytes = max_bytes or int(
+            os.getenv("LLM_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
+        self.max_age = timedelta(seconds=max_age_seconds or int(
+            os.getenv("LLM_CACHE_MAX_AGE_SECONDS", str(30 * 24 * 3600))))
+
+    @staticmethod
+    def make_key(**parts: Any) -> str:
+        """Stable hash of the cache inputs"""
+        canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"),
+                               default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss"""
+        db = self.session_factory()
+        try:
+            entry = db.query(models.LLMCacheEntry).filter(
+                models.LLMCacheEntry.key == key,
+                models.LLMCacheEntry.namespace == self.namespace
+            ).first()
+
+            now = datetime.utcnow()
+            if entry is not None and now - entry.created_at > self.max_age:
+                db.delete(entry)
+                db.commit()
+                entry = None
+
+            if entry is None:
+                self._count("misses")
+                return None
+
+            entry.hits = (entry.hits or 0) + 1
+            entry.last_accessed_at = now
+            value = entry.value
+            db.commit()
+            self._count("hits")
+            return value
+        finally:
+            db.close()
+
+    def set(self, key: str, value: Any):
+        """Store value under key, evicting old entries if over capacity"""
+        payload_size = len(json.dumps(value, default=str))
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            entry = db.query(models.LLMCacheEntry).filter(
+                models.LLMCacheEntry.key == key
+            ).first()
+            if entry is None:
+                entry = models.LLMCacheEntry(key=key, namespace=self.namespace)
+                db.add(entry)
+            entry.value = value
+            entry.size_bytes = payload_size
+            entry.created_at = now
+            entry.last_accessed_at = now
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another worker stored the same key first; keep theirs
+                db.rollback()
+                return
+
+            self._evict(db)
+        finally:
+            db.close()
+
+    def _evict(self, db):
+        """
+        Drop expired entries, then the least recently used while over the
+        entry count or total payload size
+        """
+        query = db.query(models.LLMCacheEntry).filter(
+            models.LLMCacheEntry.namespace == self.namespace
+        )
+        query.filter(
+            models.LLMCacheEntry.created_at < datetime.utcnow() - self.max_age
+        ).delete(synchronize_session=False)
+
+        overflow = query.count() - self.max_entries
+        if overflow > 0:
+            stale_keys = [
+                row.key for row in query.with_entities(
+                    models.LLMCacheEntry.key
+                ).order_by(
+                    models.LLMCacheEntry.last_accessed_at.asc()
+                ).limit(overflow)
+            ]
+            db.query(models.LLMCacheEntry).filter(
+                models.LLMCacheEntry.key.in_(stale_keys)
+            ).delete(synchronize_session=False)
+
+        excess = self._total_bytes(query) - self.max_bytes
+        if excess > 0:
+            stale_keys = []
+            for key, size in query.with_entities(
+                models.LLMCacheEntry.key, models.LLMCacheEntry.size_bytes
+            ).order_by(models.LLMCacheEntry.last_accessed_at.asc()):
+                if excess <= 0:
+                    break
+                stale_keys.append(key)
+                excess -= size or 0
+            db.query(models.LLMCacheEntry).filter(
+                models.LLMCacheEntry.key.in_(stale_keys)
+            ).delete(synchronize_session=False)
+        db.commit()
+
+    @staticmethod
+    def _total_bytes(query) -> int:
+        return query.with_entities(func.coalesce(
+            func.sum(models.LLMCacheEntry.size_bytes), 0)).scalar()
+
+    def _count(self, counter: str):
+        with self._counters_lock:
+            self._counters[self.namespace][counter] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process plus stored entry totals"""
+        with self._counters_lock:
+            counters = dict(self._counters[self.namespace])
+
+        db = self.session_factory()
+        try:
+            query = db.query(models.LLMCacheEntry).filter(
+                models.LLMCacheEntry.namespace == self.namespace
+            )
+            entries = query.count()
+            total_bytes = self._total_bytes(query)
+        finally:
+            db.close()
+
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "namespace": self.namespace,
+            "hits": counters["hits"],
+            "misses": counters["misses"],
+            "hit_rate": round(counters["hits"] / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "total_bytes": total_bytes,
+            "max_bytes": self.max_bytes,
+            "max_age_seconds": int(self.max_age.total_seconds())
+        }
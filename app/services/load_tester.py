@@ -0,0 +1,200 @@
+import itertools
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app import models
+from app.database import SessionLocal
+from app.services.dashboard import invalidate_dashboard_cache
+from app.services.http_pool import SessionPool
+from app.services.latency_stats import endpoint_key
+from app.services.test_executor import TestExecutor
+from app.utils.latency import LatencyHistogram
+
+# Upper bound on threads used to keep an open-loop schedule
+LOAD_MAX_WORKERS = int(os.getenv("LOAD_MAX_WORKERS", "64"))
+
+
+class LoadTester:
+    """
+    Replay a suite's test cases against base_url for a fixed duration.
+
+    With `rps`, requests are scheduled open-loop at fixed intervals no
+    matter how slowly earlier ones complete, and each latency is measured
+    from the request's scheduled start, so queueing behind a slow server
+    shows up in the percentiles instead of silently lowering the send rate
+    (coordinated omission). With `concurrency`, that many workers send
+    back-to-back (closed loop) and latency is per request.
+
+    Unless a session_pool is passed, the run gets its own, sized to its
+    workers and closed when it ends, so load never competes with
+    functional executions for the shared pool's connections.
+    """
+
+    def __init__(self, base_url: str, rps: Optional[float] = None,
+                 concurrency: Optional[int] = None,
+                 duration: float = 30.0,
+                 max_workers: Optional[int] = None,
+                 session_pool: Optional[SessionPool] = None):
+        if bool(rps) == bool(concurrency):
+            raise ValueError("Set exactly one of rps or concurrency")
+        self.rps = rps
+        self.concurrency = concurrency
+        self.duration = duration
+        self.max_workers = max_workers or LOAD_MAX_WORKERS
+        self._own_pool = None
+        if session_pool is None:
+            session_pool = self._own_pool = SessionPool(
+                pool_maxsize=concurrency or self.max_workers)
+        self.executor = TestExecutor(base_url, session_pool=session_pool)
+
+        self._lock = threading.Lock()
+        self._overall = LatencyHistogram()
+        self._endpoints: Dict[str, LatencyHistogram] = {}
+        self._errors: Counter = Counter()
+        self._sent = 0
+        self._failed = 0
+        self._max_lag = 0.0
+
+    def run(self, test_cases: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Run the load and return throughput, error and latency stats"""
+        if not test_cases:
+            raise ValueError("No test cases to replay")
+
+        started = time.perf_counter()
+        try:
+            if self.rps:
+                self._run_open_loop(test_cases, started)
+            else:
+                self._run_closed_loop(test_cases, started)
+        finally:
+            if self._own_pool is not None:
+                self._own_pool.close()
+        elapsed = time.perf_counter() - started
+
+        return self._report(elapsed)
+
+    def _run_open_loop(self, test_cases: List[Dict[str, Any]],
+                       started: float):
+        interval = 1.0 / self.rps
+        total = int(self.duration * self.rps)
+        cases = itertools.cycle(test_cases)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix="load") as pool:
+            for i in range(total):
+                scheduled = started + i * interval
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self._send, next(cases), scheduled)
+
+    def _run_closed_loop(self, test_cases: List[Dict[str, Any]],
+                         started: float):
+        deadline = started + self.duration
+        cases = itertools.cycle(test_cases)
+        cases_lock = threading.Lock()
+
+        def worker():
+            while time.perf_counter() < deadline:
+                with cases_lock:
+                    test_case = next(cases)
+                self._send(test_case, time.perf_counter())
+
+        threads = [threading.Thread(target=worker, name=f"load-{n}")
+                   for n in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _send(self, test_case: Dict[str, Any], scheduled: float):
+        lag = time.perf_counter() - scheduled
+        result = self.executor.execute_test_case(test_case)
+        latency = time.perf_counter() - scheduled
+
+        with self._lock:
+            self._sent += 1
+            self._max_lag = max(self._max_lag, lag)
+            self._overall.add(latency)
+            self._endpoints.setdefault(endpoint_key(result),
+                                       LatencyHistogram()).add(latency)
+            if result["status"] != "passed":
+                self._failed += 1
+                reason = (result["errors"] or result["assertions_failed"]
+                          or ["failed"])[0]
+                self._errors[str(reason)[:200]] += 1
+
+    def _report(self, elapsed: float) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": "rps" if self.rps else "concurrency",
+                "target_rps": self.rps,
+                "concurrency": self.concurrency,
+                "duration": self.duration,
+                "elapsed": round(elapsed, 3),
+                "requests": self._sent,
+                "failed": self._failed,
+                "throughput": round(self._sent / elapsed, 2) if elapsed
+                else 0.0,
+                "error_rate": round(self._failed / self._sent, 4)
+                if self._sent else 0.0,
+                # How far behind schedule sends started; large values mean
+                # max_workers was too small for the target rate
+                "max_schedule_lag_ms": round(self._max_lag * 1000, 3),
+                "top_errors": [{"error": error, "count": count}
+                               for error, count in
+                               self._errors.most_common(10)],
+                "latency": {
+                    "overall": self._overall.summary(),
+                    "endpoints": {
+                        key: histogram.summary()
+                        for key, histogram in sorted(self._endpoints.items())
+                    }
+                }
+            }
+
+
+def run_load_execution(execution_id: int, test_cases: List[Dict[str, Any]],
+                       base_url: str, rps: Optional[float] = None,
+                       concurrency: Optional[int] = None,
+                       duration: float = 30.0, session_factory=SessionLocal):
+    """Run a load test (on the runner pool) and record it on the execution"""
+    try:
+        report = LoadTester(base_url, rps=rps, concurrency=concurrency,
+                            duration=duration).run(test_cases)
+        error = None
+    except Exception as e:
+        print(f"Error running load execution {execution_id}: {str(e)}")
+        report, error = None, str(e)
+
+    db = session_factory()
+    try:
+        execution = db.query(models.TestExecution).filter(
+            models.TestExecution.id == execution_id
+        ).first()
+        if not execution:
+            return
+
+        if report is None:
+            execution.status = "failed"
+            execution.load_stats = {"error": error}
+        else:
+            execution.status = "completed"
+            execution.total_tests = report["requests"]
+            execution.passed_tests = report["requests"] - report["failed"]
+            execution.failed_tests = report["failed"]
+            execution.coverage_percentage = \
+                (1 - report["error_rate"]) * 100 if report["requests"] else 0
+            execution.execution_time = report["elapsed"]
+            execution.latency_stats = report.pop("latency")
+            execution.load_stats = report
+        execution.completed_at = datetime.utcnow()
+        db.commit()
+        invalidate_dashboard_cache()
+    finally:
+        db.close()
@@ -0,0 +1,256 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app import models
+from app.services import spec_cache
+from app.utils.openapi_parser import OpenAPIParser
+
+MOCK_SERVER_HOST = os.getenv("MOCK_SERVER_HOST", "127.0.0.1")
+# A mock replaced by a newer spec version keeps serving runs that still
+# target it, and stops once it has had no requests for this long
+MOCK_SERVER_DRAIN_SECONDS = float(
+    os.getenv("MOCK_SERVER_DRAIN_SECONDS", "60"))
+# Nesting depth when building example bodies from schemas
+_MAX_EXAMPLE_DEPTH = 6
+
+_STRING_FORMATS = {
+    "date": "2024-01-01",
+    "date-time": "2024-01-01T00:00:00Z",
+    "email": "user@example.com",
+    "uuid": "00000000-0000-4000-8000-000000000000",
+    "uri": "https://example.com",
+    "hostname": "example.com",
+    "ipv4": "127.0.0.1",
+}
+
+
+def example_from_schema(schema: Any, depth: int = 0) -> Any:
+    """A plausible value for a (resolved) JSON schema"""
+    if not isinstance(schema, dict) or depth > _MAX_EXAMPLE_DEPTH:
+        return None
+    for key in ("example", "default"):
+        if key in schema:
+            return schema[key]
+    if schema.get("enum"):
+        return schema["enum"][0]
+    for key in ("allOf", "oneOf", "anyOf"):
+        if schema.get(key):
+            if key != "allOf":
+                return example_from_schema(schema[key][0], depth + 1)
+            merged: Dict[str, Any] = {}
+            for part in schema[key]:
+                value = example_from_schema(part, depth + 1)
+                if isinstance(value, dict):
+                    merged.update(value)
+            return merged
+
+    schema_type = schema.get("type")
+    if isinstance(schema_type, list):
+        schema_type = next((t for t in schema_type if t != "null"), None)
+    if schema_type == "object" or "properties" in schema:
+        return {name: example_from_schema(prop, depth + 1)
+                for name, prop in (schema.get("properties") or {}).items()}
+    if schema_type == "array":
+        item = example_from_schema(schema.get("items"), depth + 1)
+        return [] if item is None else [item]
+    if schema_type == "integer":
+        return int(schema.get("minimum", 1))
+    if schema_type == "number":
+        return float(schema.get("minimum", 1.0))
+    if schema_type == "boolean":
+        return True
+    if schema_type == "string":
+        return _STRING_FORMATS.get(schema.get("format"), "string")
+    return None
+
+
+class MockResponder:
+    """
+    Canned responses for every operation in a spec, built once up front so
+    serving a request is a route lookup plus a write.
+    """
+
+    def __init__(self, parser: OpenAPIParser):
+        self.parser = parser
+        self.responses: Dict[str, Tuple[int, bytes]] = {}
+        # Exact paths skip the pattern scan in match_operation
+        self._static: Dict[Tuple[str, str], str] = {}
+        for endpoint in parser.get_endpoints():
+            key = f"{endpoint['method']} {endpoint['path']}"
+            self.responses[key] = self._build(endpoint["details"])
+            if "{" not in endpoint["path"]:
+                self._static[(endpoint["method"],
+                              endpoint["path"].rstrip("/") or "/")] = key
+
+    @property
+    def operations(self) -> List[str]:
+        return list(self.responses)
+
+    def respond(self, method: str, path: str) -> Tuple[int, bytes]:
+        path = path.split("?", 1)[0].rstrip("/") or "/"
+        key = self._static.get((method, path)) or \
+            self.parser.match_operation(method, path)
+        if key is None:
+            return 404, b'{"detail":"No mock for this operation"}'
+        return self.responses[key]
+
+    def _build(self, details: Dict[str, Any]) -> Tuple[int, bytes]:
+        responses = self.parser.resolve(details.get("responses") or {})
+        codes = sorted(code for code in responses
+                       if str(code).isdigit() and str(code).startswith("2"))
+        if codes:
+            status, response = int(codes[0]), responses[codes[0]]
+        else:
+            status, response = 200, responses.get("default") or {}
+
+        if status == 204:
+            return status, b""
+        media = (response.get("content") or {}).get("application/json") or {}
+        if "example" in media:
+            body = media["example"]
+        elif media.get("examples"):
+            first = next(iter(media["examples"].values()))
+            body = first.get("value") if isinstance(first, dict) else first
+        else:
+            body = example_from_schema(media.get("schema"))
+        return status, json.dumps(body if body is not None else {}).encode()
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so clients reuse connections like against real servers
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without TCP_NODELAY the
+    # body waits on the client's delayed ACK (~40ms per request)
+    disable_nagle_algorithm = True
+
+    def _serve(self):
+        self.server.last_request_at = time.monotonic()
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        status, body = self.server.responder.respond(self.command, self.path)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+        self.server.last_request_at = time.monotonic()
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = \
+        do_OPTIONS = _serve
+
+    def log_message(self, *args):
+        pass
+
+
+class MockServer:
+    """A mock of one spec, served from a daemon thread on a local port"""
+
+    def __init__(self, parser: OpenAPIParser, host: str = MOCK_SERVER_HOST,
+                 port: int = 0):
+        self.responder = MockResponder(parser)
+        self._httpd = ThreadingHTTPServer((host, port), _MockHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.responder = self.responder
+        self._httpd.last_request_at = time.monotonic()
+        self._thread = threading.Thread(target=self._httpd.serve_forever,
+                                        name="mock-server", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def idle_seconds(self) -> float:
+        """Time since the last request started or finished (or startup)"""
+        return time.monotonic() - self._httpd.last_request_at
+
+    def start(self) -> "MockServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class MockServerRegistry:
+    """
+    Running mock servers, one per spec version. A server replaced by a
+    newer version is retired rather than stopped: executions already
+    pointed at it finish against it, and it stops after drain_seconds
+    without requests.
+    """
+
+    def __init__(self, drain_seconds: Optional[float] = None):
+        self.drain_seconds = MOCK_SERVER_DRAIN_SECONDS \
+            if drain_seconds is None else drain_seconds
+        self._servers: Dict[int, Tuple[Any, MockServer]] = {}
+        self._retired: Set[MockServer] = set()
+        self._lock = threading.Lock()
+
+    def ensure(self, spec_id: int, version: Any,
+               parser: OpenAPIParser) -> MockServer:
+        """Running mock for this spec version, replacing an outdated one"""
+        with self._lock:
+            running = self._servers.get(spec_id)
+            if running and running[0] == version:
+                return running[1]
+            server = MockServer(parser).start()
+            self._servers[spec_id] = (version, server)
+            if running:
+                self._retired.add(running[1])
+
+        if running:
+            threading.Thread(target=self._drain, args=(running[1],),
+                             name="mock-server-drain", daemon=True).start()
+        return server
+
+    def _drain(self, server: MockServer):
+        """Stop a retired server once it has gone quiet"""
+        while True:
+            idle = server.idle_seconds
+            if idle >= self.drain_seconds:
+                break
+            time.sleep(self.drain_seconds - idle)
+        with self._lock:
+            if server not in self._retired:  # stopped by stop_all
+                return
+            self._retired.discard(server)
+        server.stop()
+
+    def list(self) -> Dict[int, MockServer]:
+        with self._lock:
+            return {spec_id: server
+                    for spec_id, (_, server) in self._servers.items()}
+
+    def stop(self, spec_id: int) -> bool:
+        with self._lock:
+            running = self._servers.pop(spec_id, None)
+        if running:
+            running[1].stop()
+        return running is not None
+
+    def stop_all(self):
+        for spec_id in list(self.list()):
+            self.stop(spec_id)
+        with self._lock:
+            retired = list(self._retired)
+            self._retired.clear()
+        for server in retired:
+            server.stop()
+
+
+mock_servers = MockServerRegistry()
+
+
+def mock_for_spec(api_spec: models.APISpec) -> MockServer:
+    """Start (or reuse) the mock server for the current version of a spec"""
+    return mock_servers.ensure(api_spec.id, api_spec.updated_at,
+                               spec_cache.get_parser(api_spec))
@@ -0,0 +1,190 @@
+import json
+import os
+from typing import Any, Dict, Optional, Set
+
+from app.services.failure_analysis import estimate_tokens
+from app.utils.openapi_parser import OpenAPIParser, operation_key
+
+# Keys that never help the model write a test case
+_PRUNED_KEYS = {"externalDocs", "xml", "deprecated", "operationId", "tags",
+                "servers", "links", "callbacks"}
+# Dropped first when an endpoint is over budget
+_VERBOSE_KEYS = {"description", "example", "examples", "title"}
+# Maps whose keys are names (properties, status codes), never filtered
+_NAMED_MAPS = {"properties", "responses", "content", "headers"}
+# Schema nesting kept at each successive degradation step
+_DEPTH_STEPS = (6, 4, 3, 2, 1)
+# Repeated schemas shorter than this (in characters) are left inline
+_MIN_SHARED_SCHEMA = 40
+
+
+def compact_json(value: Any) -> str:
+    """JSON without pretty-printing whitespace"""
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+class PromptBuilder:
+    """
+    Build the endpoint slice of a spec that goes into a generation prompt.
+
+    `$ref`s are resolved against the spec's components through the
+    parser (each reference is resolved once and reused; a reference back
+    into itself is replaced by a stub), vendor extensions and
+    documentation-only fields are pruned, and the result is condensed:
+    JSON-only `content` maps become a plain `schema`, leaf schemas become
+    type strings ("integer", "string:email") and plain arrays a one-item
+    list of their item schema, `"type": "object"` is dropped where
+    `properties` implies it, and a schema repeated later in the slice (a
+    request body echoed by its response, one error shape for every
+    status) is written out once. Finally it is shrunk until it fits the
+    per-endpoint token budget.
+    """
+
+    def __init__(self, spec: Optional[Dict[str, Any]] = None,
+                 token_budget: Optional[int] = None,
+                 parser: Optional[OpenAPIParser] = None):
+        # Reusing a cached parser reuses its resolved refs too
+        self.parser = parser or OpenAPIParser(spec or {})
+        self.token_budget = token_budget or int(
+            os.getenv("OLLAMA_PROMPT_TOKEN_BUDGET", "1500"))
+        # Operations whose spec had to be degraded to fit the budget
+        self.trimmed: Set[str] = set()
+
+    def endpoint_spec(self, endpoint: Dict[str, Any]) -> Dict[str, Any]:
+        """Resolved, pruned and budgeted spec for one parsed endpoint"""
+        details = endpoint["details"]
+        spec = self._prune({
+            "path": endpoint["path"],
+            "method": endpoint["method"],
+            "summary": details.get("summary"),
+            "description": details.get("description"),
+            "parameters": self.resolve(details.get("parameters", [])),
+            "requestBody": self.resolve(details.get("requestBody", {})),
+            "responses": self.resolve(details.get("responses", {})),
+            "security": details.get("security", [])
+        })
+        condensed = self._condense(spec)
+        if self._tokens(condensed) <= self.token_budget:
+            return condensed
+        self.trimmed.add(operation_key(endpoint["method"], endpoint["path"]))
+        return self._fit(spec)
+
+    def resolve(self, node: Any) -> Any:
+        return self.parser.resolve(node)
+
+    def _fit(self, spec: Dict[str, Any]) -> Dict[str, Any]:
+        """Degrade detail step by step until the spec fits the budget"""
+        # The operation's own summary/description are kept
+        spec = {key: value if key in ("summary", "description")
+                else self._strip(value, _VERBOSE_KEYS)
+                for key, value in spec.items()}
+        for depth in _DEPTH_STEPS:
+            condensed = self._condense(spec)
+            if self._tokens(condensed) <= self.token_budget:
+                return condensed
+            spec = {key: self._truncate(value, depth)
+                    for key, value in spec.items()}
+
+        # Last resort: only the success and client-error responses
+        condensed = self._condense(spec)
+        if self._tokens(condensed) > self.token_budget:
+            spec["responses"] = self._key_responses(spec.get("responses", {}))
+            condensed = self._condense(spec)
+        return condensed
+
+    @classmethod
+    def _condense(cls, spec: Dict[str, Any]) -> Dict[str, Any]:
+        """Same information in fewer tokens (see the class docstring)"""
+        spec = cls._shorthand(spec)
+        seen: Dict[str, str] = {}
+
+        def body(node: Any, label: str) -> Any:
+            if not isinstance(node, dict):
+                return node
+            content = node.get("content")
+            if isinstance(content, dict) and list(content) == \
+                    ["application/json"] and \
+                    isinstance(content["application/json"], dict):
+                node = {**{k: v for k, v in node.items() if k != "content"},
+                        **content["application/json"]}
+            schema = node.get("schema")
+            if schema is not None:
+                text = compact_json(schema)
+                if text in seen:
+                    node = {**node, "schema": f"same as {seen[text]}"}
+                elif len(text) >= _MIN_SHARED_SCHEMA:
+                    seen[text] = label
+            return node
+
+        if "requestBody" in spec:
+            spec["requestBody"] = body(spec["requestBody"], "requestBody")
+        if isinstance(spec.get("responses"), dict):
+            spec["responses"] = {
+                code: body(response, f"response {code}")
+                for code, response in spec["responses"].items()}
+        return spec
+
+    @classmethod
+    def _shorthand(cls, node: Any, named: bool = False) -> Any:
+        """Terse schemas: bare type strings for leaves, implied objects"""
+        if isinstance(node, list):
+            return [cls._shorthand(item) for item in node]
+        if not isinstance(node, dict):
+            return node
+        if not named and isinstance(node.get("type"), str) and \
+                set(node) <= {"type", "format"}:
+            return f"{node['type']}:{node['format']}" \
+                if "format" in node else node["type"]
+        if not named and node.get("type") == "array" and \
+                set(node) == {"type", "items"}:
+            return [cls._shorthand(node["items"])]
+        implied = not named and node.get("type") == "object" and \
+            bool(node.get("properties"))
+        return {key: cls._shorthand(value, key in _NAMED_MAPS and not named)
+                for key, value in node.items()
+                if not (implied and key == "type")}
+
+    def _tokens(self, spec: Dict[str, Any]) -> int:
+        return estimate_tokens(compact_json(spec))
+
+    @classmethod
+    def _prune(cls, node: Any, named: bool = False) -> Any:
+        if isinstance(node, list):
+            return [cls._prune(item) for item in node]
+        if not isinstance(node, dict):
+            return node
+        return {key: cls._prune(value, key in _NAMED_MAPS and not named)
+                for key, value in node.items()
+                if named or (key not in _PRUNED_KEYS
+                             and not key.startswith("x-")
+                             and value not in (None, "", [], {}))}
+
+    @classmethod
+    def _strip(cls, node: Any, keys: set, named: bool = False) -> Any:
+        """Drop `keys` everywhere except as names inside named maps"""
+        if isinstance(node, list):
+            return [cls._strip(item, keys) for item in node]
+        if not isinstance(node, dict):
+            return node
+        return {key: cls._strip(value, keys, key in _NAMED_MAPS and not named)
+                for key, value in node.items()
+                if named or key not in keys}
+
+    @classmethod
+    def _truncate(cls, node: Any, depth: int) -> Any:
+        """Collapse anything nested deeper than `depth` to its type"""
+        if isinstance(node, list):
+            return [cls._truncate(item, depth) for item in node]
+        if not isinstance(node, dict):
+            return node
+        if depth <= 0:
+            return {"type": node["type"]} if "type" in node else {}
+        return {key: cls._truncate(value, depth - 1)
+                for key, value in node.items()}
+
+    @staticmethod
+    def _key_responses(responses: Dict[str, Any]) -> Dict[str, Any]:
+        kept = {code: value for code, value in responses.items()
+                if str(code).startswith(("2", "4"))}
+        return dict(list(kept.items())[:3])
+
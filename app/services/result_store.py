@@ -0,0 +1,135 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models
+
+# Columns TestResult.as_result needs
+_RESULT_COLUMNS = (models.TestResult.name, models.TestResult.method,
+                   models.TestResult.endpoint, models.TestResult.status,
+                   models.TestResult.latency, models.TestResult.actual_status,
+                   models.TestResult.expected_status,
+                   models.TestResult.details)
+
+
+def save_results(db: Session, execution_id: int,
+                 results: List[Dict[str, Any]], start_position: int = 0,
+                 positions: Optional[List[int]] = None,
+                 sequences: Optional[List[int]] = None):
+    """
+    Add per-test result rows for an execution (caller commits). Positions
+    run on from start_position unless given explicitly, one per result;
+    sequences, if given, are the results' completion order.
+    """
+    if positions is None:
+        positions = range(start_position, start_position + len(results))
+    if sequences is None:
+        sequences = [None] * len(results)
+    db.add_all([
+        models.TestResult.from_result(execution_id, position, r, sequence)
+        for position, r, sequence in zip(positions, results, sequences)
+    ])
+
+
+def load_results(db: Session, execution: models.TestExecution) -> \
+        List[Dict[str, Any]]:
+    """
+    All of an execution's results in suite order. Selects the columns
+    rather than TestResult objects, which cost more than the query itself
+    for executions with thousands of results.
+    """
+    rows = db.execute(
+        select(*_RESULT_COLUMNS)
+        .where(models.TestResult.execution_id == execution.id)
+        .order_by(models.TestResult.position)
+    ).all()
+    if not rows:
+        return execution.legacy_results or []
+    return [models.TestResult.as_result(row) for row in rows]
+
+
+def load_result_events(db: Session, execution: models.TestExecution) -> \
+        List[Tuple[int, Dict[str, Any]]]:
+    """
+    An execution's results as (event id, "result" event data), in the
+    order and with the ids a live stream sent them: completion order where
+    it was recorded, suite order otherwise (sharded and older executions,
+    which never had a live stream).
+    """
+    rows = db.execute(
+        select(models.TestResult.sequence, models.TestResult.position,
+               *_RESULT_COLUMNS)
+        .where(models.TestResult.execution_id == execution.id)
+        .order_by(models.TestResult.sequence, models.TestResult.position)
+    ).all()
+    if rows and all(row.sequence is not None for row in rows):
+        return [(row.sequence, {"index": row.position,
+                                **models.TestResult.as_result(row)})
+                for row in rows]
+    return [(index, {"index": index, **result})
+            for index, result in enumerate(load_results(db, execution))]
+
+
+def query_results(db: Session, execution: models.TestExecution,
+                  status: Optional[str] = None,
+                  endpoint: Optional[str] = None,
+                  method: Optional[str] = None,
+                  order: str = "position",
+                  limit: int = 100,
+                  offset: int = 0) -> Dict[str, Any]:
+    """
+    Filter and page an execution's results in SQL.
+    Executions stored before test_results existed are filtered in Python.
+    """
+    query = db.query(models.TestResult).filter(
+        models.TestResult.execution_id == execution.id
+    )
+    if status:
+        query = query.filter(models.TestResult.status == status)
+    if endpoint:
+        query = query.filter(models.TestResult.endpoint == endpoint)
+    if method:
+        query = query.filter(models.TestResult.method == method.upper())
+
+    total = query.count()
+    if total == 0 and execution.legacy_results:
+        return _query_legacy_results(execution.legacy_results, status,
+                                     endpoint, method, order, limit, offset)
+
+    if order == "slowest":
+        query = query.order_by(models.TestResult.latency.desc())
+    elif order == "fastest":
+        query = query.order_by(models.TestResult.latency.asc())
+    else:
+        query = query.order_by(models.TestResult.position.asc())
+
+    rows = query.offset(offset).limit(limit).all()
+    return {
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "items": [row.to_dict() for row in rows]
+    }
+
+
+def _query_legacy_results(results: List[Dict[str, Any]],
+                          status: Optional[str], endpoint: Optional[str],
+                          method: Optional[str], order: str, limit: int,
+                          offset: int) -> Dict[str, Any]:
+    items = [
+        r for r in results
+        if (not status or r.get("status") == status)
+        and (not endpoint or r.get("endpoint") == endpoint)
+        and (not method or str(r.get("method", "")).upper() == method.upper())
+    ]
+    if order in ("slowest", "fastest"):
+        items.sort(key=lambda r: r.get("execution_time") or 0,
+                   reverse=order == "slowest")
+
+    return {
+        "total": len(items),
+        "limit": limit,
+        "offset": offset,
+        "items": items[offset:offset + limit]
+    }
@@ -0,0 +1,56 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Tuple
+
+from app import models
+from app.utils.openapi_parser import OpenAPIParser
+
+# Parsed specs kept in memory, least recently used evicted first
+SPEC_CACHE_SIZE = int(os.getenv("SPEC_CACHE_SIZE", "16"))
+
+_parsers: "OrderedDict[Tuple, OpenAPIParser]" = OrderedDict()
+_lock = threading.Lock()
+# One lock per spec version so concurrent callers wait for a single parse
+_parse_locks: Dict[Hashable, threading.Lock] = {}
+
+
+def _key(api_spec: models.APISpec) -> Tuple:
+    return (api_spec.id, api_spec.updated_at)
+
+
+def get_parser(api_spec: models.APISpec) -> OpenAPIParser:
+    """Parsed, indexed spec for this version of api_spec"""
+    key = _key(api_spec)
+    with _lock:
+        parser = _parsers.get(key)
+        if parser is not None:
+            _parsers.move_to_end(key)
+            return parser
+        parse_lock = _parse_locks.setdefault(key, threading.Lock())
+
+    try:
+        with parse_lock:
+            with _lock:
+                parser = _parsers.get(key)
+            if parser is None:
+                parser = OpenAPIParser.from_content(api_spec.spec_content)
+                remember(api_spec, parser)
+            return parser
+    finally:
+        with _lock:
+            _parse_locks.pop(key, None)
+
+
+def remember(api_spec: models.APISpec, parser: OpenAPIParser):
+    """Store an already-parsed version, e.g. right after an update"""
+    with _lock:
+        _parsers[_key(api_spec)] = parser
+        _parsers.move_to_end(_key(api_spec))
+        while len(_parsers) > SPEC_CACHE_SIZE:
+            _parsers.popitem(last=False)
+
+
+def clear():
+    with _lock:
+        _parsers.clear()
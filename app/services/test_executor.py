@@ -1,27 +1,56 @@
 import requests
+import threading
 import time
-from typing import List, Dict, Any
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Any, Optional, Callable
 from datetime import datetime
+from urllib.parse import urlsplit
+from app.services.http_pool import SessionPool, default_pool
+from app.services.execution_plan import ExecutionPlan, RunVariables
 
 
 class TestExecutor:
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, concurrency: int = 1,
+                 max_per_host: Optional[int] = None,
+                 session_pool: Optional[SessionPool] = None):
         self.base_url = base_url.rstrip('/')
+        self.session = (session_pool or default_pool).get_session(
+            self.base_url)
+        self.concurrency = max(1, concurrency)
+        # Cap on in-flight requests to a single host, independent of the
+        # worker count (None means the worker count is the only limit)
+        self.max_per_host = max_per_host
+        self._host_limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_limits_lock = threading.Lock()
 
-    def execute_test_case(self, test_case: Dict[str, Any]) -> Dict[str, Any]:
+    def execute_test_case(self, test_case: Dict[str, Any],
+                          on_response: Optional[Callable] = None) -> \
+            Dict[str, Any]:
         """
         Execute a single test case
+
+        on_response(response, result) is called once the body is read, so
+        callers can capture values from it.
+
+        Timings use the monotonic perf counter and are split into phases:
+        queue (waiting for a per-host slot), headers (connect, send and
+        server time up to the response headers) and body (download).
         """
-        start_time = time.time()
+        start_time = time.perf_counter()
+        timings = {"queue": None, "headers": None, "body": None}
         result = {
             "name": test_case.get("name", "Unnamed Test"),
+            "method": str(test_case.get("method") or "GET").upper(),
+            "endpoint": test_case.get("endpoint", ""),
             "status": "passed",
             "execution_time": 0,
             "actual_status": None,
             "expected_status": test_case.get("expected_status"),
             "errors": [],
             "assertions_passed": [],
-            "assertions_failed": []
+            "assertions_failed": [],
+            "timings": timings
         }
 
         try:
@@ -47,15 +76,27 @@ class TestExecutor:
             headers = test_case.get("headers", {})
             body = test_case.get("body")
 
-            # Execute request
-            response = requests.request(
-                method=method,
-                url=url,
-                headers=headers,
-                json=body,
-                timeout=30
-            )
+            # Execute request; stream=True returns once the headers are
+            # in, so the body download can be timed separately
+            queued_at = time.perf_counter()
+            with self._host_slot(url):
+                sent_at = time.perf_counter()
+                timings["queue"] = sent_at - queued_at
+                response = self.session.request(
+                    method=method,
+                    url=url,
+                    headers=headers,
+                    json=body,
+                    timeout=30,
+                    stream=True
+                )
+                headers_at = time.perf_counter()
+                timings["headers"] = headers_at - sent_at
+                response.content  # read the body, releasing the connection
+                timings["body"] = time.perf_counter() - headers_at
 
+            if on_response:
+                on_response(response, result)
             result["actual_status"] = response.status_code
 
             # Check status code
@@ -97,9 +138,21 @@ class TestExecutor:
             result["status"] = "failed"
             result["errors"].append(f"Unexpected error: {str(e)}")
 
-        result["execution_time"] = time.time() - start_time
+        result["execution_time"] = time.perf_counter() - start_time
         return result
 
+    def _host_slot(self, url: str):
+        """Return the semaphore limiting concurrent requests to url's host"""
+        if not self.max_per_host:
+            return nullcontext()
+
+        host = urlsplit(url).netloc
+        with self._host_limits_lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(
+                    self.max_per_host)
+            return self._host_limits[host]
+
     def _validate_response(self, actual: Any, expected: Any,
                            result: Dict[str, Any]):
         """Recursively validate response structure - be lenient"""
@@ -137,26 +190,68 @@ class TestExecutor:
         else:
             result["assertions_passed"].append(f"{assertion} (skipped)")
 
-    def execute_test_suite(self, test_cases: List[Dict[str, Any]]) -> Dict[
+    def execute_test_suite(self, test_cases: List[Dict[str, Any]],
+                           on_result: Optional[Callable] = None) -> Dict[
         str, Any]:
         """
         Execute a full test suite
+
+        Cases run in dependency order (see ExecutionPlan): with concurrency
+        each case starts as soon as the cases it depends on are done, so
+        independent chains run side by side while every chain stays
+        ordered. Values captured from responses fill {{variables}} in later
+        requests.
+
+        on_result(index, result) is called as each test finishes, from the
+        worker thread that ran it, so callers can stream results live.
         """
-        start_time = time.time()
-        results = []
+        start_time = time.perf_counter()
         passed = 0
         failed = 0
+        plan = ExecutionPlan(test_cases)
+        variables = RunVariables(plan.captured)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(test_cases)
+
+        def run(index):
+            test_case = test_cases[index]
+            prepared, missing = variables.prepare(test_case)
+            if missing:
+                result = self._unresolved(prepared, missing)
+            else:
+                result = self.execute_test_case(
+                    prepared,
+                    on_response=lambda response, res: variables.capture(
+                        test_case, response, res))
+            if on_result:
+                on_result(index, result)
+            return result
 
-        for test_case in test_cases:
-            result = self.execute_test_case(test_case)
-            results.append(result)
+        if self.concurrency > 1 and len(test_cases) > 1:
+            waiting = [len(d) for d in plan.depends_on]
+            with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                running = {pool.submit(run, index): index
+                           for index in plan.order if not waiting[index]}
+                while running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        index = running.pop(future)
+                        results[index] = future.result()
+                        for dependent in sorted(plan.dependents[index]):
+                            waiting[dependent] -= 1
+                            if not waiting[dependent]:
+                                running[pool.submit(run, dependent)] = \
+                                    dependent
+        else:
+            for index in plan.order:
+                results[index] = run(index)
 
+        for result in results:
             if result["status"] == "passed":
                 passed += 1
             else:
                 failed += 1
 
-        total_time = time.time() - start_time
+        total_time = time.perf_counter() - start_time
         total_tests = len(test_cases)
 
         return {
@@ -168,3 +263,20 @@ class TestExecutor:
             "execution_time": total_time,
             "results": results
         }
+
+    @staticmethod
+    def _unresolved(test_case: Dict[str, Any], missing) -> Dict[str, Any]:
+        """Failed result for a case whose variables were never captured"""
+        return {
+            "name": test_case.get("name", "Unnamed Test"),
+            "method": str(test_case.get("method") or "GET").upper(),
+            "endpoint": test_case.get("endpoint", ""),
+            "status": "failed",
+            "execution_time": 0,
+            "actual_status": None,
+            "expected_status": test_case.get("expected_status"),
+            "errors": [f"Unresolved variables: {', '.join(sorted(missing))}"],
+            "assertions_passed": [],
+            "assertions_failed": [],
+            "timings": {"queue": None, "headers": None, "body": None}
+        }
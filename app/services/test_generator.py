@@ -1,54 +1,342 @@
-from typing import List, Dict, Any
-import json
-from app.utils.openapi_parser import OpenAPIParser
-from app.services.ai_service import AIService
+from typing import List, Dict, Any, Optional, Callable, Set, Union
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+import time
+from app.utils.openapi_parser import OpenAPIParser, operation_key
+from app.services.ai_service import AIService, GENERATION_PROMPT_VERSION
+from app.services.llm_cache import LLMCache
+from app.services.failure_analysis import estimate_tokens
+from app.services.generation_metrics import run_metrics
+from app.services.prompt_builder import PromptBuilder, compact_json
 
 
 class TestGenerator:
-    def __init__(self):
+    def __init__(self, max_workers: Optional[int] = None,
+                 cache: Optional[LLMCache] = None):
         self.ai_service = AIService()
+        self.cache = cache
+        # Number of endpoints prompted at once; size to what the Ollama
+        # host can serve in parallel (OLLAMA_NUM_PARALLEL on the server)
+        self.max_workers = max_workers or int(
+            os.getenv("OLLAMA_MAX_CONCURRENCY", "2"))
+        # Endpoints that failed during the last run
+        self.failures: List[Dict[str, Any]] = []
+        # "per_endpoint" prompts each endpoint alone; "batched" groups
+        # small endpoints into shared calls to save per-call overhead
+        self.mode = os.getenv("GENERATION_MODE", "per_endpoint")
+        self.batch_token_budget = int(
+            os.getenv("GENERATION_BATCH_TOKEN_BUDGET", "1200"))
+        self.batch_max_endpoint_tokens = int(
+            os.getenv("GENERATION_BATCH_MAX_ENDPOINT_TOKENS", "300"))
+        self.batch_max_size = int(os.getenv("GENERATION_BATCH_MAX_SIZE", "6"))
+        # Call count and timing of the last run
+        self.last_run: Dict[str, Any] = {}
+        self._llm_calls = 0
+        self._calls_lock = threading.Lock()
 
     def generate_tests_for_spec(self, spec_content: str,
-                                include_edge_cases: bool = True) -> List[
-        Dict[str, Any]]:
+                                include_edge_cases: bool = True,
+                                bypass_cache: bool = False,
+                                progress_callback: Optional[Callable] = None
+                                ) -> List[Dict[str, Any]]:
         """
         Generate test cases for all endpoints in an OpenAPI spec
         """
         try:
-            spec = json.loads(spec_content)
-            parser = OpenAPIParser(spec)
+            parser = OpenAPIParser.from_content(spec_content)
             endpoints = parser.get_endpoints()
 
-            all_test_cases = []
+            return self.generate_tests_for_endpoints(endpoints,
+                                                     include_edge_cases,
+                                                     bypass_cache,
+                                                     progress_callback,
+                                                     parser=parser)
 
-            for endpoint in endpoints:
-                path = endpoint["path"]
-                method = endpoint["method"]
-                details = endpoint["details"]
+        except Exception as e:
+            print(f"Error generating tests: {str(e)}")
+            return []
+
+    def generate_tests_for_endpoints(self, endpoints: List[Dict[str, Any]],
+                                     include_edge_cases: bool = True,
+                                     bypass_cache: bool = False,
+                                     progress_callback: Optional[
+                                         Callable] = None,
+                                     parser: Optional[OpenAPIParser] = None,
+                                     mode: Optional[str] = None
+                                     ) -> List[Dict[str, Any]]:
+        """
+        Generate test cases for the given endpoints over a bounded pool.
+        Results are returned in endpoint order; failures are recorded in
+        self.failures rather than silently dropped. With bypass_cache the
+        cache is not read, but fresh output still replaces the cached entry.
+        progress_callback(endpoint, error) is called as each endpoint
+        finishes, from the worker thread unless it was a cache hit. `parser`
+        holds the spec the endpoints came from, used to resolve their
+        `$ref`s.
+
+        In "batched" mode small endpoints share LLM calls (see
+        plan_batches); large ones are still prompted alone.
+        """
+        mode = mode or self.mode
+        self.failures = []
+        if not endpoints:
+            return []
+
+        started = time.perf_counter()
+        self._llm_calls = 0
+        builder = PromptBuilder(parser=parser)
+        prepared = [self._prepare(endpoint, include_edge_cases, builder)
+                    for endpoint in endpoints]
+        outcomes: Dict[int, Any] = {}
+
+        def finish(index, outcome):
+            outcomes[index] = outcome
+            if progress_callback:
+                progress_callback(endpoints[index], outcome[1])
+
+        pending = []
+        for index, item in enumerate(prepared):
+            cached = None
+            if item["cache_key"] is not None and not bypass_cache:
+                cached = self.cache.get(item["cache_key"])
+            if cached:
+                # Entries cached before cases were tagged come back bare
+                finish(index, (self._tag(item, cached), None))
+            else:
+                pending.append(index)
+
+        if mode == "batched":
+            units = self.plan_batches(
+                pending, [item["spec"] for item in prepared],
+                alone={index for index, item in enumerate(prepared)
+                       if item["trimmed"]})
+        else:
+            units = [[index] for index in pending]
 
-                # Get endpoint-specific spec
-                endpoint_spec = {
-                    "path": path,
-                    "method": method,
-                    "parameters": details.get("parameters", []),
-                    "requestBody": details.get("requestBody", {}),
-                    "responses": details.get("responses", {}),
-                    "security": details.get("security", []),
-                    "description": details.get("description", "")
-                }
+        def run(unit):
+            if len(unit) == 1:
+                finish(unit[0], self._generate_for_endpoint(
+                    prepared[unit[0]], include_edge_cases))
+            else:
+                for index, outcome in self._generate_batch(
+                        [prepared[i] for i in unit], unit,
+                        include_edge_cases):
+                    finish(index, outcome)
+
+        if units:
+            workers = min(self.max_workers, len(units))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(run, units))
+
+        all_test_cases = []
+        for index, endpoint in enumerate(endpoints):
+            test_cases, error = outcomes[index]
+            if error:
+                self.failures.append({
+                    "path": endpoint["path"],
+                    "method": endpoint["method"],
+                    "error": error
+                })
+            all_test_cases.extend(test_cases)
+
+        self.last_run = {
+            "mode": mode,
+            "endpoints": len(endpoints),
+            "cache_hits": len(endpoints) - len(pending),
+            "batches": sum(1 for unit in units if len(unit) > 1),
+            "llm_calls": self._llm_calls,
+            "wall_time": round(time.perf_counter() - started, 4)
+        }
+        run_metrics.record(**self.last_run)
+        return all_test_cases
+
+    def plan_batches(self, indexes: List[int],
+                     endpoint_specs: List[Dict[str, Any]],
+                     alone: Optional[Set[int]] = None) -> List[List[int]]:
+        """
+        Group endpoints (by index, order kept) into LLM calls: consecutive
+        small endpoints share a batch while it stays under the batch token
+        budget and size limit; larger endpoints, and those in `alone`
+        (specs trimmed to fit the prompt budget), get a call of their own.
+        """
+        units: List[List[int]] = []
+        batch: List[int] = []
+        batch_tokens = 0
+
+        for index in indexes:
+            tokens = estimate_tokens(compact_json(endpoint_specs[index]))
+            if tokens > self.batch_max_endpoint_tokens or \
+                    index in (alone or ()):
+                units.append([index])
+                continue
+            if batch and (batch_tokens + tokens > self.batch_token_budget
+                          or len(batch) >= self.batch_max_size):
+                units.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(index)
+            batch_tokens += tokens
+
+        if batch:
+            units.append(batch)
+        return units
+
+    def generate_incremental(self, old_spec: Union[str, OpenAPIParser],
+                             new_spec: Union[str, OpenAPIParser],
+                             previous_tests: List[Dict[str, Any]],
+                             include_edge_cases: bool = True,
+                             bypass_cache: bool = False,
+                             progress_callback: Optional[Callable] = None):
+        """
+        Regenerate only operations that were added or changed between two
+        versions of a spec, reusing previous cases for the rest.
+        Either version may be spec text or an already-parsed spec.
+        progress_callback is called for regenerated endpoints only, as in
+        generate_tests_for_endpoints.
+        Returns (test_cases, diff); cases come back in new-spec order.
+        """
+        old_parser = old_spec if isinstance(old_spec, OpenAPIParser) \
+            else OpenAPIParser.from_content(old_spec)
+        new_parser = new_spec if isinstance(new_spec, OpenAPIParser) \
+            else OpenAPIParser.from_content(new_spec)
+        diff = old_parser.diff(new_parser)
+        endpoints = new_parser.get_endpoints()
 
-                # Generate tests using AI
-                test_cases = self.ai_service.generate_test_cases(
-                    endpoint_spec,
-                    path,
-                    method,
-                    include_edge_cases
-                )
+        previous_by_op: Dict[str, List[Dict[str, Any]]] = {}
+        for case in previous_tests or []:
+            key = case.get("operation") or old_parser.match_operation(
+                case.get("method", "GET"), case.get("endpoint", ""))
+            if key:
+                previous_by_op.setdefault(key, []).append(case)
 
-                all_test_cases.extend(test_cases)
+        # Unchanged operations without previous cases (e.g. they failed
+        # last time) are regenerated too
+        unchanged = set(diff["unchanged"])
+        to_generate = [
+            e for e in endpoints
+            if operation_key(e["method"], e["path"]) not in unchanged
+            or operation_key(e["method"], e["path"]) not in previous_by_op
+        ]
+        generated = self.generate_tests_for_endpoints(
+            to_generate, include_edge_cases, bypass_cache,
+            progress_callback=progress_callback, parser=new_parser)
 
-            return all_test_cases
+        generated_by_op: Dict[str, List[Dict[str, Any]]] = {}
+        for case in generated:
+            generated_by_op.setdefault(case.get("operation"), []).append(case)
+        regenerated = {operation_key(e["method"], e["path"])
+                       for e in to_generate}
 
+        test_cases = []
+        for e in endpoints:
+            key = operation_key(e["method"], e["path"])
+            if key in regenerated:
+                test_cases.extend(generated_by_op.get(key, []))
+            else:
+                test_cases.extend(previous_by_op[key])
+
+        diff["regenerated"] = [operation_key(e["method"], e["path"])
+                               for e in to_generate]
+        return test_cases, diff
+
+    def _prepare(self, endpoint: Dict[str, Any], include_edge_cases: bool,
+                 builder: PromptBuilder) -> Dict[str, Any]:
+        """Prompt-ready spec and cache key for one endpoint"""
+        path = endpoint["path"]
+        method = endpoint["method"]
+
+        # Endpoint-specific spec with refs resolved, trimmed to the budget
+        endpoint_spec = builder.endpoint_spec(endpoint)
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = LLMCache.make_key(
+                endpoint_spec=endpoint_spec,
+                method=method,
+                path=path,
+                model=self.ai_service.model,
+                prompt_version=GENERATION_PROMPT_VERSION,
+                include_edge_cases=include_edge_cases
+            )
+        return {"endpoint": endpoint, "spec": endpoint_spec,
+                "cache_key": cache_key,
+                "trimmed": operation_key(method, path) in builder.trimmed}
+
+    def _generate_for_endpoint(self, prepared: Dict[str, Any],
+                               include_edge_cases: bool):
+        """Generate tests for one endpoint, returning (test_cases, error)"""
+        path = prepared["endpoint"]["path"]
+        method = prepared["endpoint"]["method"]
+        self._count_call()
+
+        try:
+            # Generate tests using AI
+            test_cases = self.ai_service.generate_test_cases(
+                prepared["spec"],
+                path,
+                method,
+                include_edge_cases=include_edge_cases,
+                raise_errors=True
+            )
         except Exception as e:
-            print(f"Error generating tests: {str(e)}")
-            return []
+            return [], f"{type(e).__name__}: {str(e)}"
+
+        return self._store(prepared, test_cases)
+
+    def _generate_batch(self, batch: List[Dict[str, Any]],
+                        indexes: List[int], include_edge_cases: bool):
+        """
+        Generate tests for several endpoints in one call, yielding
+        (index, (test_cases, error)). Endpoints the batch produced nothing
+        for are retried on their own.
+        """
+        self._count_call()
+        try:
+            by_operation = self.ai_service.generate_test_cases_batch(
+                [item["spec"] for item in batch],
+                include_edge_cases=include_edge_cases
+            )
+        except Exception as e:
+            print(f"Batch generation failed, retrying individually: "
+                  f"{str(e)}")
+            by_operation = {}
+
+        for index, item in zip(indexes, batch):
+            endpoint = item["endpoint"]
+            test_cases = by_operation.get(
+                operation_key(endpoint["method"], endpoint["path"]))
+            if test_cases:
+                yield index, self._store(item, test_cases)
+            else:
+                yield index, self._generate_for_endpoint(item,
+                                                         include_edge_cases)
+
+    def _count_call(self):
+        with self._calls_lock:
+            self._llm_calls += 1
+
+    def _store(self, prepared: Dict[str, Any],
+               test_cases: List[Dict[str, Any]]):
+        """Tag and cache an endpoint's cases, returning (test_cases, error)"""
+        if not test_cases:
+            return [], "No test cases produced"
+
+        self._tag(prepared, test_cases)
+        if prepared["cache_key"] is not None:
+            self.cache.set(prepared["cache_key"], test_cases)
+        return test_cases, None
+
+    @staticmethod
+    def _tag(prepared: Dict[str, Any],
+             test_cases: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Tag each case with its operation so later spec updates can tell
+        which cases belong to which operation. The key is always set here,
+        so an "operation" the LLM made up can't override it.
+        """
+        endpoint = prepared["endpoint"]
+        key = operation_key(endpoint["method"], endpoint["path"])
+        for case in test_cases:
+            if isinstance(case, dict):
+                case["operation"] = key
+        return test_cases
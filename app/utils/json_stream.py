@@ -0,0 +1,112 @@
+import json
+from typing import Any, Dict, List
+
+
+class JSONArrayStreamParser:
+    """
+    Incrementally extract objects from a JSON array in a text stream,
+    emitting each one as soon as its closing brace arrives.
+
+    The array is either top-level or the value of an `array_key` key
+    ({"test_cases": [...]}); arrays nested anywhere else, such as a bare
+    case's "assertions", are never mistaken for it. Text around the array
+    (markdown fences, prose) is ignored, and a truncated stream still
+    yields every object that was completed before the cut-off.
+    """
+
+    def __init__(self, array_key: str = "test_cases"):
+        self.array_key = array_key
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._array_depth = None  # depth inside the array once found
+        self._object_start = None
+        self.done = False
+        self.invalid_objects = 0
+        # Key tracking until the array is found: the last string closed
+        # and whether a ':' followed it (the next value is that key's)
+        self._string = None
+        self._last_string = None
+        self._key = None
+
+    @property
+    def found_array(self) -> bool:
+        """Whether the start of the array has been seen yet"""
+        return self._array_depth is not None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Consume more text; return objects completed by it"""
+        if self.done or not chunk:
+            return []
+
+        self._buffer += chunk
+        completed = []
+
+        while self._pos < len(self._buffer) and not self.done:
+            char = self._buffer[self._pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    if self._string is not None:
+                        self._string.append(char)
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._string is not None:
+                        self._last_string = "".join(self._string)
+                        self._string = None
+                elif self._string is not None:
+                    self._string.append(char)
+            elif char == '"' and self._depth > 0:
+                self._in_string = True
+                self._key = None
+                if self._array_depth is None:
+                    self._string = []
+            elif char == ":" and self._depth > 0 \
+                    and self._array_depth is None:
+                self._key = self._last_string
+            elif char in "{[":
+                self._depth += 1
+                if char == "[" and self._array_depth is None and \
+                        (self._depth == 1 or self._key == self.array_key):
+                    self._array_depth = self._depth
+                elif char == "{" and self._array_depth is not None \
+                        and self._depth == self._array_depth + 1:
+                    self._object_start = self._pos
+                self._key = None
+            elif char in "}]" and self._depth > 0:
+                if char == "}" and self._object_start is not None \
+                        and self._depth == self._array_depth + 1:
+                    completed.extend(self._emit(self._pos))
+                self._depth -= 1
+                if self._array_depth is not None \
+                        and self._depth < self._array_depth:
+                    self.done = True
+
+            self._pos += 1
+
+        self._compact()
+        return completed
+
+    def _emit(self, end: int) -> List[Dict[str, Any]]:
+        text = self._buffer[self._object_start:end + 1]
+        self._object_start = None
+        try:
+            return [json.loads(text)]
+        except json.JSONDecodeError:
+            self.invalid_objects += 1
+            return []
+
+    def _compact(self):
+        """Drop consumed text that no pending object still needs"""
+        keep_from = self._object_start if self._object_start is not None \
+            else self._pos
+        if keep_from > 0:
+            self._buffer = self._buffer[keep_from:]
+            self._pos -= keep_from
+            if self._object_start is not None:
+                self._object_start = 0
@@ -0,0 +1,97 @@
+import math
+from typing import Any, Dict, Iterable, Optional
+
+# Bucket bounds grow by this factor, so a percentile read from the
+# histogram is within ~5% of the true value
+GROWTH = 1.1
+_LOG_GROWTH = math.log(GROWTH)
+# Latencies below this (in ms) share the first bucket
+_FLOOR_MS = 0.01
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram (milliseconds) that stores only the
+    non-empty buckets, so it serializes compactly and histograms from
+    different runs can be merged.
+    """
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, seconds: float):
+        ms = max(seconds * 1000, _FLOOR_MS)
+        bucket = math.floor(math.log(ms / _FLOOR_MS) / _LOG_GROWTH)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += ms
+        self.min = ms if self.min is None else min(self.min, ms)
+        self.max = ms if self.max is None else max(self.max, ms)
+
+    def merge(self, other: "LatencyHistogram"):
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None \
+                else min(self.min, other.min)
+            self.max = other.max if self.max is None \
+                else max(self.max, other.max)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Approximate q-th percentile (0-100) in ms"""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * q / 100))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                # Geometric midpoint of the bucket, kept within observed range
+                value = _FLOOR_MS * GROWTH ** (bucket + 0.5)
+                return round(min(max(value, self.min), self.max), 3)
+        return round(self.max, 3)
+
+    def summary(self) -> Dict[str, Any]:
+        """Percentiles plus the serialized histogram"""
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else None,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "histogram": self.to_dict()
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "buckets": {str(b): c for b, c in sorted(self.buckets.items())},
+            "count": self.count,
+            "sum": round(self.total, 3),
+            "min": self.min,
+            "max": self.max
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        histogram = cls()
+        histogram.buckets = {int(b): c
+                             for b, c in (data.get("buckets") or {}).items()}
+        histogram.count = data.get("count", 0)
+        histogram.total = data.get("sum", 0.0)
+        histogram.min = data.get("min")
+        histogram.max = data.get("max")
+        return histogram
+
+    @classmethod
+    def of(cls, samples: Iterable[float]) -> "LatencyHistogram":
+        """Histogram of samples given in seconds"""
+        histogram = cls()
+        for seconds in samples:
+            histogram.add(seconds)
+        return histogram
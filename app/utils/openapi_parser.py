@@ -1,35 +1,202 @@
 import json
-from typing import Dict, Any, List
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+import yaml
+
+# libyaml's loader is several times faster on large specs when available
+_YAMLLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def operation_key(method: str, path: str) -> str:
+    """Identifier for one operation, e.g. 'GET /users/{id}'"""
+    return f"{method.upper()} {path}"
+
+
+HTTP_METHODS = ("get", "put", "post", "delete", "options", "head", "patch",
+                "trace")
+
+
+def load_spec(content: str) -> Dict[str, Any]:
+    """Parse spec text as JSON, falling back to YAML"""
+    try:
+        spec = json.loads(content)
+    except json.JSONDecodeError:
+        try:
+            spec = yaml.load(content, Loader=_YAMLLoader)
+        except yaml.YAMLError as e:
+            raise ValueError(f"Spec is neither valid JSON nor YAML: {e}")
+
+    if not isinstance(spec, dict):
+        raise ValueError("Spec must be a JSON or YAML object")
+    return spec
 
 
 class OpenAPIParser:
-    """Parse OpenAPI/Swagger specifications"""
+    """
+    Parse OpenAPI/Swagger specifications.
+
+    Operations are indexed once on construction (by path and method,
+    operationId and tag), with path-level parameters merged into each
+    operation, so lookups don't rescan `paths`. Resolved `$ref`s are
+    memoized for the parser's lifetime.
+    """
 
     def __init__(self, spec: Dict[str, Any]):
         self.spec = spec
+        self._endpoints: List[Dict[str, Any]] = []
+        self._by_route: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._by_operation_id: Dict[str, Dict[str, Any]] = {}
+        self._by_tag: Dict[str, List[Dict[str, Any]]] = {}
+        self._route_patterns = None
+        self._resolved: Dict[str, Any] = {}
+        self._cycles_cut = 0
+        self._index()
 
-    def get_endpoints(self) -> List[Dict[str, Any]]:
-        """Extract all endpoints from the spec"""
-        endpoints = []
-        paths = self.spec.get("paths", {})
+    @classmethod
+    def from_content(cls, content: str) -> "OpenAPIParser":
+        """Parser for spec text in JSON or YAML"""
+        return cls(load_spec(content))
+
+    def _index(self):
+        for path, path_item in (self.spec.get("paths") or {}).items():
+            if not isinstance(path_item, dict):
+                continue
+            shared_params = path_item.get("parameters") or []
+
+            for method, details in path_item.items():
+                if method not in HTTP_METHODS or not isinstance(details, dict):
+                    continue
+                if shared_params:
+                    details = {**details, "parameters": self._merge_parameters(
+                        shared_params, details.get("parameters") or [])}
+
+                endpoint = {
+                    "path": path,
+                    "method": method.upper(),
+                    "details": details
+                }
+                self._endpoints.append(endpoint)
+                self._by_route[(path, method)] = endpoint
+                if details.get("operationId"):
+                    self._by_operation_id[details["operationId"]] = endpoint
+                for tag in details.get("tags") or []:
+                    self._by_tag.setdefault(tag, []).append(endpoint)
 
-        for path, methods in paths.items():
-            for method, details in methods.items():
-                if method in ["get", "post", "put", "delete", "patch"]:
-                    endpoints.append({
-                        "path": path,
-                        "method": method.upper(),
-                        "details": details
-                    })
+    @staticmethod
+    def _merge_parameters(shared: List[Dict[str, Any]],
+                          own: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Path-level parameters, overridden by operation ones of the same
+        name and location"""
+        def key(param):
+            return param.get("$ref") or (param.get("name"), param.get("in"))
 
-        return endpoints
+        overridden = {key(param) for param in own}
+        return [param for param in shared
+                if key(param) not in overridden] + list(own)
+
+    def get_endpoints(self) -> List[Dict[str, Any]]:
+        """Extract all endpoints from the spec"""
+        return list(self._endpoints)
 
     def get_endpoint_details(self, path: str, method: str) -> Dict[str, Any]:
         """Get details for a specific endpoint"""
-        try:
-            return self.spec["paths"][path][method.lower()]
-        except KeyError:
-            return {}
+        endpoint = self._by_route.get((path, method.lower()))
+        return endpoint["details"] if endpoint else {}
+
+    def get_operation(self, operation_id: str) -> Optional[Dict[str, Any]]:
+        """Endpoint with the given operationId"""
+        return self._by_operation_id.get(operation_id)
+
+    def get_endpoints_by_tag(self, tag: str) -> List[Dict[str, Any]]:
+        return list(self._by_tag.get(tag, []))
+
+    def resolve(self, node: Any, _stack: tuple = ()) -> Any:
+        """Inline local `$ref`s; cyclic references become a named stub"""
+        if isinstance(node, list):
+            return [self.resolve(item, _stack) for item in node]
+        if not isinstance(node, dict):
+            return node
+
+        ref = node.get("$ref")
+        if isinstance(ref, str):
+            if ref in self._resolved:
+                return self._resolved[ref]
+            if ref in _stack:
+                self._cycles_cut += 1
+                return {"type": "object",
+                        "description": f"{ref.rsplit('/', 1)[-1]} (recursive)"}
+            target = self._lookup(ref)
+            if target is None:
+                return {}
+            cycles_before = self._cycles_cut
+            resolved = self.resolve(target, _stack + (ref,))
+            # A result containing a cycle stub depends on the path taken to
+            # reach it, so only stub-free resolutions are memoized
+            if self._cycles_cut == cycles_before:
+                self._resolved[ref] = resolved
+            return resolved
+
+        return {key: self.resolve(value, _stack)
+                for key, value in node.items()}
+
+    def _lookup(self, ref: str) -> Optional[Any]:
+        if not ref.startswith("#/"):
+            return None
+        node: Any = self.spec
+        for part in ref[2:].split("/"):
+            part = part.replace("~1", "/").replace("~0", "~")
+            if not isinstance(node, dict) or part not in node:
+                return None
+            node = node[part]
+        return node
+
+    def diff(self, other: "OpenAPIParser") -> Dict[str, List[str]]:
+        """
+        Compare operations with another version of the spec.
+        Returns operation keys that were added, changed, removed or left
+        unchanged in `other` relative to this spec.
+        """
+        # Fingerprints cover referenced components too, so a change made
+        # only under components/schemas marks its operations changed
+        def fingerprints(parser: "OpenAPIParser") -> Dict[str, str]:
+            return {operation_key(e["method"], e["path"]): json.dumps(
+                        parser.resolve(e["details"]), sort_keys=True,
+                        default=str)
+                    for e in parser.get_endpoints()}
+
+        old_ops = fingerprints(self)
+        new_ops = fingerprints(other)
+
+        diff = {"added": [], "changed": [], "removed": [], "unchanged": []}
+        for key, fingerprint in new_ops.items():
+            if key not in old_ops:
+                diff["added"].append(key)
+            elif fingerprint != old_ops[key]:
+                diff["changed"].append(key)
+            else:
+                diff["unchanged"].append(key)
+        diff["removed"] = [key for key in old_ops if key not in new_ops]
+        return diff
+
+    def match_operation(self, method: str, endpoint: str) -> Optional[str]:
+        """Find the operation a concrete request path belongs to"""
+        endpoint = endpoint.split("?", 1)[0].rstrip("/") or "/"
+        if not endpoint.startswith("/"):
+            endpoint = "/" + endpoint
+
+        if self._route_patterns is None:
+            self._route_patterns = [
+                (e["method"], e["path"], re.compile(re.sub(
+                    r"\\\{[^/]+?\\\}", "[^/]+",
+                    re.escape(e["path"].rstrip("/") or "/"))))
+                for e in self._endpoints
+            ]
+
+        for op_method, path, pattern in self._route_patterns:
+            if op_method == method.upper() and pattern.fullmatch(endpoint):
+                return operation_key(op_method, path)
+        return None
 
     def get_base_url(self) -> str:
         """Extract base URL from spec"""
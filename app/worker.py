@@ -0,0 +1,50 @@
+"""
+Standalone execution worker. Claims shards of distributed executions from
+the database queue, runs them with TestExecutor and writes the results
+back; start as many as the suites need, on any host sharing DATABASE_URL.
+
+    python -m app.worker [--poll-interval SECONDS] [--once] [--worker-id ID]
+"""
+import argparse
+import os
+import socket
+import time
+
+from app.database import engine, Base, add_missing_columns, \
+    add_missing_indexes
+from app.services.execution_shards import ShardQueue, run_next_shard
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run shards of distributed test executions")
+    parser.add_argument("--poll-interval", type=float,
+                        default=float(os.getenv("WORKER_POLL_INTERVAL",
+                                                "1.0")),
+                        help="seconds to wait when the queue is empty")
+    parser.add_argument("--once", action="store_true",
+                        help="exit as soon as the queue is empty")
+    parser.add_argument("--worker-id",
+                        default=f"{socket.gethostname()}:{os.getpid()}")
+    args = parser.parse_args(argv)
+
+    # Workers may start before the API has created the tables
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine)
+    add_missing_indexes(engine)
+
+    queue = ShardQueue()
+    print(f"Worker {args.worker_id} polling for shards")
+    try:
+        while True:
+            if run_next_shard(queue, args.worker_id):
+                continue
+            if args.once:
+                break
+            time.sleep(args.poll_interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
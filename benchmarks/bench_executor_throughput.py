@@ -0,0 +1,56 @@
+"""
+Measure TestExecutor throughput against the local mock server, so executor
+overhead can be tracked without any network or real service in the way.
+
+    python -m benchmarks.bench_executor_throughput [requests]
+"""
+import sys
+import time
+
+from app.services.http_pool import SessionPool
+from app.services.mock_server import MockServer, example_from_schema
+from app.services.test_executor import TestExecutor
+from app.utils.openapi_parser import OpenAPIParser
+from benchmarks.bench_prompt_size import sample_spec
+
+
+def build_cases(parser: OpenAPIParser, total: int):
+    cases = []
+    for endpoint in parser.get_endpoints():
+        case = {"name": f"{endpoint['method']} {endpoint['path']}",
+                "method": endpoint["method"],
+                "endpoint": endpoint["path"].replace("{", "").replace("}", "")}
+        body = parser.resolve(endpoint["details"].get("requestBody") or {})
+        schema = ((body.get("content") or {}).get("application/json")
+                  or {}).get("schema")
+        if schema:
+            case["body"] = example_from_schema(schema)
+        cases.append(case)
+    return [cases[i % len(cases)] for i in range(total)]
+
+
+def main(total=2000):
+    parser = OpenAPIParser(sample_spec())
+    server = MockServer(parser).start()
+    cases = build_cases(parser, total)
+
+    print(f"{total} requests against {server.base_url}")
+    print(f"{'concurrency':<13}{'wall time':>10}{'req/s':>10}{'conns':>7}")
+    try:
+        for concurrency in (1, 8, 32):
+            pool = SessionPool()
+            executor = TestExecutor(server.base_url, concurrency=concurrency,
+                                    session_pool=pool)
+            started = time.perf_counter()
+            executor.execute_test_suite(cases)
+            elapsed = time.perf_counter() - started
+            conns = pool.stats()[server.base_url]["connections_opened"]
+            pool.close()
+            print(f"{concurrency:<13}{elapsed:>9.2f}s"
+                  f"{total / elapsed:>10.0f}{conns:>7}")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
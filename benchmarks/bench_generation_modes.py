@@ -0,0 +1,61 @@
+"""
+Compare LLM calls and wall time of per-endpoint vs batched generation.
+
+    python -m benchmarks.bench_generation_modes [endpoints] [overhead_ms]
+
+Ollama is replaced by a stub that sleeps a fixed per-call overhead (prompt
+processing, warm-up, response framing) plus a little per generated case,
+so the numbers show how much of that overhead batching removes.
+"""
+import json
+import re
+import sys
+import time
+
+from app.services.test_generator import TestGenerator
+from app.utils.openapi_parser import OpenAPIParser
+
+PER_CASE_SECONDS = 0.002
+
+
+class StubClient:
+    def __init__(self, overhead: float):
+        self.overhead = overhead
+
+    def chat(self, model, messages, **kwargs):
+        prompt = messages[0]["content"]
+        batch = re.search(r"EACH of these operations: (.+?)\. ", prompt)
+        if batch:
+            operations = batch.group(1).split(", ")
+        else:
+            operations = [re.search(r"Endpoint: (\S+ \S+)", prompt).group(1)]
+
+        time.sleep(self.overhead + PER_CASE_SECONDS * len(operations))
+        cases = [{"operation": op, "name": f"{op} ok",
+                  "method": op.split()[0], "endpoint": op.split()[1],
+                  "expected_status": 200} for op in operations]
+        return iter([{"message": {"content": json.dumps(
+            {"test_cases": cases})}}])
+
+
+def main(endpoint_count=60, overhead_ms=50):
+    spec = {"paths": {f"/resource_{i}": {"get": {"responses": {"200": {}}}}
+                      for i in range(endpoint_count)}}
+    parser = OpenAPIParser(spec)
+    endpoints = parser.get_endpoints()
+
+    print(f"{endpoint_count} endpoints, {overhead_ms} ms per-call overhead")
+    print(f"{'mode':<14}{'llm calls':>10}{'wall time':>12}{'cases':>8}")
+    for mode in ("per_endpoint", "batched"):
+        generator = TestGenerator()
+        generator.ai_service.client = StubClient(overhead_ms / 1000)
+        cases = generator.generate_tests_for_endpoints(endpoints,
+                                                       parser=parser,
+                                                       mode=mode)
+        run = generator.last_run
+        print(f"{mode:<14}{run['llm_calls']:>10}"
+              f"{run['wall_time']:>11.2f}s{len(cases):>8}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
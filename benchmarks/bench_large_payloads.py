@@ -0,0 +1,163 @@
+"""
+Latency and CPU per request for large suites and executions: the
+response_model path (Pydantic validation + stdlib JSON, as the endpoints
+used to be) vs. the fast path (stored JSON sent as is, orjson, large
+arrays streamed), with and without gzip.
+
+    python -m benchmarks.bench_large_payloads [items] [requests]
+
+Requests are sequential through httpx's in-process ASGI transport, so CPU
+time is the app's (plus the client's body read, the same on both paths).
+"""
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+_db_dir = tempfile.mkdtemp(prefix="bench-payloads-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+
+import httpx  # noqa: E402
+from fastapi import Depends, FastAPI, HTTPException  # noqa: E402
+from fastapi.middleware.gzip import GZipMiddleware  # noqa: E402
+from sqlalchemy import select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+from sqlalchemy.orm import selectinload  # noqa: E402
+
+from app import models, schemas  # noqa: E402
+from app.database import Base, SessionLocal, engine, \
+    get_async_db  # noqa: E402
+from app.main import GZIP_LEVEL  # noqa: E402
+from app.routers import test_execution, test_generation  # noqa: E402
+from app.services.result_store import save_results  # noqa: E402
+
+
+def model_app() -> FastAPI:
+    """The previous response_model routes for the same endpoints"""
+    app = FastAPI()
+
+    @app.get("/api/generation/suites/{suite_id}",
+             response_model=schemas.TestSuiteResponse)
+    async def get_test_suite(suite_id: int,
+                             db: AsyncSession = Depends(get_async_db)):
+        suite = await db.get(models.TestSuite, suite_id)
+        if not suite:
+            raise HTTPException(status_code=404)
+        return suite
+
+    @app.get("/api/execution/executions/{execution_id}",
+             response_model=schemas.TestExecutionResponse)
+    async def get_execution(execution_id: int,
+                            db: AsyncSession = Depends(get_async_db)):
+        execution = await db.scalar(select(models.TestExecution).options(
+            selectinload(models.TestExecution.test_results)
+        ).where(models.TestExecution.id == execution_id))
+        if not execution:
+            raise HTTPException(status_code=404)
+        return execution
+
+    return app
+
+
+def fast_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(test_generation.router)
+    app.include_router(test_execution.router)
+    return app
+
+
+def gzipped(app: FastAPI) -> FastAPI:
+    app.add_middleware(GZipMiddleware, minimum_size=1024,
+                       compresslevel=GZIP_LEVEL)
+    return app
+
+
+def seed(items: int):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    spec = models.APISpec(name="Bench", spec_content="{}")
+    db.add(spec)
+    db.flush()
+    suite = models.TestSuite(
+        api_spec_id=spec.id, name="Bench suite",
+        generated_tests=[{
+            "name": f"Create item {i}", "method": "POST",
+            "endpoint": f"/items/{i}", "expected_status": 201,
+            "headers": {"Content-Type": "application/json"},
+            "body": {"name": f"item {i}", "tags": ["a", "b"], "price": 9.5},
+            "assertions": [{"type": "status_code", "expected": 201}]
+        } for i in range(items)])
+    db.add(suite)
+    db.flush()
+    execution = models.TestExecution(
+        test_suite_id=suite.id, status="completed", total_tests=items,
+        passed_tests=items, failed_tests=0, coverage_percentage=100.0,
+        execution_time=1.0)
+    db.add(execution)
+    db.flush()
+    save_results(db, execution.id, [{
+        "name": f"Create item {i}", "method": "POST",
+        "endpoint": f"/items/{i}", "status": "passed",
+        "execution_time": 0.01, "actual_status": 201,
+        "expected_status": 201, "errors": [],
+        "url_tested": f"http://localhost/items/{i}"
+    } for i in range(items)])
+    db.commit()
+    ids = suite.id, execution.id
+    db.close()
+    return ids
+
+
+async def measure(app: FastAPI, path: str, requests: int,
+                  encoding: str):
+    """(p50 ms, p99 ms, CPU ms per request, bytes on the wire)"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport,
+                                 base_url="http://bench") as client:
+        headers = {"Accept-Encoding": encoding}
+        await client.get(path, headers=headers)  # warm up
+        latencies = []
+        size = 0
+        cpu_started = time.process_time()
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append(time.perf_counter() - started)
+            size = response.num_bytes_downloaded
+            response.raise_for_status()
+        cpu = time.process_time() - cpu_started
+
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return (statistics.median(latencies) * 1000, p99 * 1000,
+            cpu / requests * 1000, size)
+
+
+async def run(items: int, requests: int):
+    suite_id, execution_id = seed(items)
+    apps = {"model": model_app(), "fast": fast_app(),
+            "model+gzip": gzipped(model_app()),
+            "fast+gzip": gzipped(fast_app())}
+    paths = {"suite": f"/api/generation/suites/{suite_id}",
+             "execution": f"/api/execution/executions/{execution_id}"}
+
+    print(f"{items} items, {requests} sequential requests each")
+    print(f"{'endpoint':<11}{'path':<12}{'p50 ms':>9}{'p99 ms':>9}"
+          f"{'cpu ms':>9}{'bytes':>10}")
+    for name, path in paths.items():
+        for label, app in apps.items():
+            encoding = "gzip" if label.endswith("gzip") else "identity"
+            p50, p99, cpu, size = await measure(app, path, requests,
+                                                encoding)
+            print(f"{name:<11}{label:<12}{p50:>9.1f}{p99:>9.1f}"
+                  f"{cpu:>9.1f}{size:>10}")
+
+
+def main(items=5000, requests=50):
+    asyncio.run(run(items, requests))
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,161 @@
+"""
+Compare generation prompt size per endpoint before and after compaction.
+
+    python -m benchmarks.bench_prompt_size [spec.json ...]
+
+Without arguments a built-in sample spec is used. Columns:
+  previous  the endpoint slice as prompts used to embed it: unresolved
+            ($refs left dangling) and pretty-printed
+  compact   the PromptBuilder output with no token budget, i.e. lossless
+            resolution, pruning and condensing only
+  budgeted  the same at the default OLLAMA_PROMPT_TOKEN_BUDGET
+  trimmed   whether the budget cut schema detail from the endpoint
+Compact can be larger than previous: it includes the schemas that the
+old slice only referenced.
+"""
+import json
+import sys
+
+from app.services.failure_analysis import estimate_tokens
+from app.services.prompt_builder import PromptBuilder, compact_json
+from app.utils.openapi_parser import OpenAPIParser, operation_key
+
+
+def sample_spec():
+    address = {"type": "object", "description": "Postal address",
+               "properties": {name: {"type": "string", "example": "..."}
+                              for name in ("street", "city", "zip",
+                                           "country")}}
+    pet = {
+        "type": "object",
+        "required": ["name"],
+        "properties": {
+            "id": {"type": "integer", "format": "int64"},
+            "name": {"type": "string", "example": "doggie"},
+            "status": {"type": "string",
+                       "enum": ["available", "pending", "sold"]},
+            "owner": {"$ref": "#/components/schemas/Owner"},
+            "tags": {"type": "array",
+                     "items": {"$ref": "#/components/schemas/Tag"}}
+        },
+        "xml": {"name": "Pet"}
+    }
+    error = {"description": "Error",
+             "content": {"application/json": {"schema": {
+                 "$ref": "#/components/schemas/Error"}}}}
+    pet_body = {"content": {"application/json": {"schema": {
+        "$ref": "#/components/schemas/Pet"}}}}
+    pet_response = {"description": "A pet", "content": {"application/json": {
+        "schema": {"$ref": "#/components/schemas/Pet"}}}}
+
+    return {
+        "openapi": "3.0.0",
+        "paths": {
+            "/pets": {
+                "get": {"operationId": "listPets", "tags": ["pets"],
+                        "parameters": [{"$ref": "#/components/parameters/Limit"}],
+                        "responses": {"200": {
+                            "description": "Pets",
+                            "content": {"application/json": {"schema": {
+                                "type": "array",
+                                "items": {"$ref": "#/components/schemas/Pet"}
+                            }}}}, "default": error}},
+                "post": {"operationId": "createPet", "tags": ["pets"],
+                         "requestBody": pet_body,
+                         "responses": {"201": pet_response, "400": error,
+                                       "default": error}}
+            },
+            "/pets/{petId}": {
+                "get": {"operationId": "getPet", "tags": ["pets"],
+                        "parameters": [{"$ref": "#/components/parameters/PetId"}],
+                        "responses": {"200": pet_response, "404": error}},
+                "put": {"operationId": "updatePet", "tags": ["pets"],
+                        "parameters": [{"$ref": "#/components/parameters/PetId"}],
+                        "requestBody": pet_body,
+                        "responses": {"200": pet_response, "400": error,
+                                      "404": error}},
+                "delete": {"operationId": "deletePet", "tags": ["pets"],
+                           "parameters": [
+                               {"$ref": "#/components/parameters/PetId"}],
+                           "responses": {"204": {"description": "Deleted"},
+                                         "404": error}}
+            }
+        },
+        "components": {
+            "parameters": {
+                "PetId": {"name": "petId", "in": "path", "required": True,
+                          "schema": {"type": "integer"}},
+                "Limit": {"name": "limit", "in": "query",
+                          "schema": {"type": "integer", "maximum": 100}}
+            },
+            "schemas": {
+                "Pet": pet,
+                "Owner": {"type": "object", "properties": {
+                    "name": {"type": "string"}, "address": address,
+                    "pets": {"type": "array",
+                             "items": {"$ref": "#/components/schemas/Pet"}}}},
+                "Tag": {"type": "object", "properties": {
+                    "id": {"type": "integer"}, "name": {"type": "string"}}},
+                "Error": {"type": "object", "properties": {
+                    "code": {"type": "integer"},
+                    "message": {"type": "string"}}}
+            }
+        }
+    }
+
+
+def raw_slice(endpoint):
+    """The endpoint slice as it was embedded before compaction"""
+    details = endpoint["details"]
+    return {
+        "path": endpoint["path"],
+        "method": endpoint["method"],
+        "parameters": details.get("parameters", []),
+        "requestBody": details.get("requestBody", {}),
+        "responses": details.get("responses", {}),
+        "security": details.get("security", []),
+        "description": details.get("description", "")
+    }
+
+
+def report(name, spec):
+    compact = PromptBuilder(spec, token_budget=sys.maxsize)
+    budgeted = PromptBuilder(spec)
+    totals = [0, 0, 0]
+    operations = 0
+
+    print(f"\n{name}")
+    print(f"{'operation':<32}{'previous':>10}{'compact':>10}"
+          f"{'budgeted':>10}{'trimmed':>9}")
+    for endpoint in OpenAPIParser(spec).get_endpoints():
+        row = [
+            estimate_tokens(json.dumps(raw_slice(endpoint), indent=2)),
+            estimate_tokens(compact_json(compact.endpoint_spec(endpoint))),
+            estimate_tokens(compact_json(budgeted.endpoint_spec(endpoint)))
+        ]
+        operations += 1
+        totals = [total + value for total, value in zip(totals, row)]
+        label = f"{endpoint['method']} {endpoint['path']}"
+        trimmed = operation_key(endpoint["method"], endpoint["path"]) \
+            in budgeted.trimmed
+        print(f"{label:<32}" + "".join(f"{value:>10}" for value in row) +
+              f"{'yes' if trimmed else '':>9}")
+
+    print(f"{'total':<32}" + "".join(f"{value:>10}" for value in totals) +
+          f"{len(budgeted.trimmed):>9}")
+    print(f"compact vs previous {totals[1] / totals[0] - 1:+.0%}, "
+          f"budgeted vs previous {totals[2] / totals[0] - 1:+.0%}; "
+          f"{len(budgeted.trimmed)} of {operations} operations trimmed at "
+          f"a budget of {budgeted.token_budget} tokens")
+
+
+def main(paths):
+    if not paths:
+        report("sample spec", sample_spec())
+    for path in paths:
+        with open(path) as f:
+            report(path, json.load(f))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
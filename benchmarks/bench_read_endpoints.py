@@ -0,0 +1,133 @@
+"""
+Requests per second on read endpoints: sync `def` routes on a sync
+session (as the routers used to be) vs. the async routers.
+
+    python -m benchmarks.bench_read_endpoints [requests] [concurrency ...]
+
+Requests go through httpx's in-process ASGI transport, so the numbers
+measure the app (threadpool hops, session handling, serialization) and
+not a network. Uses a throwaway SQLite database seeded with one suite and
+a few hundred executions. Requests that fail (e.g. a sync route timing out
+on the connection pool while its threads wait for teardown slots) are
+counted separately and not in req/s.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+_db_dir = tempfile.mkdtemp(prefix="bench-read-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/bench.db"
+# Fail fast instead of queueing 30s for a pooled connection
+os.environ.setdefault("DB_POOL_TIMEOUT", "2")
+
+import httpx  # noqa: E402
+from fastapi import Depends, FastAPI, HTTPException  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app import models, schemas  # noqa: E402
+from app.database import Base, SessionLocal, engine, get_db  # noqa: E402
+from app.routers import test_execution, test_generation  # noqa: E402
+from app.services.execution_queries import \
+    list_execution_summaries  # noqa: E402
+
+
+def sync_app() -> FastAPI:
+    """The previous sync routes for the same endpoints"""
+    app = FastAPI()
+
+    @app.get("/api/generation/suites/{suite_id}",
+             response_model=schemas.TestSuiteResponse)
+    def get_test_suite(suite_id: int, db: Session = Depends(get_db)):
+        suite = db.query(models.TestSuite).filter(
+            models.TestSuite.id == suite_id).first()
+        if not suite:
+            raise HTTPException(status_code=404)
+        return suite
+
+    @app.get("/api/execution/executions",
+             response_model=schemas.ExecutionPage)
+    def list_executions(limit: int = 50, db: Session = Depends(get_db)):
+        return list_execution_summaries(db, limit=limit)
+
+    return app
+
+
+def async_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(test_generation.router)
+    app.include_router(test_execution.router)
+    return app
+
+
+def seed() -> int:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    spec = models.APISpec(name="Bench", spec_content="{}")
+    db.add(spec)
+    db.flush()
+    suite = models.TestSuite(
+        api_spec_id=spec.id, name="Bench suite",
+        generated_tests=[{"name": f"Test {i}", "method": "GET",
+                          "endpoint": f"/items/{i}", "expected_status": 200}
+                         for i in range(50)])
+    db.add(suite)
+    db.flush()
+    db.add_all([models.TestExecution(
+        test_suite_id=suite.id, status="completed", total_tests=50,
+        passed_tests=50, failed_tests=0, coverage_percentage=100.0,
+        execution_time=1.0) for _ in range(300)])
+    db.commit()
+    suite_id = suite.id
+    db.close()
+    return suite_id
+
+
+async def hammer(app: FastAPI, path: str, total: int,
+                 concurrency: int):
+    """(successful req/s, failed requests)"""
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport,
+                                 base_url="http://bench") as client:
+        remaining = iter(range(total))
+        failed = 0
+
+        async def worker():
+            nonlocal failed
+            for _ in remaining:
+                response = await client.get(path)
+                if response.status_code != 200:
+                    failed += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        return (total - failed) / elapsed, failed
+
+
+async def run(total: int, levels):
+    suite_id = seed()
+    apps = {"sync": sync_app(), "async": async_app()}
+    paths = {"suite": f"/api/generation/suites/{suite_id}",
+             "executions": "/api/execution/executions?limit=50"}
+
+    print(f"{total} requests per run: req/s (failed requests)")
+    print(f"{'endpoint':<12}{'concurrency':>12}{'sync':>16}{'async':>16}")
+    for name, path in paths.items():
+        for concurrency in levels:
+            cells = []
+            for app in apps.values():
+                rate, failed = await hammer(app, path, total, concurrency)
+                cells.append(f"{rate:>9.0f} ({failed:>4})")
+            print(f"{name:<12}{concurrency:>12}{cells[0]:>16}{cells[1]:>16}")
+
+
+def main(total=2000, *levels):
+    # One event loop throughout, as under uvicorn; the async engine's pool
+    # is bound to the loop it was first used on
+    asyncio.run(run(total, levels or (10, 100, 400)))
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -71,9 +71,7 @@ document.getElementById('upload-form').addEventListener('submit', async (e) => {
     const content = document.getElementById('spec-content').value;
 
     try {
-        // Validate JSON
-        JSON.parse(content);
-
+        // JSON or YAML; the server validates the document
         const response = await fetch(`${API_BASE}/api/generation/specs`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
@@ -85,10 +83,11 @@ document.getElementById('upload-form').addEventListener('submit', async (e) => {
             document.getElementById('upload-form').reset();
             loadSpecs();
         } else {
-            alert('Error uploading specification');
+            const error = await response.json();
+            alert(`Error uploading specification: ${error.detail}`);
         }
     } catch (error) {
-        alert('Invalid JSON format');
+        alert('Error uploading specification');
     }
 });
 
@@ -163,14 +162,10 @@ document.getElementById('generate-form').addEventListener('submit', async (e) =>
         });
 
         if (response.ok) {
-            const suite = await response.json();
-
-            statusDiv.style.display = 'none';
-            resultDiv.style.display = 'block';
+            const job = await response.json();
 
-            document.getElementById('suite-id').textContent = suite.id;
-            document.getElementById('suite-name').textContent = suite.name;
-            document.getElementById('suite-count').textContent = suite.generated_tests.length;
+            // Poll for progress
+            pollGenerationJob(job.id, statusDiv, resultDiv);
         } else {
             statusDiv.innerHTML = '<i class="fas fa-times"></i> Failed to generate tests';
         }
@@ -180,6 +175,43 @@ document.getElementById('generate-form').addEventListener('submit', async (e) =>
     }
 });
 
+// Poll generation job progress
+async function pollGenerationJob(jobId, statusDiv, resultDiv) {
+    const interval = setInterval(async () => {
+        try {
+            const response = await fetch(`${API_BASE}/api/generation/jobs/${jobId}`);
+            const job = await response.json();
+
+            if (job.status === 'running') {
+                const done = job.completed_endpoints + job.failed_endpoints;
+                if (job.total_endpoints > 0) {
+                    statusDiv.innerHTML = `<i class="fas fa-spinner fa-spin"></i> Generating tests... ${done}/${job.total_endpoints} endpoints`;
+                }
+                return;
+            }
+
+            clearInterval(interval);
+
+            if (job.status === 'completed') {
+                const suiteResponse = await fetch(`${API_BASE}/api/generation/suites/${job.test_suite_id}`);
+                const suite = await suiteResponse.json();
+
+                statusDiv.style.display = 'none';
+                resultDiv.style.display = 'block';
+
+                document.getElementById('suite-id').textContent = suite.id;
+                document.getElementById('suite-name').textContent = suite.name;
+                document.getElementById('suite-count').textContent = suite.generated_tests.length;
+            } else {
+                statusDiv.innerHTML = '<i class="fas fa-times"></i> Failed to generate tests';
+            }
+        } catch (error) {
+            console.error('Error polling generation job:', error);
+            clearInterval(interval);
+        }
+    }, 2000);
+}
+
 // Load suites for execution
 async function loadSuitesForExecution() {
     try {
@@ -206,6 +238,7 @@ document.getElementById('execute-form').addEventListener('submit', async (e) =>
 
     const testSuiteId = parseInt(document.getElementById('select-suite').value);
     const baseUrl = document.getElementById('target-url').value;
+    const useMockServer = document.getElementById('use-mock-server').checked;
 
     const statusDiv = document.getElementById('execution-status');
     const resultDiv = document.getElementById('execution-result');
@@ -219,15 +252,16 @@ document.getElementById('execute-form').addEventListener('submit', async (e) =>
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({
                 test_suite_id: testSuiteId,
-                base_url: baseUrl
+                base_url: baseUrl,
+                use_mock_server: useMockServer
             })
         });
 
         if (response.ok) {
             const execution = await response.json();
 
-            // Poll for results
-            pollExecutionStatus(execution.id, statusDiv, resultDiv);
+            // Stream results as they complete
+            streamExecutionResults(execution.id, statusDiv, resultDiv);
         } else {
             statusDiv.innerHTML = '<i class="fas fa-times"></i> Failed to start execution';
         }
@@ -237,36 +271,50 @@ document.getElementById('execute-form').addEventListener('submit', async (e) =>
     }
 });
 
-// Poll execution status
-async function pollExecutionStatus(executionId, statusDiv, resultDiv) {
-    const interval = setInterval(async () => {
-        try {
-            const response = await fetch(`${API_BASE}/api/execution/executions/${executionId}`);
-            const execution = await response.json();
+// Stream execution results as they complete
+function streamExecutionResults(executionId, statusDiv, resultDiv) {
+    const source = new EventSource(`${API_BASE}/api/execution/executions/${executionId}/stream`);
+    let totalTests = 0;
+    let completedTests = 0;
 
-            if (execution.status === 'completed') {
-                clearInterval(interval);
+    source.addEventListener('start', (event) => {
+        totalTests = JSON.parse(event.data).total_tests;
+    });
 
-                statusDiv.style.display = 'none';
-                resultDiv.style.display = 'block';
+    source.addEventListener('result', () => {
+        completedTests += 1;
+        statusDiv.innerHTML = `<i class="fas fa-spinner fa-spin"></i> Running tests... ${completedTests}/${totalTests} completed`;
+    });
 
-                document.getElementById('result-passed').textContent = execution.passed_tests;
-                document.getElementById('result-failed').textContent = execution.failed_tests;
-                document.getElementById('result-coverage').textContent = `${execution.coverage_percentage.toFixed(2)}%`;
-                document.getElementById('result-time').textContent = `${execution.execution_time.toFixed(2)}s`;
-            }
-        } catch (error) {
-            console.error('Error polling execution:', error);
-            clearInterval(interval);
+    source.addEventListener('complete', (event) => {
+        source.close();
+        const execution = JSON.parse(event.data);
+
+        if (execution.status !== 'completed') {
+            statusDiv.innerHTML = '<i class="fas fa-times"></i> Execution failed';
+            return;
         }
-    }, 2000);
+
+        statusDiv.style.display = 'none';
+        resultDiv.style.display = 'block';
+
+        document.getElementById('result-passed').textContent = execution.passed_tests;
+        document.getElementById('result-failed').textContent = execution.failed_tests;
+        document.getElementById('result-coverage').textContent = `${execution.coverage_percentage.toFixed(2)}%`;
+        document.getElementById('result-time').textContent = `${execution.execution_time.toFixed(2)}s`;
+    });
+
+    source.onerror = (error) => {
+        // EventSource reconnects on its own and resumes from the last result
+        console.error('Execution stream interrupted:', error);
+    };
 }
 
 // Load executions for results
 async function loadExecutionsForResults() {
     try {
-        const response = await fetch(`${API_BASE}/api/execution/executions`);
-        const executions = await response.json();
+        const response = await fetch(`${API_BASE}/api/execution/executions?status=completed`);
+        const executions = (await response.json()).items;
 
         const select = document.getElementById('select-execution');
         select.innerHTML = '<option value="">-- Select an execution --</option>';
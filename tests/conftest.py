@@ -1,8 +1,21 @@
-import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from app.database import Base
-from app import models
+import atexit
+import os
+import shutil
+import tempfile
+
+# Before anything imports app.database: code on the default engine writes
+# to a throwaway file instead of ./test.db (and its -wal/-shm files). An
+# empty ASYNC_DATABASE_URL is derived from it, whatever .env says.
+_db_dir = tempfile.mkdtemp(prefix="api-tests-")
+atexit.register(shutil.rmtree, _db_dir, ignore_errors=True)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_dir}/app.db"
+os.environ["ASYNC_DATABASE_URL"] = ""
+
+import pytest  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from app.database import Base  # noqa: E402
+from app import models  # noqa: E402
 
 
 @pytest.fixture(scope="function")
@@ -21,6 +34,20 @@ def test_db():
     Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture(scope="function")
+def session_factory(tmp_path):
+    """Session factory over a temporary database file, for services that
+    open their own sessions (possibly from several threads)"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}",
+                           connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
 @pytest.fixture
 def sample_api_spec(test_db):
     """Create a sample API spec in database"""
@@ -54,7 +54,7 @@ def test_generate_test_cases_success(mock_client_class, ai_service,
     }
 
     mock_client = Mock()
-    mock_client.chat.return_value = mock_response
+    mock_client.chat.return_value = iter([mock_response])
     mock_client_class.return_value = mock_client
 
     ai_service.client = mock_client
@@ -78,12 +78,13 @@ def test_generate_test_cases_with_markdown(mock_client_class, ai_service,
     """Test handling of markdown code blocks in response"""
     mock_response = {
         'message': {
-            'content': '```json\n[{"name": "test"}]\n```'
+            'content': '```json\n[{"name": "test", "method": "GET", '
+                       '"endpoint": "/users", "expected_status": 200}]\n```'
         }
     }
 
     mock_client = Mock()
-    mock_client.chat.return_value = mock_response
+    mock_client.chat.return_value = iter([mock_response])
     mock_client_class.return_value = mock_client
 
     ai_service.client = mock_client
@@ -95,6 +96,55 @@ def test_generate_test_cases_with_markdown(mock_client_class, ai_service,
     assert len(test_cases) > 0
 
 
+@patch('app.services.ai_service.ollama.Client')
+def test_generate_test_cases_accepts_a_bare_case(mock_client_class,
+                                                 ai_service,
+                                                 sample_openapi_spec):
+    """A single case object, not wrapped in a list, is still used"""
+    case = {"name": "Get users", "method": "GET", "endpoint": "/users",
+            "expected_status": 200, "assertions": ["status is 200"]}
+    mock_client = Mock()
+    mock_client.chat.return_value = iter(
+        [{'message': {'content': json.dumps(case)}}])
+    ai_service.client = mock_client
+
+    test_cases = ai_service.generate_test_cases(
+        sample_openapi_spec, "/users", "GET"
+    )
+
+    assert [tc["name"] for tc in test_cases] == ["Get users"]
+
+
+@patch('app.services.ai_service.ollama.Client')
+def test_generate_test_cases_keeps_chaining_fields(mock_client_class,
+                                                   ai_service,
+                                                   sample_openapi_spec):
+    """id/depends_on/capture survive validation; absent ones aren't added"""
+    cases = [
+        {"name": "create", "method": "POST", "endpoint": "/users",
+         "expected_status": 201, "id": 1, "capture": {"uid": "id"}},
+        {"name": "get", "method": "GET", "endpoint": "/users/{{uid}}",
+         "expected_status": 200, "depends_on": [1]},
+        {"name": "list", "method": "GET", "endpoint": "/users",
+         "expected_status": 200}
+    ]
+    mock_client = Mock()
+    mock_client.chat.return_value = iter(
+        [{'message': {'content': json.dumps({"test_cases": cases})}}])
+    ai_service.client = mock_client
+
+    test_cases = ai_service.generate_test_cases(
+        sample_openapi_spec, "/users", "GET"
+    )
+
+    assert test_cases[0]["id"] == 1
+    assert test_cases[0]["capture"] == {"uid": "id"}
+    assert test_cases[1]["depends_on"] == [1]
+    assert not {"id", "depends_on", "capture"} & set(test_cases[2])
+    prompt = mock_client.chat.call_args[1]["messages"][0]["content"]
+    assert "depends_on" in prompt and "{{user_id}}" in prompt
+
+
 @patch('app.services.ai_service.ollama.Client')
 def test_generate_test_cases_handles_errors(mock_client_class, ai_service,
                                             sample_openapi_spec):
@@ -143,3 +193,224 @@ def test_analyze_test_results(mock_client_class, ai_service):
 
     assert analysis["overall_quality_score"] == 85
     assert "Missing authentication tests" in analysis["critical_issues"]
+
+
+@patch('app.services.ai_service.ollama.Client')
+def test_analyze_test_results_map_reduce(mock_client_class, ai_service):
+    """Failures are clustered, analyzed once per cluster, then merged"""
+    cluster_reply = {'message': {'content': json.dumps({
+        "issue": "Server error", "likely_cause": "Crash",
+        "recommendation": "Fix it", "severity": "critical"
+    })}}
+    final_reply = {'message': {'content': json.dumps({
+        "overall_quality_score": 40,
+        "critical_issues": ["Server errors on /users/{id}"],
+        "summary": "Unstable"
+    })}}
+
+    def chat(model, messages, options):
+        if "Failure group:" in messages[0]['content']:
+            return cluster_reply
+        return final_reply
+
+    mock_client = Mock()
+    mock_client.chat.side_effect = chat
+    ai_service.client = mock_client
+    ai_service.analysis_token_budget = 2000
+
+    results = [
+        {"name": f"get {i}", "method": "GET", "endpoint": f"/users/{i}",
+         "status": "failed", "expected_status": 200, "actual_status": 500,
+         "errors": ["Expected status 200, got 500"]}
+        for i in range(5000)
+    ] + [
+        {"name": f"missing {i}", "method": "DELETE",
+         "endpoint": f"/orders/{i}", "status": "failed",
+         "expected_status": 204, "actual_status": 404,
+         "errors": ["Expected status 204, got 404"]}
+        for i in range(5000)
+    ]
+
+    cache = Mock()
+    cache.get.return_value = None
+    analysis = ai_service.analyze_test_results(results, cluster_cache=cache)
+
+    # Two clusters analyzed, plus one merge call, regardless of volume
+    assert mock_client.chat.call_count == 3
+    assert cache.set.call_count == 2
+    final_prompt = mock_client.chat.call_args_list[-1][1]['messages'][0][
+        'content']
+    assert len(final_prompt) < 4 * 2000 + 2000
+    assert "Server error" in final_prompt
+    assert analysis["overall_quality_score"] == 40
+    assert analysis["failure_patterns"] == []
+
+
+@patch('app.services.ai_service.ollama.Client')
+def test_analyze_test_results_reuses_cached_clusters(mock_client_class,
+                                                     ai_service):
+    """Clusters already in the cache are not sent to the LLM again"""
+    mock_client = Mock()
+    mock_client.chat.return_value = {'message': {'content': json.dumps({
+        "overall_quality_score": 70, "summary": "ok"})}}
+    ai_service.client = mock_client
+
+    cache = Mock()
+    cache.get.return_value = {"issue": "known", "likely_cause": "",
+                              "recommendation": "", "severity": "minor"}
+
+    ai_service.analyze_test_results(
+        [{"name": "t", "method": "GET", "endpoint": "/x", "status": "failed",
+          "expected_status": 200, "actual_status": 500, "errors": []}],
+        cluster_cache=cache
+    )
+
+    assert mock_client.chat.call_count == 1
+    assert "known" in mock_client.chat.call_args[1]['messages'][0]['content']
+
+
+def _stream(text, chunk_size=7):
+    return iter([{'message': {'content': text[i:i + chunk_size]}}
+                 for i in range(0, len(text), chunk_size)])
+
+
+@patch('app.services.ai_service.ollama.Client')
+def test_generate_test_cases_stops_after_requested_cases(mock_client_class,
+                                                         ai_service,
+                                                         sample_openapi_spec):
+    """Streaming stops as soon as enough complete cases have arrived"""
+    cases = [{"name": f"case {i}", "method": "GET", "endpoint": "/users",
+              "expected_status": 200} for i in range(10)]
+    consumed = []
+
+    def stream():
+        for chunk in _stream(json.dumps(cases)):
+            consumed.append(chunk)
+            yield chunk
+
+    mock_client = Mock()
+    mock_client.chat.return_value = stream()
+    ai_service.client = mock_client
+    ai_service.max_cases_per_endpoint = 2
+
+    test_cases = ai_service.generate_test_cases(sample_openapi_spec,
+                                                "/users", "GET")
+
+    assert [c["name"] for c in test_cases] == ["case 0", "case 1"]
+    assert mock_client.chat.call_args[1]["stream"] is True
+    assert len(consumed) < len(json.dumps(cases)) / 7 / 2
+    stats = ai_service.generation_stats["GET /users"]
+    assert stats["stopped_early"] is True
+    assert stats["time_to_first_case"] is not None
+
+
+@patch('app.services.ai_service.ollama.Client')
+def test_generate_test_cases_keeps_complete_cases_when_truncated(
+        mock_client_class, ai_service, sample_openapi_spec):
+    """A reply cut off mid-object still yields the finished cases"""
+    case = '"method": "GET", "endpoint": "/users", "expected_status": 200'
+    text = '```json\n[{"name": "first", "body": {"note": "a } in text"}, ' \
+           + case + '}, {"name": "second", ' + case + '}, {"name": "thi'
+
+    mock_client = Mock()
+    mock_client.chat.return_value = _stream(text)
+    ai_service.client = mock_client
+
+    test_cases = ai_service.generate_test_cases(sample_openapi_spec,
+                                                "/users", "GET")
+
+    assert [c["name"] for c in test_cases] == ["first", "second"]
+
+
+@patch('app.services.ai_service.ollama.Client')
+def test_generate_test_cases_repairs_invalid_cases(mock_client_class,
+                                                   ai_service,
+                                                   sample_openapi_spec):
+    """Invalid cases are re-prompted with their errors, then kept if fixed"""
+    from app.services.generation_metrics import parse_failures
+    parse_failures.reset()
+
+    first = {"test_cases": [
+        {"name": "ok", "method": "GET", "endpoint": "/users",
+         "expected_status": 200},
+        {"name": "broken", "method": "GET", "endpoint": "/users",
+         "expected_status": "two hundred"}
+    ]}
+    repaired = {"test_cases": [
+        {"name": "broken", "method": "GET", "endpoint": "/users",
+         "expected_status": 200}
+    ]}
+
+    mock_client = Mock()
+    mock_client.chat.side_effect = [_stream(json.dumps(first)),
+                                    _stream(json.dumps(repaired))]
+    ai_service.client = mock_client
+
+    test_cases = ai_service.generate_test_cases(sample_openapi_spec,
+                                                "/users", "GET")
+
+    assert [c["name"] for c in test_cases] == ["ok", "broken"]
+    assert test_cases[1]["headers"] == {}
+    assert mock_client.chat.call_args_list[0][1]["format"] == "json"
+    repair_prompt = mock_client.chat.call_args[1]["messages"][0]["content"]
+    assert "expected_status" in repair_prompt
+    assert "two hundred" in repair_prompt
+
+    stats = parse_failures.snapshot()["GET /users"]
+    assert stats["cases_parsed"] == 2
+    assert stats["cases_invalid"] == 1
+    assert stats["cases_repaired"] == 1
+    assert stats["repair_calls"] == 1
+    assert stats["failure_rate"] == 0.0
+
+
+@patch('app.services.ai_service.ollama.Client')
+def test_generate_test_cases_drops_unrepairable_cases(mock_client_class,
+                                                      ai_service,
+                                                      sample_openapi_spec):
+    """Repair attempts are bounded and still-invalid cases are discarded"""
+    from app.services.generation_metrics import parse_failures
+    parse_failures.reset()
+
+    bad = json.dumps({"test_cases": [{"name": "no method"}]})
+    mock_client = Mock()
+    mock_client.chat.side_effect = lambda **kwargs: _stream(bad)
+    ai_service.client = mock_client
+    ai_service.max_repair_attempts = 2
+
+    with pytest.raises(ValueError):
+        ai_service.generate_test_cases(sample_openapi_spec, "/users", "GET",
+                                       raise_errors=True)
+
+    assert mock_client.chat.call_count == 3
+    stats = parse_failures.snapshot()["GET /users"]
+    assert stats["cases_valid"] == 0
+    assert stats["failure_rate"] == 1.0
+
+
+@patch('app.services.ai_service.ollama.Client')
+def test_generate_test_cases_batch_splits_by_operation(mock_client_class,
+                                                       ai_service):
+    """Batched replies are split per operation, matching untagged cases"""
+    reply = {"test_cases": [
+        {"operation": "GET /users", "name": "list", "method": "GET",
+         "endpoint": "/users", "expected_status": 200},
+        # No operation tag; matched by route
+        {"name": "one", "method": "GET", "endpoint": "/users/7",
+         "expected_status": 200},
+        {"operation": "GET /nowhere", "name": "stray", "method": "GET",
+         "endpoint": "/nowhere", "expected_status": 200}
+    ]}
+    mock_client = Mock()
+    mock_client.chat.return_value = _stream(json.dumps(reply))
+    ai_service.client = mock_client
+
+    grouped = ai_service.generate_test_cases_batch([
+        {"path": "/users", "method": "GET"},
+        {"path": "/users/{id}", "method": "GET"}
+    ])
+
+    assert mock_client.chat.call_count == 1
+    assert [c["name"] for c in grouped["GET /users"]] == ["list"]
+    assert [c["name"] for c in grouped["GET /users/{id}"]] == ["one"]
+    assert "operation" not in grouped["GET /users"][0]
@@ -0,0 +1,80 @@
+from unittest.mock import Mock
+
+import pytest
+from app import models
+from app.services.ai_service import ANALYSIS_PROMPT_VERSION
+from app.services.analysis_store import get_or_create_analysis, \
+    run_execution_analysis
+
+
+@pytest.fixture
+def execution(test_db, sample_test_suite):
+    execution = models.TestExecution(
+        test_suite_id=sample_test_suite.id, status="completed",
+        total_tests=1, passed_tests=0, failed_tests=1,
+        legacy_results=[{"name": "t", "status": "failed"}]
+    )
+    test_db.add(execution)
+    test_db.commit()
+    return execution
+
+
+def _ai(model="llama3.2", score=80):
+    ai = Mock(model=model)
+    ai.analyze_test_results.return_value = {"overall_quality_score": score}
+    return ai
+
+
+def test_analysis_is_stored_and_reused(test_db, execution):
+    """Only the first read calls the LLM"""
+    ai = _ai()
+    first, stored = get_or_create_analysis(test_db, execution, ai_service=ai)
+    second, _ = get_or_create_analysis(test_db, execution, ai_service=ai)
+
+    assert first == second == {"overall_quality_score": 80}
+    assert stored.prompt_version == ANALYSIS_PROMPT_VERSION
+    assert ai.analyze_test_results.call_count == 1
+
+
+def test_refresh_and_model_change_rerun_analysis(test_db, execution):
+    get_or_create_analysis(test_db, execution, ai_service=_ai(score=80))
+
+    refreshed, _ = get_or_create_analysis(test_db, execution, refresh=True,
+                                          ai_service=_ai(score=60))
+    other_model, _ = get_or_create_analysis(
+        test_db, execution, ai_service=_ai(model="mistral", score=70))
+
+    assert refreshed["overall_quality_score"] == 60
+    assert other_model["overall_quality_score"] == 70
+    assert test_db.query(models.ExecutionAnalysis).count() == 2
+
+
+def test_failed_analysis_is_not_stored(test_db, execution):
+    ai = _ai()
+    ai.analyze_test_results.side_effect = RuntimeError("ollama down")
+    ai.fallback_analysis.return_value = {"overall_quality_score": 0}
+
+    analysis, stored = get_or_create_analysis(test_db, execution,
+                                              ai_service=ai)
+
+    assert stored is None
+    assert analysis["overall_quality_score"] == 0
+    assert test_db.query(models.ExecutionAnalysis).count() == 0
+
+
+def test_background_analysis_uses_own_session(session_factory):
+    db = session_factory()
+    execution = models.TestExecution(status="completed",
+                                     legacy_results=[])
+    db.add(execution)
+    db.commit()
+    execution_id = execution.id
+    db.close()
+
+    run_execution_analysis(execution_id, session_factory=session_factory,
+                           ai_service=_ai())
+
+    db = session_factory()
+    assert db.query(models.ExecutionAnalysis).filter_by(
+        execution_id=execution_id).count() == 1
+    db.close()
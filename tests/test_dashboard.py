@@ -0,0 +1,54 @@
+from app import models
+from app.services import dashboard
+from app.utils.ttl_cache import TTLCache
+
+
+def _add_execution(db, suite, status, coverage):
+    db.add(models.TestExecution(
+        test_suite_id=suite.id, status=status, total_tests=2,
+        passed_tests=1, failed_tests=1, coverage_percentage=coverage,
+        execution_time=1.0
+    ))
+    db.commit()
+
+
+def test_compute_dashboard_stats(test_db, sample_test_suite):
+    """Counts and average coverage come straight from SQL aggregates"""
+    _add_execution(test_db, sample_test_suite, "completed", 50.0)
+    _add_execution(test_db, sample_test_suite, "completed", 100.0)
+    _add_execution(test_db, sample_test_suite, "running", 0.0)
+
+    stats = dashboard.compute_dashboard_stats(test_db)
+
+    assert stats["total_api_specs"] == 1
+    assert stats["total_test_suites"] == 1
+    assert stats["total_executions"] == 3
+    assert stats["executions_by_status"] == {"completed": 2, "running": 1}
+    assert stats["average_coverage"] == 75.0
+    assert [e["status"] for e in stats["recent_executions"]] == \
+        ["running", "completed", "completed"]
+
+
+def test_compute_dashboard_stats_empty(test_db):
+    stats = dashboard.compute_dashboard_stats(test_db)
+    assert stats["total_executions"] == 0
+    assert stats["average_coverage"] == 0
+    assert stats["recent_executions"] == []
+
+
+def test_dashboard_is_cached_until_invalidated(test_db, sample_test_suite):
+    """Reads are served from cache; invalidation forces a recompute"""
+    dashboard.invalidate_dashboard_cache()
+    first = dashboard.get_dashboard_stats(test_db)
+    _add_execution(test_db, sample_test_suite, "completed", 80.0)
+
+    assert dashboard.get_dashboard_stats(test_db) is first
+
+    dashboard.invalidate_dashboard_cache()
+    assert dashboard.get_dashboard_stats(test_db)["total_executions"] == 1
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(ttl=0)
+    cache.set("key", "value")
+    assert cache.get("key") is None
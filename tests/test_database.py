@@ -0,0 +1,37 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select, text
+
+from app import models
+from app.database import Base, async_url, build_async_engine, build_engine
+
+
+def test_async_url_maps_sync_drivers():
+    assert async_url("sqlite:///./test.db") == "sqlite+aiosqlite:///./test.db"
+    assert async_url("postgresql+psycopg2://u:p@db:5432/app") == \
+        "postgresql+asyncpg://u:p@db:5432/app"
+    with pytest.raises(ValueError):
+        async_url("mysql://u:p@db/app")
+
+
+def test_sync_and_async_engines_share_sqlite_file_in_wal_mode(tmp_path):
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    engine = build_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        conn.execute(models.APISpec.__table__.insert().values(
+            name="Pets", spec_content="{}"))
+
+    async def read():
+        async_engine = build_async_engine(async_url(url))
+        try:
+            async with async_engine.connect() as conn:
+                return (await conn.execute(
+                    select(models.APISpec.name))).scalars().all()
+        finally:
+            await async_engine.dispose()
+
+    assert asyncio.run(read()) == ["Pets"]
+    engine.dispose()
@@ -0,0 +1,133 @@
+import asyncio
+import json
+from unittest.mock import patch
+
+import responses
+from app import models
+from app.routers.test_execution import _stream_events
+from app.services import execution_events
+from app.services.execution_runner import run_execution
+from app.services.test_executor import TestExecutor
+
+
+def _collect(stream):
+    async def consume():
+        return [chunk async for chunk in stream]
+    return asyncio.run(consume())
+
+
+def _parse(chunks):
+    events = []
+    for chunk in chunks:
+        fields = dict(line.split(": ", 1) for line in chunk.strip().split("\n"))
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+@responses.activate
+def test_results_are_published_as_they_complete():
+    """on_result fires once per test with the test's suite index"""
+    responses.add(responses.GET, "http://localhost:8000/ok", status=200)
+    seen = []
+
+    TestExecutor("http://localhost:8000", concurrency=3).execute_test_suite(
+        [{"name": f"T{i}", "method": "GET", "endpoint": "/ok",
+          "expected_status": 200} for i in range(5)],
+        on_result=lambda index, result: seen.append((index, result["name"]))
+    )
+
+    assert sorted(seen) == [(i, f"T{i}") for i in range(5)]
+
+
+def test_stream_replays_buffer_and_ends_on_complete():
+    """A stream sends start, every buffered result, then complete"""
+    buffer = execution_events.open_buffer(9001, total_tests=2)
+    buffer.append("result", {"index": 0, "name": "first", "status": "passed"})
+    buffer.append("result", {"index": 1, "name": "second", "status": "failed"})
+    buffer.complete({"status": "completed", "passed_tests": 1,
+                     "failed_tests": 1})
+
+    events = _parse(_collect(_stream_events(9001, buffer, after=-1)))
+
+    assert [e[0] for e in events] == ["start", "result", "result", "complete"]
+    assert events[0][1]["total_tests"] == 2
+    assert events[2][1]["name"] == "second"
+    assert events[3][1]["failed_tests"] == 1
+
+
+def test_stream_resumes_after_last_event_id():
+    """Events at or before `after` are not re-sent"""
+    buffer = execution_events.open_buffer(9002, total_tests=3)
+    for index in range(3):
+        buffer.append("result", {"index": index, "name": f"T{index}"})
+    buffer.complete({"status": "completed"})
+
+    events = _parse(_collect(_stream_events(9002, buffer, after=1)))
+
+    assert [e[1].get("name") for e in events if e[0] == "result"] == ["T2"]
+
+
+def test_resume_follows_arrival_order_not_suite_order():
+    """A result that finished late but has a low index is still sent"""
+    buffer = execution_events.open_buffer(9003, total_tests=3)
+    for index in (2, 0, 1):
+        buffer.append("result", {"index": index, "name": f"T{index}"})
+    buffer.complete({"status": "completed"})
+
+    chunks = _collect(_stream_events(9003, buffer, after=0))
+    events = _parse(chunks)
+
+    assert [e[1]["name"] for e in events if e[0] == "result"] == \
+        ["T0", "T1"]
+    assert "id: 1\n" in chunks[1] and "id: 2\n" in chunks[2]
+
+
+def test_replay_resumes_from_a_live_event_id(session_factory):
+    """Ids from the live buffer mean the same thing to the stored replay"""
+    db = session_factory()
+    execution = models.TestExecution(status="running", total_tests=3)
+    db.add(execution)
+    db.commit()
+    execution_id = execution.id
+    db.close()
+    buffer = execution_events.open_buffer(execution_id, total_tests=3)
+
+    def execute(test_cases, on_result):
+        results = [{"name": c["name"], "status": "passed",
+                    "execution_time": 0.01} for c in test_cases]
+        for index in (2, 0, 1):  # finish out of suite order
+            on_result(index, results[index])
+        return {"total_tests": 3, "passed_tests": 3, "failed_tests": 0,
+                "coverage_percentage": 100.0, "execution_time": 0.1,
+                "results": results}
+
+    with patch("app.services.execution_runner.TestExecutor") as executor, \
+            patch("app.services.execution_runner."
+                  "schedule_execution_analysis"):
+        executor.return_value.execute_test_suite.side_effect = execute
+        run_execution(execution_id, [{"name": f"T{i}"} for i in range(3)],
+                      "http://x", session_factory=session_factory)
+
+    live = _collect(_stream_events(execution_id, buffer, after=-1))
+    # The client saw the first live result (T2, id 0) before reconnecting
+    # to a process without the buffer
+    assert "id: 0\n" in live[1] and '"T2"' in live[1]
+    with patch("app.routers.test_execution.SessionLocal", session_factory):
+        chunks = _collect(_stream_events(execution_id, None, after=0))
+
+    events = _parse(chunks)
+    assert [e[1]["name"] for e in events if e[0] == "result"] == \
+        ["T0", "T1"]
+    assert "id: 1\n" in chunks[1] and "id: 2\n" in chunks[2]
+    assert events[-1][0] == "complete"
+
+
+def test_stalled_buffers_are_dropped():
+    """Buffers of runs that never completed don't live forever"""
+    buffer = execution_events.open_buffer(9004, total_tests=1)
+    buffer.updated_at -= execution_events.STALLED_BUFFER_TTL + 1
+
+    execution_events.open_buffer(9005, total_tests=1)
+
+    assert execution_events.get_buffer(9004) is None
+    assert execution_events.get_buffer(9005) is not None
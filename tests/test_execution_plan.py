@@ -0,0 +1,139 @@
+import json
+import threading
+import time
+
+import responses
+
+from app.services.execution_plan import ExecutionPlan, resource_key, \
+    substitute
+from app.services.test_executor import TestExecutor
+
+
+def case(name, method, endpoint, **extra):
+    return {"name": name, "method": method, "endpoint": endpoint,
+            "expected_status": 200, **extra}
+
+
+def test_resource_key_stops_at_first_identifier():
+    assert resource_key("/users") == "/users"
+    assert resource_key("/users/42/posts") == "/users"
+    assert resource_key("/api/v1/orders/{orderId}") == "/api/v1/orders"
+
+
+def test_substitute_keeps_whole_value_types():
+    variables = {"id": 7}
+    assert substitute({"user": "{{id}}", "path": "/u/{{id}}",
+                       "other": "{{nope}}"}, variables) == \
+        {"user": 7, "path": "/u/7", "other": "{{nope}}"}
+
+
+def test_plan_chains_written_resources_and_frees_read_only_ones():
+    plan = ExecutionPlan([
+        case("create user", "POST", "/users"),
+        case("list pets", "GET", "/pets"),
+        case("get user", "GET", "/users/1"),
+        case("list pets again", "GET", "/pets"),
+        case("delete user", "DELETE", "/users/1"),
+    ])
+
+    assert plan.depends_on == [set(), set(), {0}, set(), {2}]
+    assert sorted(plan.chains()) == [[0, 2, 4], [1], [3]]
+
+
+def test_plan_edges_from_captures_and_explicit_dependencies():
+    plan = ExecutionPlan([
+        case("order", "POST", "/orders", body={"user": "{{user_id}}"}),
+        case("user", "POST", "/users", id="mk-user",
+             capture={"user_id": "id"}),
+        case("audit", "GET", "/audit", depends_on=["mk-user", "order"]),
+    ])
+
+    assert plan.depends_on == [{1}, set(), {0, 1}]
+    assert plan.order == [1, 0, 2]
+
+
+def test_plan_breaks_cycles_at_earliest_case():
+    plan = ExecutionPlan([
+        case("a", "GET", "/a", depends_on=["b"]),
+        case("b", "GET", "/b", depends_on=["a"]),
+    ])
+
+    assert plan.order == [0, 1]
+    assert plan.broken_cycles == [0]
+
+
+@responses.activate
+def test_suite_passes_captured_values_into_later_requests():
+    responses.add(responses.POST, "http://localhost:8000/users",
+                  json={"data": {"id": 41}}, status=200)
+    responses.add(responses.GET, "http://localhost:8000/users/41",
+                  json={"id": 41}, status=200)
+    responses.add(responses.POST, "http://localhost:8000/pets",
+                  json={"id": 9}, status=200)
+    responses.add(responses.DELETE, "http://localhost:8000/pets/9",
+                  status=200)
+    responses.add(responses.POST, "http://localhost:8000/templates",
+                  json={}, status=200)
+
+    results = TestExecutor("http://localhost:8000", concurrency=4) \
+        .execute_test_suite([
+            case("get", "GET", "/users/{{uid}}", headers={"X-User": "{{uid}}"}),
+            case("create", "POST", "/users", capture={"uid": "data.id"}),
+            case("create pet", "POST", "/pets",
+                 capture={"never": "no.such.path"}),
+            # Unfilled path parameter takes the id the POST created
+            case("delete pet", "DELETE", "/pets/{petId}"),
+            case("orphan", "GET", "/things/{{never}}"),
+            # Nothing captures "name", so this is plain text
+            case("template", "POST", "/templates",
+                 body={"text": "Hello {{name}}"}),
+        ])
+
+    statuses = [r["status"] for r in results["results"]]
+    assert statuses == ["passed", "passed", "passed", "passed", "failed",
+                        "passed"]
+    template = next(call.request for call in responses.calls
+                    if call.request.url.endswith("/templates"))
+    assert json.loads(template.body) == {"text": "Hello {{name}}"}
+    assert results["results"][0]["url_tested"].endswith("/users/41")
+    get_user = next(call.request for call in responses.calls
+                    if call.request.url.endswith("/users/41"))
+    assert get_user.headers["X-User"] == "41"
+    assert "Unresolved variables: never" in results["results"][4]["errors"]
+
+
+@responses.activate
+def test_independent_chains_run_concurrently_in_order():
+    lock = threading.Lock()
+    log = []
+
+    def callback(request):
+        with lock:
+            log.append(("start", request.method, request.path_url))
+        time.sleep(0.05)
+        with lock:
+            log.append(("end", request.method, request.path_url))
+        return 200, {}, "{}"
+
+    for resource in ("a", "b", "c"):
+        for method in (responses.POST, responses.DELETE):
+            responses.add_callback(method, f"http://localhost:8000/{resource}",
+                                   callback=callback)
+
+    test_cases = []
+    for resource in ("a", "b", "c"):
+        test_cases += [case(f"create {resource}", "POST", f"/{resource}"),
+                       case(f"delete {resource}", "DELETE", f"/{resource}")]
+
+    started = time.perf_counter()
+    results = TestExecutor("http://localhost:8000", concurrency=3) \
+        .execute_test_suite(test_cases)
+    elapsed = time.perf_counter() - started
+
+    assert results["passed_tests"] == 6
+    # Three chains of two side by side: about two request times, not six
+    assert elapsed < 0.25
+    for resource in ("a", "b", "c"):
+        path = f"/{resource}"
+        assert log.index(("end", "POST", path)) < \
+            log.index(("start", "DELETE", path))
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+import pytest
+from app import models
+from app.services.execution_queries import list_execution_summaries, \
+    decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def executions(test_db, sample_test_suite):
+    base = datetime(2026, 1, 1, 12, 0, 0)
+    rows = []
+    for i in range(5):
+        execution = models.TestExecution(
+            test_suite_id=sample_test_suite.id,
+            status="completed" if i % 2 == 0 else "failed",
+            total_tests=1, passed_tests=1, failed_tests=0,
+            coverage_percentage=100.0, execution_time=0.5,
+            # Two executions share a timestamp to exercise the id tiebreak
+            started_at=base + timedelta(minutes=min(i, 3)),
+            legacy_results=[{"name": "big payload"}]
+        )
+        test_db.add(execution)
+        rows.append(execution)
+    test_db.commit()
+    return rows
+
+
+def test_cursor_round_trip():
+    started_at = datetime(2026, 1, 1, 12, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(started_at, 42)) == (started_at, 42)
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_pages_cover_every_execution_once(test_db, executions):
+    """Walking the cursor visits all executions newest first, no repeats"""
+    seen = []
+    cursor = None
+    while True:
+        page = list_execution_summaries(test_db, limit=2, cursor=cursor)
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == [5, 4, 3, 2, 1]
+
+
+def test_summaries_exclude_results_and_filter(test_db, executions,
+                                              sample_test_suite):
+    """Only scalar columns come back; filters narrow the page"""
+    page = list_execution_summaries(test_db, status="completed",
+                                    test_suite_id=sample_test_suite.id)
+    assert [item["id"] for item in page["items"]] == [5, 3, 1]
+    assert "results" not in page["items"][0]
+    assert "legacy_results" not in page["items"][0]
+
+    windowed = list_execution_summaries(
+        test_db,
+        started_after=datetime(2026, 1, 1, 12, 1),
+        started_before=datetime(2026, 1, 1, 12, 3)
+    )
+    assert [item["id"] for item in windowed["items"]] == [3, 2]
@@ -0,0 +1,88 @@
+from unittest.mock import patch
+
+import pytest
+import responses
+
+from app import models
+from app.services import execution_events, result_store
+from app.services.execution_runner import run_execution
+
+
+def create_execution(db, count):
+    execution = models.TestExecution(
+        test_suite_id=None, status="running", total_tests=count,
+        passed_tests=0, failed_tests=0, coverage_percentage=0.0,
+        execution_time=0.0)
+    db.add(execution)
+    db.commit()
+    return execution.id
+
+
+@responses.activate
+def test_run_execution_commits_results_in_batches(session_factory):
+    responses.add(responses.GET, "http://localhost:8000/ok", status=200)
+    responses.add(responses.GET, "http://localhost:8000/bad", status=500)
+    cases = [{"name": f"Test {i}", "method": "GET",
+              "endpoint": "/bad" if i % 4 == 0 else "/ok",
+              "expected_status": 200} for i in range(10)]
+    db = session_factory()
+    execution_id = create_execution(db, len(cases))
+    db.close()
+
+    with patch("app.services.execution_runner.save_results",
+               wraps=result_store.save_results) as save, \
+            patch("app.services.execution_runner."
+                  "schedule_execution_analysis"):
+        run_execution(execution_id, cases, "http://localhost:8000",
+                      session_factory=session_factory, batch_size=4)
+
+    commits = [len(call.args[2]) for call in save.call_args_list]
+    assert commits == [4, 4, 2]
+    db = session_factory()
+    execution = db.get(models.TestExecution, execution_id)
+    assert execution.status == "completed"
+    assert (execution.passed_tests, execution.failed_tests) == (7, 3)
+    assert [r["name"] for r in execution.results] == \
+        [c["name"] for c in cases]
+    assert execution.latency_stats["overall"]["count"] == 10
+    db.close()
+
+
+def test_run_execution_marks_failure(session_factory):
+    db = session_factory()
+    execution_id = create_execution(db, 1)
+    db.close()
+
+    with patch("app.services.execution_runner.TestExecutor") as executor:
+        executor.return_value.execute_test_suite.side_effect = \
+            RuntimeError("boom")
+        run_execution(execution_id, [{"name": "t"}], "http://x",
+                      session_factory=session_factory)
+
+    db = session_factory()
+    execution = db.get(models.TestExecution, execution_id)
+    assert execution.status == "failed"
+    assert execution.completed_at is not None
+    db.close()
+
+
+def test_crashed_run_completes_its_event_buffer(session_factory):
+    """A run that dies while saving still ends its stream"""
+    db = session_factory()
+    execution_id = create_execution(db, 1)
+    db.close()
+    buffer = execution_events.open_buffer(execution_id, total_tests=1)
+
+    with patch("app.services.execution_runner.TestExecutor") as executor, \
+            patch("app.services.execution_runner.compute_latency_stats",
+                  side_effect=RuntimeError("disk full")):
+        executor.return_value.execute_test_suite.return_value = {
+            "total_tests": 0, "passed_tests": 0, "failed_tests": 0,
+            "coverage_percentage": 0, "execution_time": 0, "results": []}
+        with pytest.raises(RuntimeError):
+            run_execution(execution_id, [], "http://x",
+                          session_factory=session_factory)
+
+    assert buffer.is_complete
+    assert buffer.events[-1] == ("complete", {"status": "failed",
+                                              "error": "disk full"})
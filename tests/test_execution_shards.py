@@ -0,0 +1,194 @@
+import os
+import subprocess
+import sys
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.database import Base
+from app.services.execution_shards import ShardQueue, enqueue_execution, \
+    split_into_shards
+from app.services.mock_server import MockServer
+from app.utils.openapi_parser import OpenAPIParser
+
+SPEC = {"paths": {
+    "/items": {"get": {"responses": {"200": {}}},
+               "post": {"responses": {"201": {"content": {
+                   "application/json": {"example": {"id": 5}}}}}}},
+    "/items/{id}": {"delete": {"responses": {"204": {}}}},
+    "/health": {"get": {"responses": {"200": {}}}},
+}}
+
+
+def suite_cases(count):
+    cases = [{"name": "create", "method": "POST", "endpoint": "/items",
+              "expected_status": 201},
+             {"name": "delete", "method": "DELETE", "endpoint": "/items/5",
+              "expected_status": 204}]
+    cases += [{"name": f"health {i}", "method": "GET", "endpoint": "/health",
+               "expected_status": 200} for i in range(count - 2)]
+    return cases
+
+
+def create_execution(db, test_cases):
+    spec = models.APISpec(name="Shards", spec_content="{}")
+    db.add(spec)
+    db.flush()
+    suite = models.TestSuite(api_spec_id=spec.id, name="Suite",
+                             generated_tests=test_cases)
+    db.add(suite)
+    db.flush()
+    execution = models.TestExecution(
+        test_suite_id=suite.id, status="running",
+        total_tests=len(test_cases), passed_tests=0, failed_tests=0,
+        coverage_percentage=0.0, execution_time=0.0)
+    db.add(execution)
+    db.commit()
+    return execution
+
+
+def test_split_keeps_dependency_chains_together():
+    shards = split_into_shards(suite_cases(8), 3)
+
+    assert sorted(p for shard in shards for p in shard) == list(range(8))
+    assert max(map(len, shards)) - min(map(len, shards)) <= 1
+    assert any({0, 1} <= set(shard) for shard in shards)
+
+
+def test_concurrent_claims_hand_out_each_shard_once(session_factory):
+    db = session_factory()
+    execution = create_execution(db, suite_cases(12))
+    enqueue_execution(db, execution, suite_cases(12), "http://x", 6)
+    db.close()
+
+    queue = ShardQueue(session_factory=session_factory)
+    claimed, lock = [], threading.Lock()
+
+    def worker(n):
+        while True:
+            shard = queue.claim(f"worker-{n}")
+            if shard is None:
+                return
+            with lock:
+                claimed.append(shard.id)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == sorted(set(claimed))
+    assert len(claimed) == 6
+
+
+def test_expired_lease_is_reclaimed_and_stale_results_dropped(
+        session_factory):
+    db = session_factory()
+    cases = suite_cases(2)
+    execution = create_execution(db, cases)
+    enqueue_execution(db, execution, cases, "http://x", 1)
+    execution_id = execution.id
+    db.close()
+
+    queue = ShardQueue(session_factory=session_factory, lease_seconds=60)
+    stale = queue.claim("slow")
+    assert queue.claim("other") is None
+
+    db = session_factory()
+    db.query(models.ExecutionShard).update(
+        {"claimed_at": datetime.utcnow() - timedelta(minutes=5)})
+    db.commit()
+    db.close()
+
+    fresh = queue.claim("fast")
+    assert fresh.id == stale.id and fresh.attempts == 2
+
+    results = {"passed_tests": 2, "failed_tests": 0, "execution_time": 0.1,
+               "results": [{"name": c["name"], "status": "passed",
+                            "execution_time": 0.01} for c in cases]}
+    assert queue.complete(stale, "slow", results) is False
+    assert queue.complete(fresh, "fast", results) is True
+
+    db = session_factory()
+    execution = db.get(models.TestExecution, execution_id)
+    assert execution.status == "completed"
+    assert execution.passed_tests == 2
+    assert len(execution.test_results) == 2
+    db.close()
+
+
+def test_expired_lease_fails_shard_after_max_attempts(session_factory):
+    db = session_factory()
+    cases = suite_cases(2)
+    execution = create_execution(db, cases)
+    enqueue_execution(db, execution, cases, "http://x", 1)
+    execution_id = execution.id
+    db.close()
+
+    queue = ShardQueue(session_factory=session_factory, lease_seconds=60,
+                       max_attempts=2)
+    for worker in ("first", "second"):
+        assert queue.claim(worker) is not None
+        db = session_factory()
+        db.query(models.ExecutionShard).update(
+            {"claimed_at": datetime.utcnow() - timedelta(minutes=5)})
+        db.commit()
+        db.close()
+
+    assert queue.claim("third") is None
+
+    db = session_factory()
+    shard = db.query(models.ExecutionShard).one()
+    assert shard.status == "failed" and shard.attempts == 2
+    assert "Lease expired" in shard.error
+    assert db.get(models.TestExecution, execution_id).status == "failed"
+    db.close()
+
+
+@pytest.fixture
+def mock_target():
+    server = MockServer(OpenAPIParser(SPEC)).start()
+    yield server.base_url
+    server.stop()
+
+
+def test_worker_processes_merge_shards_into_execution(tmp_path,
+                                                      mock_target):
+    url = f"sqlite:///{tmp_path / 'shards.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    cases = suite_cases(30)
+    db = Session()
+    execution = create_execution(db, cases)
+    enqueue_execution(db, execution, cases, mock_target, 5, concurrency=2)
+    execution_id = execution.id
+    db.close()
+
+    env = {**os.environ, "DATABASE_URL": url,
+           "AUTO_ANALYZE_EXECUTIONS": "false"}
+    workers = [subprocess.Popen(
+        [sys.executable, "-m", "app.worker", "--once",
+         "--worker-id", f"w{n}"], env=env, stdout=subprocess.DEVNULL)
+        for n in range(3)]
+    for worker in workers:
+        assert worker.wait(timeout=60) == 0
+
+    db = Session()
+    execution = db.get(models.TestExecution, execution_id)
+    assert execution.status == "completed"
+    assert execution.passed_tests == 30
+    assert execution.latency_stats["overall"]["count"] == 30
+    assert [r["name"] for r in execution.results] == \
+        [c["name"] for c in cases]
+    shards = db.query(models.ExecutionShard).all()
+    assert {s.status for s in shards} == {"completed"}
+    assert all(s.attempts == 1 for s in shards)
+    db.close()
+    engine.dispose()
@@ -38,6 +38,9 @@ def test_execute_test_case_success(test_executor, sample_test_case):
     assert result["status"] == "passed"
     assert result["actual_status"] == 200
     assert len(result["errors"]) == 0
+    timings = result["timings"]
+    assert all(timings[phase] >= 0 for phase in ("queue", "headers", "body"))
+    assert sum(timings.values()) <= result["execution_time"]
 
 
 @responses.activate
@@ -139,3 +142,60 @@ def test_validate_response_missing_key(test_executor):
 
     assert result["status"] == "failed"
     assert len(result["errors"]) > 0
+
+
+@responses.activate
+def test_execute_test_suite_concurrent_matches_sequential():
+    """Concurrent mode keeps result order and totals identical"""
+    responses.add(responses.GET, "http://localhost:8000/ok", status=200)
+    responses.add(responses.GET, "http://localhost:8000/missing", status=404)
+
+    test_cases = [
+        {"name": f"Test {i}", "method": "GET",
+         "endpoint": "/ok" if i % 3 else "/missing", "expected_status": 200}
+        for i in range(12)
+    ]
+
+    sequential = TestExecutor("http://localhost:8000").execute_test_suite(
+        test_cases)
+    concurrent = TestExecutor("http://localhost:8000",
+                              concurrency=4).execute_test_suite(test_cases)
+
+    assert [r["name"] for r in concurrent["results"]] == \
+        [tc["name"] for tc in test_cases]
+    for key in ("total_tests", "passed_tests", "failed_tests",
+                "coverage_percentage"):
+        assert concurrent[key] == sequential[key]
+
+
+@responses.activate
+def test_execute_test_suite_respects_per_host_cap():
+    """No more than max_per_host requests are in flight at once"""
+    import threading
+    import time
+
+    lock = threading.Lock()
+    state = {"in_flight": 0, "peak": 0}
+
+    def slow_callback(request):
+        with lock:
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+        time.sleep(0.02)
+        with lock:
+            state["in_flight"] -= 1
+        return 200, {}, "{}"
+
+    responses.add_callback(responses.GET, "http://localhost:8000/slow",
+                           callback=slow_callback)
+
+    executor = TestExecutor("http://localhost:8000", concurrency=8,
+                            max_per_host=2)
+    results = executor.execute_test_suite([
+        {"name": f"Slow {i}", "method": "GET", "endpoint": "/slow",
+         "expected_status": 200}
+        for i in range(10)
+    ])
+
+    assert results["passed_tests"] == 10
+    assert state["peak"] <= 2
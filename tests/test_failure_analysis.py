@@ -0,0 +1,53 @@
+from app.services.failure_analysis import cluster_failures, \
+    endpoint_breakdown, error_signature, fit_to_budget, normalize_endpoint
+
+
+def _failure(name, endpoint="/users/1", actual=500, error=None):
+    return {"name": name, "method": "GET", "endpoint": endpoint,
+            "status": "failed", "expected_status": 200,
+            "actual_status": actual,
+            "errors": [error or f"Expected status 200, got {actual}"]}
+
+
+def test_normalize_endpoint_collapses_ids():
+    assert normalize_endpoint("/users/42?expand=1") == "/users/{id}"
+    assert normalize_endpoint(
+        "/orders/3f2b9c1e-8a4d-4b6e-9f1a-2c3d4e5f6a7b/items") == \
+        "/orders/{id}/items"
+    assert normalize_endpoint("users") == "/users"
+
+
+def test_error_signature_masks_volatile_parts():
+    assert error_signature(["Timeout after 30.5s on http://a/b/1"]) == \
+        error_signature(["Timeout after 12s on http://c/d"])
+
+
+def test_cluster_failures_groups_and_orders_by_size():
+    """Same endpoint/status/error collapse into one cluster"""
+    results = [
+        _failure("a", "/users/1"),
+        _failure("b", "/users/2"),
+        _failure("c", "/users/3"),
+        _failure("d", "/users/4", actual=404),
+        {"name": "ok", "method": "GET", "endpoint": "/users",
+         "status": "passed"}
+    ]
+
+    clusters = cluster_failures(results)
+
+    assert [c["count"] for c in clusters] == [3, 1]
+    assert clusters[0]["endpoint"] == "/users/{id}"
+    assert clusters[0]["example_tests"] == ["a", "b", "c"]
+    assert clusters[1]["actual_status"] == 404
+    assert cluster_failures(results)[0]["signature"] == \
+        clusters[0]["signature"]
+
+
+def test_endpoint_breakdown_and_budget():
+    results = [_failure("a"), _failure("b", "/orders"),
+               {"method": "GET", "endpoint": "/orders", "status": "passed"}]
+    breakdown = endpoint_breakdown(results)
+    assert {"endpoint": "GET /orders", "passed": 1, "failed": 1} in breakdown
+
+    items = [{"text": "x" * 400} for _ in range(10)]
+    assert len(fit_to_budget(items, token_budget=350)) == 3
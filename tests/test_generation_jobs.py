@@ -0,0 +1,126 @@
+import json
+from unittest.mock import Mock
+
+import pytest
+from app import models
+from app.services.generation_jobs import run_generation_job
+from app.services.test_generator import TestGenerator
+
+
+@pytest.fixture
+def job_id(session_factory):
+    db = session_factory()
+    spec = models.APISpec(name="Jobs API", spec_content=json.dumps({
+        "paths": {
+            "/users": {"get": {"responses": {"200": {}}}},
+            "/users/{id}": {"get": {"responses": {"200": {}}}},
+            "/orders": {"post": {"responses": {"201": {}}}}
+        }
+    }))
+    db.add(spec)
+    db.commit()
+    job = models.GenerationJob(api_spec_id=spec.id, status="running")
+    db.add(job)
+    db.commit()
+    job_id = job.id
+    db.close()
+    return job_id
+
+
+def _generator(side_effect):
+    generator = TestGenerator(max_workers=2)
+    generator.ai_service = Mock(model="llama3.2")
+    generator.ai_service.generate_test_cases.side_effect = side_effect
+    return generator
+
+
+def test_run_generation_job_records_progress(session_factory, job_id):
+    """A job creates the suite and counts completed and failed endpoints"""
+    def fake_generate(spec, path, method, **kwargs):
+        if method == "POST":
+            raise RuntimeError("model overloaded")
+        return [{"name": f"{method} {path}"}]
+
+    run_generation_job(job_id, session_factory=session_factory,
+                       generator=_generator(fake_generate))
+
+    db = session_factory()
+    job = db.query(models.GenerationJob).filter_by(id=job_id).one()
+    assert job.status == "completed"
+    assert job.total_endpoints == 3
+    assert job.completed_endpoints == 2
+    assert job.failed_endpoints == 1
+    assert job.completed_at is not None
+    assert len(job.test_suite.generated_tests) == 2
+    assert job.test_suite.generation_errors[0]["method"] == "POST"
+    db.close()
+
+
+def test_run_generation_job_fails_without_test_cases(session_factory, job_id):
+    """A job with no generated cases ends up failed without a suite"""
+    run_generation_job(job_id, session_factory=session_factory,
+                       generator=_generator(lambda *a, **kw: []))
+
+    db = session_factory()
+    job = db.query(models.GenerationJob).filter_by(id=job_id).one()
+    assert job.status == "failed"
+    assert job.test_suite_id is None
+    assert job.failed_endpoints == 3
+    db.close()
+
+
+def test_run_generation_job_applies_spec_update(session_factory, job_id):
+    """An update job regenerates changed operations, then stores the spec"""
+    db = session_factory()
+    job = db.query(models.GenerationJob).filter_by(id=job_id).one()
+    db.add(models.TestSuite(api_spec_id=job.api_spec_id, generated_tests=[
+        {"name": "old users", "method": "GET", "endpoint": "/users",
+         "operation": "GET /users"}]))
+    job.spec_content = json.dumps({"paths": {
+        "/users": {"get": {"responses": {"200": {}}}},
+        "/items": {"get": {"responses": {"200": {}}}}
+    }})
+    job.spec_name = "Jobs API v2"
+    db.commit()
+    db.close()
+
+    generator = _generator(lambda spec, path, method, **kw: [
+        {"name": f"{method} {path}"}])
+    run_generation_job(job_id, session_factory=session_factory,
+                       generator=generator)
+
+    db = session_factory()
+    job = db.query(models.GenerationJob).filter_by(id=job_id).one()
+    assert job.status == "completed"
+    assert job.diff["added"] == ["GET /items"]
+    assert job.diff["regenerated"] == ["GET /items"]
+    assert job.total_endpoints == 2
+    assert job.completed_endpoints == 2
+    assert [c["name"] for c in job.test_suite.generated_tests] == \
+        ["old users", "GET /items"]
+    assert job.api_spec.name == "Jobs API v2"
+    assert "/items" in job.api_spec.spec_content
+    assert generator.ai_service.generate_test_cases.call_count == 1
+    db.close()
+
+
+def test_failed_spec_update_keeps_the_stored_spec(session_factory, job_id):
+    """With nothing generated, the spec stays the version the suite has"""
+    db = session_factory()
+    job = db.query(models.GenerationJob).filter_by(id=job_id).one()
+    original = job.api_spec.spec_content
+    job.spec_content = json.dumps({"paths": {
+        "/items": {"get": {"responses": {"200": {}}}}}})
+    job.spec_name = "Jobs API v2"
+    db.commit()
+    db.close()
+
+    run_generation_job(job_id, session_factory=session_factory,
+                       generator=_generator(lambda *a, **kw: []))
+
+    db = session_factory()
+    job = db.query(models.GenerationJob).filter_by(id=job_id).one()
+    assert job.status == "failed"
+    assert job.api_spec.spec_content == original
+    assert job.api_spec.name == "Jobs API"
+    db.close()
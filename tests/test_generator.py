@@ -1,5 +1,7 @@
 import pytest
 from app.services.test_generator import TestGenerator
+from app.utils.openapi_parser import OpenAPIParser
+from app.services.prompt_builder import PromptBuilder
 from unittest.mock import Mock, patch
 import json
 
@@ -86,3 +88,170 @@ def test_generate_tests_no_edge_cases(mock_ai_service, test_generator,
     call_args = mock_ai.generate_test_cases.call_args_list
     for call in call_args:
         assert call[1]['include_edge_cases'] == False
+
+
+def test_generate_tests_keeps_spec_order_and_reports_failures(sample_spec):
+    """Parallel generation returns cases in spec order and lists failures"""
+    generator = TestGenerator(max_workers=4)
+
+    def fake_generate(endpoint_spec, path, method, **kwargs):
+        if path == "/users/{id}":
+            raise TimeoutError("timed out")
+        return [{"name": f"{method} {path}", "method": method,
+                 "endpoint": path, "expected_status": 200}]
+
+    generator.ai_service = Mock()
+    generator.ai_service.generate_test_cases.side_effect = fake_generate
+
+    spec = json.loads(sample_spec)
+    spec["paths"]["/orders"] = {"get": {"responses": {"200": {}}}}
+    tests = generator.generate_tests_for_spec(json.dumps(spec))
+
+    assert [t["endpoint"] for t in tests] == ["/users", "/orders"]
+    assert generator.failures == [{
+        "path": "/users/{id}",
+        "method": "GET",
+        "error": "TimeoutError: timed out"
+    }]
+
+
+def test_generate_tests_reports_empty_endpoint_output(test_generator,
+                                                      sample_spec):
+    """An endpoint that yields no cases is reported, not silently skipped"""
+    test_generator.ai_service = Mock()
+    test_generator.ai_service.generate_test_cases.return_value = []
+
+    tests = test_generator.generate_tests_for_spec(sample_spec)
+
+    assert tests == []
+    assert len(test_generator.failures) == 2
+    assert all(f["error"] == "No test cases produced"
+               for f in test_generator.failures)
+
+
+def test_generate_incremental_only_regenerates_changed_operations():
+    """Unchanged operations reuse previous cases; others are regenerated"""
+    old_spec = {"paths": {
+        "/users": {
+            "get": {"responses": {"200": {}}},
+            "post": {"responses": {"201": {}}}
+        },
+        "/users/{id}": {"get": {"responses": {"200": {}}}},
+        "/legacy": {"get": {"responses": {"200": {}}}}
+    }}
+    new_spec = json.loads(json.dumps(old_spec))
+    new_spec["paths"]["/users"]["post"]["responses"]["400"] = {}
+    new_spec["paths"]["/orders"] = {"get": {"responses": {"200": {}}}}
+    del new_spec["paths"]["/legacy"]
+
+    previous_tests = [
+        {"name": "old list", "method": "GET", "endpoint": "/users",
+         "operation": "GET /users"},
+        {"name": "old create", "method": "POST", "endpoint": "/users",
+         "operation": "POST /users"},
+        # Untagged case from before operations were recorded
+        {"name": "old get", "method": "GET", "endpoint": "/users/7"},
+        {"name": "old legacy", "method": "GET", "endpoint": "/legacy"}
+    ]
+
+    generator = TestGenerator()
+    generator.ai_service = Mock()
+    generator.ai_service.generate_test_cases.side_effect = \
+        lambda spec, path, method, **kw: [{"name": f"new {method} {path}"}]
+
+    tests, diff = generator.generate_incremental(
+        json.dumps(old_spec), json.dumps(new_spec), previous_tests)
+
+    assert diff["added"] == ["GET /orders"]
+    assert diff["changed"] == ["POST /users"]
+    assert diff["removed"] == ["GET /legacy"]
+    assert sorted(diff["regenerated"]) == ["GET /orders", "POST /users"]
+    assert generator.ai_service.generate_test_cases.call_count == 2
+    assert [t["name"] for t in tests] == [
+        "old list", "new POST /users", "old get", "new GET /orders"
+    ]
+
+
+def test_generate_incremental_keeps_cached_and_mislabelled_cases():
+    """Cache hits are tagged too, and the LLM's own "operation" is ignored"""
+    old_spec = {"paths": {"/users": {"get": {"responses": {"200": {}}}}}}
+    new_spec = {"paths": {
+        "/users": {"get": {"responses": {"200": {}}}},
+        "/orders": {"get": {"responses": {"200": {}}}},
+        "/items": {"get": {"responses": {"200": {}}}}
+    }}
+
+    cache = Mock()
+    # Stored untagged, as by versions before cases carried an operation
+    cache.get.side_effect = lambda key: [{"name": "cached orders"}] \
+        if key == orders_key else None
+    generator = TestGenerator(cache=cache)
+    generator.ai_service = Mock()
+    generator.ai_service.generate_test_cases.side_effect = \
+        lambda spec, path, method, **kw: [{"name": f"new {path}",
+                                          "operation": "GET /elsewhere"}]
+    orders_key = generator._prepare(
+        OpenAPIParser(new_spec).get_endpoints()[1], True,
+        PromptBuilder())["cache_key"]
+
+    tests, _ = generator.generate_incremental(
+        json.dumps(old_spec), json.dumps(new_spec),
+        [{"name": "old users", "operation": "GET /users"}])
+
+    assert [(t["name"], t["operation"]) for t in tests] == [
+        ("old users", "GET /users"),
+        ("cached orders", "GET /orders"),
+        ("new /items", "GET /items")
+    ]
+
+
+def test_batched_mode_groups_small_endpoints():
+    """Small endpoints share one call; big ones and batch misses go alone"""
+    big_schema = {"type": "object", "properties": {
+        f"field_{i}": {"type": "string", "format": "uuid"}
+        for i in range(80)}}
+    spec = {"paths": {
+        "/a": {"get": {"responses": {"200": {}}}},
+        "/b": {"get": {"responses": {"200": {}}}},
+        "/big": {"post": {"requestBody": {"content": {
+            "application/json": {"schema": big_schema}}},
+            "responses": {"201": {}}}},
+        "/c": {"get": {"responses": {"200": {}}}}
+    }}
+
+    generator = TestGenerator(max_workers=1)
+    generator.ai_service = Mock(model="llama3.2")
+    generator.ai_service.generate_test_cases.side_effect = \
+        lambda spec, path, method, **kw: [{"name": f"single {path}"}]
+    # The model skipped GET /c
+    generator.ai_service.generate_test_cases_batch.side_effect = \
+        lambda specs, **kw: {f"GET {s['path']}": [{"name": f"batch {s['path']}"}]
+                             for s in specs if s["path"] != "/c"}
+
+    parser = OpenAPIParser(spec)
+    tests = generator.generate_tests_for_endpoints(
+        parser.get_endpoints(), parser=parser, mode="batched")
+
+    assert [t["name"] for t in tests] == [
+        "batch /a", "batch /b", "single /big", "single /c"]
+    batch_specs = generator.ai_service.generate_test_cases_batch.call_args[0][0]
+    assert [s["path"] for s in batch_specs] == ["/a", "/b", "/c"]
+    assert generator.last_run["mode"] == "batched"
+    assert generator.last_run["batches"] == 1
+    # One batch, /big alone, and the /c retry
+    assert generator.last_run["llm_calls"] == 3
+
+
+def test_plan_batches_respects_budget_and_size():
+    """Batches close when the token budget or size limit would be exceeded"""
+    generator = TestGenerator()
+    generator.batch_token_budget = 30
+    generator.batch_max_endpoint_tokens = 20
+    generator.batch_max_size = 2
+    specs = [{"d": "x" * 40}, {"d": "x" * 40}, {"d": "x" * 40},
+             {"d": "x" * 200}, {"d": "x" * 10}]
+
+    units = generator.plan_batches(list(range(len(specs))), specs)
+
+    # Index 3 is too big to batch and goes alone; 4 joins the open batch
+    assert units == [[0, 1], [3], [2, 4]]
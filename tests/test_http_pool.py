@@ -0,0 +1,96 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from app.services.http_pool import SessionPool
+from app.services.test_executor import TestExecutor
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200 if self.path != "/private"
+                           or self.headers.get("Cookie") else 401)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if self.path == "/login":
+            self.send_header("Set-Cookie", "session=abc; Path=/")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def local_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_session_is_shared_per_base_url():
+    """The same base_url always maps to the same session"""
+    pool = SessionPool()
+    assert pool.get_session("http://api.local/") is \
+        pool.get_session("http://api.local")
+    assert pool.get_session("http://api.local") is not \
+        pool.get_session("http://other.local")
+
+
+def test_connections_are_reused_across_suites(local_server):
+    """Sequential requests ride one keep-alive connection"""
+    pool = SessionPool()
+    test_cases = [
+        {"name": f"Ping {i}", "method": "GET", "endpoint": "/ping",
+         "expected_status": 200}
+        for i in range(5)
+    ]
+
+    for _ in range(2):
+        executor = TestExecutor(local_server, session_pool=pool)
+        results = executor.execute_test_suite(test_cases)
+        assert results["passed_tests"] == 5
+
+    stats = pool.stats()[local_server]
+    assert stats["requests_sent"] == 10
+    assert stats["connections_opened"] == 1
+    pool.close()
+
+
+def test_keep_alive_disabled_opens_connection_per_request(local_server):
+    """With keep-alive off every request needs a fresh connection"""
+    pool = SessionPool(keep_alive=False)
+    executor = TestExecutor(local_server, session_pool=pool)
+    executor.execute_test_suite([
+        {"name": f"Ping {i}", "method": "GET", "endpoint": "/ping",
+         "expected_status": 200}
+        for i in range(3)
+    ])
+
+    stats = pool.stats()[local_server]
+    assert stats["requests_sent"] == 3
+    assert stats["connections_opened"] == 3
+    pool.close()
+
+
+def test_cookies_do_not_leak_between_executions(local_server):
+    """A Set-Cookie from one execution isn't sent by the next one"""
+    pool = SessionPool()
+    login = [{"name": "Login", "method": "GET", "endpoint": "/login",
+              "expected_status": 200}]
+    private = [{"name": "Private without login", "method": "GET",
+                "endpoint": "/private", "expected_status": 401}]
+
+    TestExecutor(local_server, session_pool=pool).execute_test_suite(login)
+    results = TestExecutor(local_server, session_pool=pool) \
+        .execute_test_suite(private)
+
+    assert results["passed_tests"] == 1
+    assert not pool.get_session(local_server).cookies
+    pool.close()
@@ -0,0 +1,61 @@
+from app.utils.json_stream import JSONArrayStreamParser
+
+
+def _feed_all(text, chunk_size=1):
+    parser = JSONArrayStreamParser()
+    emitted = []
+    for i in range(0, len(text), chunk_size):
+        emitted.append(parser.feed(text[i:i + chunk_size]))
+    return parser, emitted
+
+
+def test_objects_are_emitted_as_soon_as_they_close():
+    text = '[{"a": 1}, {"b": [1, {"c": 2}]}]'
+    parser, emitted = _feed_all(text)
+
+    flat = [obj for batch in emitted for obj in batch]
+    assert flat == [{"a": 1}, {"b": [1, {"c": 2}]}]
+    # The first object is available right after its closing brace
+    assert emitted[text.index("}")] == [{"a": 1}]
+    assert parser.done
+
+
+def test_strings_with_brackets_and_escapes():
+    text = 'Here you go:\n```json\n[{"s": "a ] } [ {", "q": "say \\"hi\\""}]```'
+    parser, emitted = _feed_all(text, chunk_size=3)
+
+    assert [obj for batch in emitted for obj in batch] == \
+        [{"s": "a ] } [ {", "q": 'say "hi"'}]
+
+
+def test_array_inside_wrapper_object():
+    parser = JSONArrayStreamParser()
+    assert parser.feed('{"test_cases": [{"x": 1}, {"y": 2}]}') == \
+        [{"x": 1}, {"y": 2}]
+    assert parser.done
+
+
+def test_truncated_and_invalid_objects():
+    parser = JSONArrayStreamParser()
+    objects = parser.feed('[{"ok": 1}, {"bad": tru}, {"cut": "of')
+
+    assert objects == [{"ok": 1}]
+    assert parser.invalid_objects == 1
+    assert parser.found_array and not parser.done
+
+
+def test_bare_object_is_not_mistaken_for_the_array():
+    """A single case's own arrays (assertions) are not the case list"""
+    parser = JSONArrayStreamParser()
+    text = '{"name": "Get user", "method": "GET", "assertions": ["a", "b"]}'
+
+    assert parser.feed(text) == []
+    assert not parser.found_array and not parser.done
+
+
+def test_wrapper_with_earlier_array_field():
+    parser = JSONArrayStreamParser()
+    text = '{"notes": [{"n": 1}], "test_cases": [{"x": 1}, {"y": 2}]}'
+
+    assert [obj for batch in _feed_all(text, chunk_size=4)[1]
+            for obj in batch] == [{"x": 1}, {"y": 2}]
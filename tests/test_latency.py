@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+from app import models
+from app.services.latency_stats import compute_latency_stats, latency_trends
+from app.utils.latency import LatencyHistogram
+
+
+def test_histogram_percentiles_are_close_to_exact():
+    """Bucketed percentiles stay within the bucket growth factor"""
+    samples = [i / 1000 for i in range(1, 1001)]  # 1..1000 ms
+    histogram = LatencyHistogram.of(samples)
+
+    for q, exact in ((50, 500), (90, 900), (99, 990)):
+        assert abs(histogram.percentile(q) - exact) / exact < 0.06
+    assert histogram.percentile(100) <= 1000
+
+
+def test_histogram_round_trips_and_merges():
+    first = LatencyHistogram.of([0.010, 0.020])
+    second = LatencyHistogram.from_dict(
+        LatencyHistogram.of([0.200]).to_dict())
+
+    first.merge(second)
+
+    assert first.count == 3
+    assert first.max == 200
+    assert abs(first.percentile(99) - 200) / 200 < 0.06
+    assert len(first.to_dict()["buckets"]) == 3
+
+
+def test_compute_latency_stats_groups_by_endpoint():
+    results = [
+        {"method": "GET", "endpoint": "/users/1", "execution_time": 0.01,
+         "timings": {"queue": 0.0, "headers": 0.008, "body": 0.001}},
+        {"method": "GET", "endpoint": "/users/2", "execution_time": 0.03},
+        {"method": "POST", "endpoint": "/users", "execution_time": 0.1},
+    ]
+
+    stats = compute_latency_stats(results)
+
+    assert stats["overall"]["count"] == 3
+    assert set(stats["endpoints"]) == {"GET /users/{id}", "POST /users"}
+    assert stats["endpoints"]["GET /users/{id}"]["count"] == 2
+    assert stats["phases"]["headers"]["count"] == 1
+    assert compute_latency_stats([]) is None
+
+
+def test_latency_trends_reads_stored_stats(test_db, sample_test_suite):
+    """Trends come back oldest first, overall or for one endpoint"""
+    start = datetime(2024, 1, 1)
+    for i, seconds in enumerate((0.01, 0.02, 0.04)):
+        test_db.add(models.TestExecution(
+            test_suite_id=sample_test_suite.id, status="completed",
+            started_at=start + timedelta(minutes=i),
+            latency_stats=compute_latency_stats([
+                {"method": "GET", "endpoint": "/test",
+                 "execution_time": seconds}])
+        ))
+    test_db.add(models.TestExecution(test_suite_id=sample_test_suite.id,
+                                     status="running", started_at=start))
+    test_db.commit()
+
+    points = latency_trends(test_db, limit=2)
+    assert [round(p["p50"]) for p in points] == [20, 40]
+
+    points = latency_trends(test_db, test_suite_id=sample_test_suite.id,
+                            endpoint="GET /test")
+    assert len(points) == 3
+    assert latency_trends(test_db, endpoint="GET /missing") == []
@@ -0,0 +1,97 @@
+import json
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+import pytest
+from app import models
+from app.services.llm_cache import LLMCache
+from app.services.test_generator import TestGenerator
+
+
+@pytest.fixture
+def cache(session_factory):
+    return LLMCache(namespace="test", session_factory=session_factory,
+                    max_entries=3)
+
+
+def test_make_key_is_order_independent():
+    """Keys depend on content, not on dict ordering"""
+    assert LLMCache.make_key(a=1, b={"x": 1, "y": 2}) == \
+        LLMCache.make_key(b={"y": 2, "x": 1}, a=1)
+    assert LLMCache.make_key(a=1) != LLMCache.make_key(a=2)
+
+
+def test_get_set_and_counters(cache):
+    """Stored values round-trip and hits/misses are counted"""
+    before = cache.stats()
+    assert cache.get("k1") is None
+    cache.set("k1", [{"name": "cached"}])
+    assert cache.get("k1") == [{"name": "cached"}]
+
+    after = cache.stats()
+    assert after["hits"] - before["hits"] == 1
+    assert after["misses"] - before["misses"] == 1
+    assert after["entries"] == 1
+
+
+def test_evicts_least_recently_used_over_capacity(cache):
+    """Only max_entries entries are kept"""
+    for i in range(4):
+        cache.set(f"k{i}", [i])
+
+    assert cache.stats()["entries"] == 3
+    assert cache.get("k0") is None
+    assert cache.get("k3") == [3]
+
+
+def test_evicts_least_recently_used_over_max_bytes(session_factory):
+    """Entries are dropped oldest first until the payloads fit max_bytes"""
+    cache = LLMCache(namespace="bytes", session_factory=session_factory,
+                     max_entries=100, max_bytes=250)
+    for i in range(3):
+        cache.set(f"k{i}", ["x" * 95])  # 101 bytes each
+    assert cache.get("k0") is None
+    assert cache.get("k1") == ["x" * 95]
+
+    cache.set("k3", ["x" * 95])  # k2 is now the least recently used
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["total_bytes"] <= 250
+    assert cache.get("k2") is None
+    assert cache.get("k3") is not None
+
+
+def test_expired_entries_are_misses(cache, session_factory):
+    """Entries older than max_age are dropped on read"""
+    cache.set("old", [1])
+    db = session_factory()
+    entry = db.query(models.LLMCacheEntry).get("old")
+    entry.created_at = datetime.utcnow() - timedelta(days=365)
+    db.commit()
+    db.close()
+
+    assert cache.get("old") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_unchanged_spec_makes_no_llm_calls(session_factory):
+    """Regenerating the same spec is served entirely from the cache"""
+    spec = json.dumps({"paths": {
+        "/users": {"get": {"responses": {"200": {}}}},
+        "/users/{id}": {"delete": {"responses": {"204": {}}}}
+    }})
+    cache = LLMCache(session_factory=session_factory)
+    generator = TestGenerator(cache=cache)
+    generator.ai_service = Mock(model="llama3.2")
+    generator.ai_service.generate_test_cases.side_effect = \
+        lambda spec, path, method, **kw: [{"name": f"{method} {path}"}]
+
+    first = generator.generate_tests_for_spec(spec)
+    assert generator.ai_service.generate_test_cases.call_count == 2
+
+    second = generator.generate_tests_for_spec(spec)
+    assert second == first
+    assert generator.ai_service.generate_test_cases.call_count == 2
+
+    generator.generate_tests_for_spec(spec, bypass_cache=True)
+    assert generator.ai_service.generate_test_cases.call_count == 4
@@ -0,0 +1,116 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from app import models
+from app.services.http_pool import SessionPool, default_pool
+from app.services.load_tester import LoadTester, run_load_execution
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/slow":
+            time.sleep(0.05)
+        status = 500 if self.path == "/broken" else 200
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+CASES = [
+    {"name": "ok", "method": "GET", "endpoint": "/ok", "expected_status": 200},
+    {"name": "broken", "method": "GET", "endpoint": "/broken",
+     "expected_status": 200},
+]
+
+
+def test_open_loop_sends_at_target_rate(stub_server):
+    """Requests follow the schedule and errors are counted"""
+    tester = LoadTester(stub_server, rps=40, duration=0.5,
+                        session_pool=SessionPool())
+
+    report = tester.run(CASES)
+
+    assert report["requests"] == 20
+    assert report["failed"] == 10
+    assert report["error_rate"] == 0.5
+    assert report["top_errors"][0]["count"] == 10
+    assert set(report["latency"]["endpoints"]) == {"GET /ok", "GET /broken"}
+    assert report["latency"]["overall"]["count"] == 20
+
+
+def test_open_loop_latency_includes_queueing(stub_server):
+    """With too few workers, latency counts from the scheduled start"""
+    slow = [{"name": "slow", "method": "GET", "endpoint": "/slow",
+             "expected_status": 200}]
+    tester = LoadTester(stub_server, rps=100, duration=0.2, max_workers=1,
+                        session_pool=SessionPool())
+
+    report = tester.run(slow)
+
+    # 20 requests at 50 ms each through one worker: the last one waits
+    # for ~19 before it, which a per-request timer would hide
+    assert report["latency"]["overall"]["p99"] > 500
+    assert report["max_schedule_lag_ms"] > 500
+
+
+def test_closed_loop_and_execution_record(stub_server, session_factory):
+    db = session_factory()
+    suite = models.TestSuite(name="Load", generated_tests=CASES[:1])
+    db.add(suite)
+    db.commit()
+    execution = models.TestExecution(test_suite_id=suite.id,
+                                     execution_type="load", status="running")
+    db.add(execution)
+    db.commit()
+    execution_id = execution.id
+    db.close()
+
+    run_load_execution(execution_id, CASES[:1], stub_server, concurrency=2,
+                       duration=0.2, session_factory=session_factory)
+
+    db = session_factory()
+    execution = db.query(models.TestExecution).filter_by(
+        id=execution_id).one()
+    assert execution.status == "completed"
+    assert execution.total_tests > 0
+    assert execution.failed_tests == 0
+    assert execution.load_stats["mode"] == "concurrency"
+    assert execution.load_stats["throughput"] > 0
+    assert execution.latency_stats["overall"]["count"] == \
+        execution.total_tests
+    db.close()
+
+
+def test_load_run_gets_its_own_session_pool(stub_server):
+    """Load runs don't use the shared pool, and close theirs when done"""
+    tester = LoadTester(stub_server, concurrency=3, duration=0.1)
+    adapter = tester.executor.session.get_adapter(stub_server)
+    assert adapter._pool_maxsize == 3
+    assert tester.executor.session is not \
+        default_pool.get_session(stub_server)
+
+    tester.run(CASES[:1])
+    assert tester._own_pool.stats() == {}
+
+
+def test_load_tester_requires_one_shape():
+    with pytest.raises(ValueError):
+        LoadTester("http://localhost", rps=10, concurrency=2)
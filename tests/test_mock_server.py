@@ -0,0 +1,99 @@
+import time
+
+import pytest
+import requests
+
+from app.services.mock_server import MockServer, MockServerRegistry, \
+    example_from_schema
+from app.utils.openapi_parser import OpenAPIParser
+from app.services.test_executor import TestExecutor
+from app.services.http_pool import SessionPool
+
+
+SPEC = {
+    "paths": {
+        "/pets": {
+            "get": {"responses": {"200": {"content": {"application/json": {
+                "schema": {"type": "array",
+                           "items": {"$ref": "#/components/schemas/Pet"}}}}}}},
+            "post": {"responses": {
+                "201": {"content": {"application/json": {
+                    "example": {"id": 7, "name": "rex"}}}},
+                "400": {"description": "Bad request"}}}
+        },
+        "/pets/{petId}": {
+            "delete": {"responses": {"204": {"description": "Deleted"}}}
+        }
+    },
+    "components": {"schemas": {"Pet": {
+        "type": "object",
+        "properties": {"id": {"type": "integer"},
+                       "status": {"type": "string",
+                                  "enum": ["available", "sold"]},
+                       "born": {"type": "string", "format": "date"}}
+    }}}
+}
+
+
+@pytest.fixture
+def mock_server():
+    server = MockServer(OpenAPIParser(SPEC)).start()
+    yield server
+    server.stop()
+
+
+def test_example_from_schema():
+    assert example_from_schema({"type": "object", "properties": {
+        "tags": {"type": "array", "items": {"type": "string"}},
+        "ok": {"type": "boolean"}}}) == {"tags": ["string"], "ok": True}
+    assert example_from_schema({"oneOf": [{"type": "integer"}]}) == 1
+
+
+def test_mock_server_serves_every_operation(mock_server):
+    """Responses come from examples or schemas, with path params matched"""
+    base = mock_server.base_url
+
+    listed = requests.get(f"{base}/pets")
+    assert listed.status_code == 200
+    assert listed.json() == [{"id": 1, "status": "available",
+                              "born": "2024-01-01"}]
+
+    created = requests.post(f"{base}/pets", json={"name": "rex"})
+    assert created.status_code == 201
+    assert created.json() == {"id": 7, "name": "rex"}
+
+    assert requests.delete(f"{base}/pets/3").status_code == 204
+    assert requests.get(f"{base}/unknown").status_code == 404
+
+
+def test_executor_runs_suite_against_mock(mock_server):
+    cases = [{"name": f"list {i}", "method": "GET", "endpoint": "/pets",
+              "expected_status": 200} for i in range(20)]
+    pool = SessionPool()
+    executor = TestExecutor(mock_server.base_url, concurrency=4,
+                            session_pool=pool)
+
+    results = executor.execute_test_suite(cases)
+
+    assert results["passed_tests"] == 20
+    # Keep-alive: far fewer connections than requests
+    assert pool.stats()[mock_server.base_url]["connections_opened"] <= 4
+
+
+def test_replaced_mock_drains_before_stopping():
+    """A new spec version doesn't cut off runs still using the old mock"""
+    registry = MockServerRegistry(drain_seconds=0.3)
+    old = registry.ensure(1, "v1", OpenAPIParser(SPEC))
+    new = registry.ensure(1, "v2", OpenAPIParser(SPEC))
+    try:
+        assert new is not old
+        for _ in range(3):
+            time.sleep(0.15)
+            assert requests.get(f"{old.base_url}/pets").status_code == 200
+
+        time.sleep(0.6)
+        with pytest.raises(requests.ConnectionError):
+            requests.get(f"{old.base_url}/pets", timeout=1)
+        assert requests.get(f"{new.base_url}/pets").status_code == 200
+    finally:
+        registry.stop_all()
@@ -0,0 +1,94 @@
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from app import models
+from app.services import spec_cache
+from app.utils.openapi_parser import OpenAPIParser, load_spec
+
+
+YAML_SPEC = """
+openapi: 3.0.0
+paths:
+  /users/{id}:
+    parameters:
+      - {name: id, in: path, required: true, schema: {type: integer}}
+      - {name: X-Trace, in: header, schema: {type: string}}
+    get:
+      operationId: getUser
+      tags: [users]
+      parameters:
+        - {name: X-Trace, in: header, required: true, schema: {type: string}}
+      responses:
+        '200': {description: OK}
+    head:
+      tags: [users]
+      responses:
+        '200': {description: OK}
+    x-extension: ignored
+"""
+
+
+def test_parser_indexes_operations_and_merges_path_parameters():
+    """YAML specs are indexed by route, operationId and tag"""
+    parser = OpenAPIParser.from_content(YAML_SPEC)
+
+    assert [(e["method"], e["path"]) for e in parser.get_endpoints()] == [
+        ("GET", "/users/{id}"), ("HEAD", "/users/{id}")]
+    assert parser.get_operation("getUser")["method"] == "GET"
+    assert len(parser.get_endpoints_by_tag("users")) == 2
+
+    params = parser.get_endpoint_details("/users/{id}", "GET")["parameters"]
+    # The operation's own X-Trace overrides the path-level one
+    assert [(p["name"], p.get("required")) for p in params] == [
+        ("id", True), ("X-Trace", True)]
+    assert parser.get_endpoint_details("/users/{id}", "delete") == {}
+    assert parser.match_operation("HEAD", "/users/3") == "HEAD /users/{id}"
+
+
+def _pets_spec(name_type="string"):
+    return {
+        "paths": {
+            "/pets": {"get": {"responses": {"200": {"content": {
+                "application/json": {"schema": {
+                    "$ref": "#/components/schemas/Pet"}}}}}}},
+            "/health": {"get": {"responses": {"200": {"description": "OK"}}}}
+        },
+        "components": {"schemas": {"Pet": {
+            "type": "object",
+            "properties": {"name": {"type": name_type}}}}}
+    }
+
+
+def test_diff_sees_changes_to_referenced_components():
+    """Only components/schemas changed, yet the operation using it did"""
+    old = OpenAPIParser(_pets_spec())
+
+    assert old.diff(OpenAPIParser(_pets_spec()))["changed"] == []
+    diff = old.diff(OpenAPIParser(_pets_spec(name_type="integer")))
+    assert diff["changed"] == ["GET /pets"]
+    assert diff["unchanged"] == ["GET /health"]
+
+
+def test_load_spec_rejects_non_objects():
+    with pytest.raises(ValueError):
+        load_spec("- just\n- a list")
+    with pytest.raises(ValueError):
+        load_spec("{not: [valid")
+
+
+def test_spec_cache_parses_each_version_once():
+    """The parsed spec is reused until the spec's updated_at changes"""
+    spec_cache.clear()
+    api_spec = models.APISpec(id=1, spec_content='{"paths": {}}',
+                              updated_at=datetime(2024, 1, 1))
+
+    with patch.object(OpenAPIParser, "from_content",
+                      wraps=OpenAPIParser.from_content) as parse:
+        first = spec_cache.get_parser(api_spec)
+        assert spec_cache.get_parser(api_spec) is first
+        assert parse.call_count == 1
+
+        api_spec.updated_at = datetime(2024, 1, 2)
+        assert spec_cache.get_parser(api_spec) is not first
+        assert parse.call_count == 2
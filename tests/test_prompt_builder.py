@@ -0,0 +1,135 @@
+import json
+from app.services.prompt_builder import PromptBuilder, compact_json
+
+
+SPEC = {
+    "openapi": "3.0.0",
+    "paths": {
+        "/users/{id}": {
+            "get": {
+                "operationId": "getUser",
+                "tags": ["users"],
+                "x-internal": True,
+                "parameters": [{"$ref": "#/components/parameters/UserId"}],
+                "responses": {
+                    "200": {
+                        "description": "The user",
+                        "content": {"application/json": {"schema": {
+                            "$ref": "#/components/schemas/User"}}}
+                    }
+                }
+            }
+        }
+    },
+    "components": {
+        "parameters": {
+            "UserId": {"name": "id", "in": "path", "required": True,
+                       "schema": {"type": "integer"}}
+        },
+        "schemas": {
+            "User": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "integer"},
+                    "tags": {"type": "array", "items": {"type": "string"}},
+                    "manager": {"$ref": "#/components/schemas/User"}
+                }
+            }
+        }
+    }
+}
+
+
+def _endpoint(spec=SPEC, path="/users/{id}", method="get"):
+    return {"path": path, "method": method.upper(),
+            "details": spec["paths"][path][method]}
+
+
+def test_endpoint_spec_resolves_refs_and_prunes():
+    """Refs are inlined and documentation-only fields dropped"""
+    endpoint_spec = PromptBuilder(SPEC).endpoint_spec(_endpoint())
+
+    assert endpoint_spec["parameters"][0]["name"] == "id"
+    schema = endpoint_spec["responses"]["200"]["schema"]
+    # A property named like a pruned key survives
+    assert set(schema["properties"]) == {"id", "tags", "manager"}
+    assert schema["properties"]["manager"]["description"] == \
+        "User (recursive)"
+    assert "operationId" not in endpoint_spec
+    assert "$ref" not in compact_json(endpoint_spec)
+    assert "x-internal" not in compact_json(endpoint_spec)
+
+
+def test_endpoint_spec_is_condensed():
+    """Shorthand schemas, implied objects and repeated schemas once"""
+    error = {"description": "Error", "content": {"application/json": {
+        "schema": {"$ref": "#/components/schemas/Error"}}}}
+    spec = {
+        "paths": {"/items": {"post": {
+            "requestBody": {"content": {"application/json": {"schema": {
+                "$ref": "#/components/schemas/Item"}}}},
+            "responses": {"201": {"content": {"application/json": {
+                "schema": {"$ref": "#/components/schemas/Item"}}}},
+                "400": error, "409": error}
+        }}},
+        "components": {"schemas": {
+            "Item": {"type": "object", "properties": {
+                "id": {"type": "integer", "format": "int64"},
+                "tags": {"type": "array", "items": {"type": "string"}},
+                "kind": {"type": "string", "enum": ["a", "b"]}}},
+            "Error": {"type": "object", "properties": {
+                "code": {"type": "integer"},
+                "message": {"type": "string"}}}
+        }}
+    }
+
+    endpoint_spec = PromptBuilder(spec, token_budget=100000).endpoint_spec(
+        _endpoint(spec, "/items", "post"))
+
+    assert endpoint_spec["requestBody"] == {"schema": {"properties": {
+        "id": "integer:int64", "tags": ["string"],
+        "kind": {"type": "string", "enum": ["a", "b"]}}}}
+    assert endpoint_spec["responses"]["201"] == \
+        {"schema": "same as requestBody"}
+    assert endpoint_spec["responses"]["400"]["schema"] == \
+        {"properties": {"code": "integer", "message": "string"}}
+    assert endpoint_spec["responses"]["409"] == \
+        {"description": "Error", "schema": "same as response 400"}
+
+
+def test_resolved_refs_are_memoized():
+    """Each stub-free reference is resolved once per builder"""
+    builder = PromptBuilder(SPEC)
+    first = builder.resolve({"$ref": "#/components/parameters/UserId"})
+    second = builder.resolve({"$ref": "#/components/parameters/UserId"})
+
+    assert first is second
+    assert builder.resolve({"$ref": "#/components/missing"}) == {}
+
+
+def test_endpoint_spec_fits_token_budget():
+    """Oversized endpoints are degraded until they fit the budget"""
+    big = {
+        "type": "object",
+        "properties": {
+            f"field_{i}": {"type": "object", "description": "x" * 200,
+                           "properties": {"nested": {"type": "string",
+                                                     "example": "y" * 50}}}
+            for i in range(40)
+        }
+    }
+    spec = {"paths": {"/items": {"post": {
+        "description": "Create an item",
+        "requestBody": {"content": {"application/json": {"schema": big}}},
+        "responses": {"201": {"description": "Created"}}
+    }}}}
+
+    unbounded = PromptBuilder(spec, token_budget=100000).endpoint_spec(
+        _endpoint(spec, "/items", "post"))
+    budgeted = PromptBuilder(spec, token_budget=500).endpoint_spec(
+        _endpoint(spec, "/items", "post"))
+
+    assert len(compact_json(budgeted)) < len(compact_json(unbounded))
+    assert len(compact_json(budgeted)) // 4 + 1 <= 500
+    assert budgeted["description"] == "Create an item"
+    assert "field_0" in json.dumps(budgeted)
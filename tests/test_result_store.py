@@ -0,0 +1,92 @@
+from app import models
+from app.services.result_store import load_results, save_results, \
+    query_results
+
+
+def _result(name, status, endpoint="/users", latency=0.1, **extra):
+    return {"name": name, "method": "GET", "endpoint": endpoint,
+            "status": status, "execution_time": latency,
+            "actual_status": 200 if status == "passed" else 500,
+            "expected_status": 200, "errors": [], **extra}
+
+
+def _execution(db, suite):
+    execution = models.TestExecution(test_suite_id=suite.id,
+                                     status="completed")
+    db.add(execution)
+    db.commit()
+    return execution
+
+
+def test_results_round_trip_in_suite_order(test_db, sample_test_suite):
+    """Rows rebuild the executor's result dicts, in position order"""
+    execution = _execution(test_db, sample_test_suite)
+    results = [
+        _result("first", "passed", url_tested="http://x/users"),
+        _result("second", "failed", errors=["Expected status 200, got 500"]),
+        _result("third", "passed", expected_status="2xx")
+    ]
+    save_results(test_db, execution.id, results)
+    test_db.commit()
+    test_db.refresh(execution)
+
+    assert execution.results == results
+    assert load_results(test_db, execution) == results
+
+
+def test_load_results_matches_orm_rows(test_db, sample_test_suite):
+    """Column reads build the same dicts, legacy results as a fallback"""
+    execution = _execution(test_db, sample_test_suite)
+    results = [_result(f"case {n}", "passed", extra=n) for n in range(3)]
+    save_results(test_db, execution.id, list(reversed(results)),
+                 positions=[2, 1, 0])
+    test_db.commit()
+    test_db.refresh(execution)
+
+    assert load_results(test_db, execution) == results == execution.results
+
+    legacy = _execution(test_db, sample_test_suite)
+    legacy.legacy_results = results[:1]
+    test_db.commit()
+    assert load_results(test_db, legacy) == results[:1]
+
+
+def test_query_filters_and_orders_in_sql(test_db, sample_test_suite):
+    """Failures only, slowest first, one endpoint and paging"""
+    execution = _execution(test_db, sample_test_suite)
+    save_results(test_db, execution.id, [
+        _result("a", "passed", latency=0.3),
+        _result("b", "failed", latency=0.1),
+        _result("c", "failed", latency=0.9),
+        _result("d", "failed", endpoint="/orders", latency=2.0)
+    ])
+    test_db.commit()
+
+    failures = query_results(test_db, execution, status="failed",
+                             endpoint="/users", order="slowest")
+    assert failures["total"] == 2
+    assert [r["name"] for r in failures["items"]] == ["c", "b"]
+
+    slowest = query_results(test_db, execution, order="slowest", limit=1)
+    assert slowest["total"] == 4
+    assert [r["name"] for r in slowest["items"]] == ["d"]
+
+    page = query_results(test_db, execution, limit=2, offset=2)
+    assert [r["name"] for r in page["items"]] == ["c", "d"]
+
+
+def test_query_falls_back_to_legacy_json(test_db, sample_test_suite):
+    """Executions stored in the old results column can still be filtered"""
+    execution = models.TestExecution(
+        test_suite_id=sample_test_suite.id,
+        status="completed",
+        legacy_results=[_result("old-pass", "passed"),
+                        _result("old-fail", "failed")]
+    )
+    test_db.add(execution)
+    test_db.commit()
+
+    page = query_results(test_db, execution, status="failed")
+    assert page["total"] == 1
+    assert page["items"][0]["name"] == "old-fail"
+    assert len(execution.results) == 2